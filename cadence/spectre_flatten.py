@@ -12,14 +12,43 @@
 # Usage:
 #   python spectre_flatten_oop_legacy.py input.scs
 #   python spectre_flatten_oop_legacy.py input.scs output_flat.scs
+#   python spectre_flatten_oop_legacy.py input.scs - > output_flat.scs
+#   python spectre_flatten_oop_legacy.py --stats input.scs output_flat.scs
+#   python spectre_flatten_oop_legacy.py --jobs 8 input.scs output_flat.scs
+#
+# The input is parsed line by line and the flattened netlist is streamed to
+# the output as it is generated, so memory is bounded by the parsed
+# subckt definitions, not by the size of the flattened result. An output of
+# '-' writes to stdout; --stats reports lines, throughput and peak RSS on
+# stderr.
+#
+# --jobs N flattens the top-level instances in a pool of N worker processes
+# that share the parsed netlist read-only (inherited on fork, sent once per
+# worker otherwise). Each worker streams its instance to a temporary file
+# and the parent copies those files to the output in top-level order, so the
+# output is byte-identical to the serial run and no flattened subtree is
+# held in memory; parallelism only helps when the top level has several
+# large instances.
 #
 # Notes:
 # - This is not a full Spectre parser; it targets common netlisted structure.
 # - It preserves parameter text but does not evaluate/substitute parameters.
 
+import argparse
+import multiprocessing
+import operator
+import os
 import re
+import shutil
 import sys
 import io
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
 
 SUBCKT_START_RE = re.compile(r'^\s*subckt\s+(\S+)\s*(.*)$', re.IGNORECASE)
 SUBCKT_END_RE   = re.compile(r'^\s*ends\b', re.IGNORECASE)
@@ -59,8 +88,9 @@ class SpectreNetlist(object):
         self.top_elems = []   # parsed elements at top level
         self.global_nodes = set(['0'])
 
-    def join_continuations(self, lines):
-        out = []
+    def iter_continuations(self, lines):
+        # Generator form of join_continuations(): joins '\' continuations
+        # while reading, so the whole file never has to be held as lines.
         buf = ''
         for raw in lines:
             line = raw.rstrip('\n')
@@ -71,11 +101,13 @@ class SpectreNetlist(object):
             if buf.rstrip().endswith('\\'):
                 buf = buf.rstrip()[:-1].rstrip()
                 continue
-            out.append(buf)
+            yield buf
             buf = ''
         if buf:
-            out.append(buf)
-        return out
+            yield buf
+
+    def join_continuations(self, lines):
+        return list(self.iter_continuations(lines))
 
     def is_blank_or_comment(self, line):
         s = line.strip()
@@ -129,8 +161,14 @@ class SpectreNetlist(object):
         return Element(name, nodes, master, ' '.join(params), line)
 
     def parse(self, text, keep_directives=True):
-        raw_lines = text.splitlines()
-        lines = self.join_continuations(raw_lines)
+        self.parse_lines(text.splitlines(), keep_directives=keep_directives)
+
+    def parse_file(self, path, keep_directives=True):
+        # Incremental parse: the file is read line by line, never as one string.
+        self.parse_lines(iter_text_lines(path), keep_directives=keep_directives)
+
+    def parse_lines(self, raw_lines, keep_directives=True):
+        lines = self.iter_continuations(raw_lines)
 
         current = None  # Subckt or None
 
@@ -196,87 +234,290 @@ class SpectreNetlist(object):
         return net in global_nodes
 
 
+class SubcktTemplate(object):
+    # Compiled form of a subckt, so repeated instances expand by plain name
+    # substitution instead of rebuilding node maps and redoing global checks.
+    #
+    # An instance is described by a value list: vals[0] is its full instance
+    # name, vals[1:] the actual nets on the subckt's distinct ports (see
+    # port_actuals()). Every element is precompiled against those slots:
+    #   leaf      (None, fmt, get)        line = fmt % get(vals)
+    #   instance  (master, suffix, nets)  name = vals[0] + suffix, and each
+    #             (slot, text) in nets is vals[slot] + text, or just text for
+    #             a global net (slot None)
+    def __init__(self, sub, subckts, global_nodes, sep='.'):
+        self.name = sub.name
+
+        # distinct ports in first-appearance order; value slot = index + 1
+        self.port_names = []
+        self.port_index = []   # positions of each distinct port in sub.ports
+        slot_of = {}
+        for i, p in enumerate(sub.ports):
+            if p not in slot_of:
+                slot_of[p] = len(self.port_names) + 1
+                self.port_names.append(p)
+                self.port_index.append([])
+            self.port_index[slot_of[p] - 1].append(i)
+        self.simple_ports = len(self.port_names) == len(sub.ports)
+
+        self.elements = []
+        for e in sub.elements:
+            nets = []
+            for n in e.nodes:
+                if n in slot_of:
+                    nets.append((slot_of[n], ''))
+                elif SpectreNetlist.is_global(n, global_nodes):
+                    nets.append((None, n))
+                else:
+                    nets.append((0, sep + n))
+
+            if e.master in subckts:
+                self.elements.append((e.master, sep + e.name, nets))
+                continue
+
+            slots = [0]
+            pieces = []
+            for slot, text in nets:
+                if slot is None:
+                    pieces.append(_escape(text))
+                else:
+                    slots.append(slot)
+                    pieces.append('%s' + _escape(text))
+            fmt = '%%s%s (%s) %s' % (_escape(sep + e.name), ' '.join(pieces),
+                                     _escape(e.master))
+            if e.params:
+                fmt += ' ' + _escape(e.params)
+            self.elements.append((None, fmt, operator.itemgetter(*slots)))
+
+    def port_actuals(self, nodes):
+        # Actual net on each distinct port for an instance connected to
+        # nodes: the last connection to a port wins, and a port left
+        # unconnected keeps its own name.
+        n = len(nodes)
+        if self.simple_ports and n >= len(self.port_names):
+            return nodes[:len(self.port_names)]
+        out = []
+        for p, positions in zip(self.port_names, self.port_index):
+            actual = p
+            for i in positions:
+                if i < n:
+                    actual = nodes[i]
+            out.append(actual)
+        return out
+
+
+def _escape(text):
+    return text.replace('%', '%%')
+
+
 class SpectreFlattener(object):
     def __init__(self, netlist, sep='.'):
         self.nl = netlist
         self.sep = sep
         self.out = []
+        self._templates = {}  # subckt name -> SubcktTemplate
+
+    def template(self, name):
+        t = self._templates.get(name)
+        if t is None:
+            t = SubcktTemplate(self.nl.subckts[name], self.nl.subckts,
+                               self.nl.global_nodes, self.sep)
+            self._templates[name] = t
+        return t
 
     def flatten(self):
+        self.out.extend(self.iter_flatten())
+        return self.out
+
+    def iter_flatten(self):
+        # Generator over the flattened netlist lines, in the order flatten()
+        # returns them; nothing is accumulated.
         # Start with passthrough top-level lines (includes/options/global/etc.)
-        self.out.extend(self.nl.top_lines)
+        for line in self.nl.top_lines:
+            yield line
 
         for e in self.nl.top_elems:
-            self._flatten_elem(e, path='', node_map={})
-        return self.out
+            for line in self.iter_elem(e, path='', node_map={}):
+                yield line
+
+    def write(self, stream, chunk_lines=4096, jobs=1):
+        # Stream the flattened netlist to a text file object in chunks.
+        # Returns (lines, characters) written.
+        if jobs > 1 and len(self.nl.top_elems) > 1:
+            return self.write_parallel(stream, jobs, chunk_lines)
+        return write_lines(stream, self.iter_flatten(), chunk_lines)
+
+    def write_parallel(self, stream, jobs, chunk_lines=4096):
+        # Same output as write(), with each top-level element flattened in a
+        # worker process into its own temporary file. imap() returns the
+        # files in submission order; each is copied to the stream and
+        # removed as soon as it arrives.
+        n_lines = 0
+        n_chars = 0
+        if self.nl.top_lines:
+            text = '\n'.join(self.nl.top_lines) + '\n'
+            stream.write(text)
+            n_lines += len(self.nl.top_lines)
+            n_chars += len(text)
+
+        n = len(self.nl.top_elems)
+        chunksize = max(1, n // (jobs * 8))
+        tmp_dir = tempfile.mkdtemp(prefix='spectre_flatten.')
+        try:
+            pool = multiprocessing.Pool(jobs, _init_worker,
+                                        (self.nl, self.sep, tmp_dir, chunk_lines))
+            try:
+                for part, part_lines, part_chars in pool.imap(_flatten_top_elem,
+                                                              range(n), chunksize):
+                    with io.open(part, 'r', encoding='utf-8', newline='') as f:
+                        shutil.copyfileobj(f, stream, 1 << 20)
+                    os.remove(part)
+                    n_lines += part_lines
+                    n_chars += part_chars
+                pool.close()
+            except BaseException:
+                pool.terminate()
+                raise
+            finally:
+                pool.join()
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        return n_lines, n_chars
 
     def _flatten_elem(self, elem, path, node_map):
+        self.out.extend(self.iter_elem(elem, path, node_map))
+
+    def iter_elem(self, elem, path, node_map):
+        # Depth-first inlining on an explicit stack instead of recursion, so
+        # deep hierarchies do not hit Python's recursion limit. Each frame is
+        # one subckt instance being expanded from its compiled template:
+        #   (template element iterator, instance value list)
         full_name = elem.name if not path else path + self.sep + elem.name
         mapped_nodes = [node_map.get(n, n) for n in elem.nodes]
 
         # Spectre-correct: inline if master matches a known subckt
-        if elem.master in self.nl.subckts:
-            sub = self.nl.subckts[elem.master]
-
-            # map ports -> actual nets
-            port_map = {}
-            for i, p in enumerate(sub.ports):
-                if i < len(mapped_nodes):
-                    port_map[p] = mapped_nodes[i]
+        if elem.master not in self.nl.subckts:
+            # leaf element: emit in paren form for consistency
+            line = '%s (%s) %s' % (full_name, ' '.join(mapped_nodes), elem.master)
+            if elem.params:
+                line += ' ' + elem.params
+            yield line
+            return
 
-            # breadcrumb comment
-            self.out.append('* flatten: %s %s' % (full_name, elem.master))
+        template = self.template
+        t = template(elem.master)
 
-            for child in sub.elements:
-                child_map = dict(port_map)
+        # breadcrumb comment
+        yield '* flatten: %s %s' % (full_name, elem.master)
 
-                # uniquify internal nets that appear on this child's pins
-                for n in child.nodes:
-                    if n in sub.ports:
-                        continue
-                    if SpectreNetlist.is_global(n, self.nl.global_nodes):
-                        continue
-                    if n not in child_map:
-                        child_map[n] = full_name + self.sep + n
+        stack = [(iter(t.elements), [full_name] + t.port_actuals(mapped_nodes))]
+        masters = [elem.master]   # subckt masters on the stack, for recursion checks
 
-                self._flatten_elem(child, path=full_name, node_map=child_map)
-            return
+        while stack:
+            it, vals = stack[-1]
+            for master, fmt, arg in it:
+                if master is None:
+                    yield fmt % arg(vals)
+                    continue
 
-        # leaf element: emit in paren form for consistency
-        line = '%s (%s) %s' % (full_name, ' '.join(mapped_nodes), elem.master)
-        if elem.params:
-            line += ' ' + elem.params
-        self.out.append(line)
+                if master in masters:
+                    raise ValueError('recursive subckt instantiation: %s' %
+                                     ' -> '.join(masters + [master]))
 
+                full_name = vals[0] + fmt
+                mapped_nodes = [text if slot is None else vals[slot] + text
+                                for slot, text in arg]
+                t = template(master)
 
-def read_text(path):
-    # Python2/3 friendly text read
-    try:
-        with io.open(path, 'r', encoding='utf-8', errors='replace') as f:
-            return f.read()
-    except TypeError:
-        # Python2 io.open doesn't have errors= in some builds; fallback
-        with io.open(path, 'r', encoding='utf-8') as f:
-            return f.read()
+                yield '* flatten: %s %s' % (full_name, master)
 
-def write_text(path, text):
+                stack.append((iter(t.elements),
+                              [full_name] + t.port_actuals(mapped_nodes)))
+                masters.append(master)
+                break
+            else:
+                stack.pop()
+                masters.pop()
+
+
+def write_lines(stream, lines, chunk_lines=4096):
+    # Write lines to a text stream in chunks of chunk_lines.
+    # Returns (lines, characters) written.
+    n_lines = 0
+    n_chars = 0
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= chunk_lines:
+            text = '\n'.join(chunk) + '\n'
+            stream.write(text)
+            n_lines += len(chunk)
+            n_chars += len(text)
+            chunk = []
+    if chunk:
+        text = '\n'.join(chunk) + '\n'
+        stream.write(text)
+        n_lines += len(chunk)
+        n_chars += len(text)
+    return n_lines, n_chars
+
+
+# Per-process state for write_parallel(); set by the pool initializer:
+# (flattener, temporary directory, chunk_lines).
+_worker_state = None
+
+def _init_worker(nl, sep, tmp_dir, chunk_lines):
+    global _worker_state
+    _worker_state = (SpectreFlattener(nl, sep=sep), tmp_dir, chunk_lines)
+
+def _flatten_top_elem(i):
+    # Stream top-level element i to <tmp_dir>/<i>.scs; returns
+    # (path, lines, characters) for the parent to copy in order.
+    fl, tmp_dir, chunk_lines = _worker_state
+    part = os.path.join(tmp_dir, '%d.scs' % i)
+    with io.open(part, 'w', encoding='utf-8', newline='') as f:
+        n_lines, n_chars = write_lines(
+            f, fl.iter_elem(fl.nl.top_elems[i], path='', node_map={}), chunk_lines)
+    return part, n_lines, n_chars
+
+
+def iter_text_lines(path):
+    # Python2/3 friendly line reader; yields the same lines as
+    # f.read().splitlines() without holding the whole file.
     try:
-        with io.open(path, 'w', encoding='utf-8') as f:
-            f.write(text)
+        f = io.open(path, 'r', encoding='utf-8', errors='replace')
     except TypeError:
-        with io.open(path, 'w') as f:
-            if isinstance(text, unicode):  # noqa: F821 (python2)
-                f.write(text)
-            else:
-                f.write(text)
+        f = io.open(path, 'r', encoding='utf-8')
+    with f:
+        for raw in f:
+            # splitlines() also breaks on \f, \v, \x1c.. inside a line
+            for line in raw.splitlines():
+                yield line
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        return rss / (1024.0 * 1024.0)  # bytes
+    return rss / 1024.0  # kilobytes
 
 def main(argv):
-    if len(argv) < 2:
-        sys.stderr.write('Usage: spectre_flatten_oop_legacy.py input.scs [output.scs]\n')
-        return 2
-
-    in_path = argv[1]
-    out_path = argv[2] if len(argv) > 2 else None
+    ap = argparse.ArgumentParser(description='Flatten a Spectre netlist.')
+    ap.add_argument('input', help='input netlist (.scs)')
+    ap.add_argument('output', nargs='?', default=None,
+                    help="output netlist (default: <stem>_flat.scs, '-' for stdout)")
+    ap.add_argument('--stats', action='store_true',
+                    help='report timing, throughput and peak RSS on stderr')
+    ap.add_argument('-j', '--jobs', type=int, default=1,
+                    help='flatten top-level instances in N processes (default: 1)')
+    args = ap.parse_args(argv[1:])
+    if args.jobs < 1:
+        ap.error('--jobs must be >= 1')
+
+    stats = args.stats
+    in_path = args.input
+    out_path = args.output
     if out_path is None:
         # default output name: <stem>_flat.scs
         if in_path.lower().endswith('.scs'):
@@ -284,15 +525,47 @@ def main(argv):
         else:
             out_path = in_path + '_flat'
 
-    text = read_text(in_path)
+    t0 = time.time()
     nl = SpectreNetlist()
-    nl.parse(text, keep_directives=True)
+    nl.parse_file(in_path, keep_directives=True)
+    t1 = time.time()
 
     fl = SpectreFlattener(nl, sep='.')
-    out_lines = fl.flatten()
-    write_text(out_path, '\n'.join(out_lines) + '\n')
-
-    sys.stdout.write('Wrote flattened netlist to: %s\n' % out_path)
+    try:
+        if out_path == '-':
+            n_lines, n_chars = fl.write(sys.stdout, jobs=args.jobs)
+            sys.stdout.flush()
+        else:
+            try:
+                f = io.open(out_path, 'w', encoding='utf-8')
+            except TypeError:
+                f = io.open(out_path, 'w')
+            try:
+                with f:
+                    n_lines, n_chars = fl.write(f, jobs=args.jobs)
+            except ValueError:
+                # do not leave a truncated netlist behind
+                try:
+                    os.remove(out_path)
+                except OSError:
+                    pass
+                raise
+    except ValueError as e:
+        sys.stderr.write('Error: %s\n' % e)
+        return 1
+    t2 = time.time()
+
+    if out_path != '-':
+        sys.stdout.write('Wrote flattened netlist to: %s\n' % out_path)
+    if stats:
+        dt = max(t2 - t1, 1e-9)
+        sys.stderr.write('parse: %.2fs  flatten+write: %.2fs  %d lines, %.1f MB  '
+                         '(%.0f lines/s, %.1f MB/s)\n'
+                         % (t1 - t0, t2 - t1, n_lines, n_chars / 1e6,
+                            n_lines / dt, n_chars / 1e6 / dt))
+        rss = peak_rss_mb()
+        if rss is not None:
+            sys.stderr.write('peak RSS: %.1f MB\n' % rss)
     return 0
 
 
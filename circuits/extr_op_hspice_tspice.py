@@ -1,10 +1,87 @@
 #!/usr/bin/env python3
+"""
+Print operating-point parameters of MOS devices from an HSPICE/T-Spice
+listing (.lis), where they appear as mini-tables:
+
+     element  XDUT.X1.xMN.m_mos  XDUT.X1.xMP.m_mos
+     MODEL    0:nch.1            0:pch.1
+     REGION   Saturati           Linear
+     id       ...
+
+One pass over the listing records every mini-table's device columns, row
+names and byte range, and is cached under $XDG_CACHE_HOME/extr_op_hspice_tspice
+(or ~/.cache/extr_op_hspice_tspice), keyed by the listing's path, size and
+mtime; nothing is written into the simulation directory, so -latest keeps
+picking the newest run. Lookups then read only the tables they need from an mmap of the
+file, and -csv dumps any number of devices, or all of them, as one CSV row
+per device.
+
+-where and -by select and rank devices with vectorized expressions over a
+device x parameter table (OpPointDB, cached alongside the index), e.g.
+
+    -where "vds - vdsat < 50mV"      -by "abs(id)" -top 20
+
+These need numpy; everything else works without it.
+"""
+import ast
+import csv
+import math
+import mmap
+import operator
 import os
 import re
 import sys
+import zipfile
+from array import array
+from bisect import bisect_right
+
+try:
+    import numpy as np
+except ImportError:  # only -where/-by need numpy
+    np = None
+
+from spice_netlist import (
+    load_pickle_cache,
+    netlist_stamp,
+    save_pickle_cache,
+    user_cache_dir,
+    user_cache_path,
+)
 
 INST_RE = re.compile(r"\S+\.m_mos\b")
 
+# Start of every line whose first word begins with MODEL.
+MODEL_LINE_RE = re.compile(rb"^[ \t\f\v]*MODEL", re.MULTILINE)
+# End of the last line before a whitespace-only line (a table boundary).
+BLANK_LINE_RE = re.compile(rb"\n[ \t\r\f\v]*(?:\n|$)")
+# First word of every non-blank line.
+ROW_NAME_RE = re.compile(r"^[^\S\n]*(\S+)", re.MULTILINE)
+
+CACHE_SUFFIX = ".opidx"
+CACHE_VERSION = 1
+
+DB_SUFFIX = ".opdb.npz"
+DB_VERSION = 1
+
+# Tables converted per batch while building the OpPointDB.
+BUILD_TABLES = 4096
+
+# SPICE scale suffixes; anything after the suffix letter(s) is a unit.
+SCALE_FACTORS = {
+    "a": 1e-18, "f": 1e-15, "p": 1e-12, "n": 1e-9, "u": 1e-6, "m": 1e-3,
+    "k": 1e3, "x": 1e6, "meg": 1e6, "g": 1e9, "t": 1e12,
+}
+SPICE_NUMBER_RE = re.compile(
+    r"([-+]?(?:\d+\.?\d*|\.\d+)(?:e[-+]?\d+)?)(meg|[afpnumkxgt])?[a-z]*$", re.IGNORECASE
+)
+# Scale factor by character code (1.0 for anything that is not a suffix).
+SCALE_TABLE = [SCALE_FACTORS.get(chr(c).lower(), 1.0) for c in range(129)]
+# String literals are matched first so numbers inside them are left alone.
+QUERY_LITERAL_RE = re.compile(
+    r"(\"[^\"]*\"|'[^']*')|(?<![\w.])((?:\d+\.?\d*|\.\d+)(?:e[-+]?\d+)?)(meg|[afpnumkxgt])?[a-z]*",
+    re.IGNORECASE,
+)
+
 # Default output order (preferred)
 DEFAULT_ORDER = ["REGION", "vbs", "vds", "vdsat", "vgt", "vgs", "vth", "id", "gm", "gds"]
 
@@ -12,6 +89,8 @@ DEFAULT_ORDER = ["REGION", "vbs", "vds", "vdsat", "vgt", "vgs", "vth", "id", "gm
 def usage(prog: str) -> int:
     print(
         f"Usage: {prog} [-all] <result_file_path_name> <device_name> [-latest]\n"
+        f"       {prog} -csv <out.csv|-> [-all] [-params p1,p2,...] [-devices <file>]\n"
+        f"           <result_file_path_name> [<device_name> ...] [-latest]\n"
         f"  <device_name> may use either '.' or '/' as the hierarchy separator.\n"
         f"  Example: XDUT/X1/X2/xMNcdio.m_mos is accepted as XDUT.X1.X2.xMNcdio.m_mos\n"
         f"\n"
@@ -19,7 +98,21 @@ def usage(prog: str) -> int:
         f"  -all    : print all rows in the mini-table\n"
         f"  -latest : if <result_file_path_name> includes a directory, ignore it and instead\n"
         f"            use the newest subdirectory under the current directory, looking for the same basename\n"
-        f"            (if only a basename is provided, -latest has no effect)",
+        f"            (if only a basename is provided, -latest has no effect)\n"
+        f"\n"
+        f"  -csv     : write one CSV row per device (all devices if none are named) with\n"
+        f"             the default columns, every row name (-all) or -params\n"
+        f"  -devices : read more device names from <file>, one per line\n"
+        f"  -nocache : do not read or write the index caches under {default_cache_dir()}\n"
+        f"\n"
+        f"  Queries (need numpy; write CSV like -csv, to stdout unless -csv is given):\n"
+        f"  -where <expr> : keep devices where expr holds, e.g. \"vds - vdsat < 50mV\",\n"
+        f"                  'REGION == \"Linear\" and abs(id) > 1u'\n"
+        f"  -by <expr>    : sort by expr, largest first (-asc: smallest first)\n"
+        f"  -top <n>      : keep the first n devices after sorting\n"
+        f"  Expressions use row names (id falls back to ids), SPICE numbers (50m, 1.2u),\n"
+        f"  + - * / **, comparisons, and/or/not, abs(), sqrt(), log10(), min()/max() of two\n"
+        f"  or more values (element-wise), col(\"row name\")",
         file=sys.stderr,
     )
     return 2
@@ -102,121 +195,668 @@ def resolve_latest(path_arg: str, latest: bool) -> tuple[str, bool]:
     return candidate, True
 
 
-def parse_table_for_device(lines: list[str], start_model_idx: int, device_candidates: list[str]):
+class OpIndex:
+    """
+    Every MOS mini-table of one listing, in file order.
+
+      devices                   device names of all tables, column by column
+      table_first[t]            position in devices of table t's first column;
+                                table_first[-1] == len(devices)
+      table_start/table_end[t]  byte range from the MODEL line to the blank
+                                line (or EOF) that ends the table
+      table_rows[t]             id into row_sets of the table's row names
     """
-    Given the file lines and an index pointing at a MODEL row, return:
-      (matched_device, insts, col, rows_dict, end_idx)
 
-    where rows_dict maps rowname -> value_for_device.
+    def __init__(self, devices, table_first, table_start, table_end, table_rows, row_sets):
+        self.devices = devices
+        self.table_first = table_first
+        self.table_start = table_start
+        self.table_end = table_end
+        self.table_rows = table_rows
+        self.row_sets = row_sets
+        self._positions = None
+
+    @property
+    def table_count(self) -> int:
+        return len(self.table_start)
+
+    def position(self, device: str) -> int | None:
+        """Position of the first column named device, or None."""
+        if self._positions is None:
+            positions = {}
+            for pos, name in enumerate(self.devices):
+                positions.setdefault(name, pos)
+            self._positions = positions
+        return self._positions.get(device)
+
+    def locate(self, pos: int) -> tuple[int, int]:
+        """(table, column) of device position pos."""
+        t = bisect_right(self.table_first, pos) - 1
+        return t, pos - self.table_first[t]
+
+    def find(self, device_candidates: list[str]) -> int | None:
+        """Position of the earliest column matching any candidate spelling."""
+        found = [p for p in map(self.position, device_candidates) if p is not None]
+        return min(found) if found else None
+
+    def row_names(self) -> list[str]:
+        """Every row name of every table, in first-seen order."""
+        seen = {}
+        for rows in self.row_sets:
+            for name in rows:
+                seen.setdefault(name, None)
+        return list(seen)
+
+
+def header_start(data, pos: int) -> int:
     """
-    n = len(lines)
+    Byte offset of the header block above the line starting at pos: skip
+    blank lines upward, then take the run of non-blank lines above them.
+    """
+    end = pos
+    # skip blank lines directly above
+    while end > 0:
+        line_start = data.rfind(b"\n", 0, end - 1) + 1
+        if data[line_start:end].strip():
+            break
+        end = line_start
 
-    def prev_nonblank(idx: int) -> int:
-        while idx >= 0 and lines[idx].strip() == "":
-            idx -= 1
-        return idx
+    start = end
+    while start > 0:
+        line_start = data.rfind(b"\n", 0, start - 1) + 1
+        if not data[line_start:start].strip():
+            break
+        start = line_start
+    return start
 
-    # Gather header lines immediately above MODEL until blank line
-    h = prev_nonblank(start_model_idx - 1)
-    if h < 0:
-        return None
 
-    k = h
-    while k >= 0 and lines[k].strip() != "":
-        k -= 1
+def scan_op_tables(data) -> OpIndex:
+    """
+    Index every MOS mini-table in data (bytes or an mmap of the listing).
+    A MODEL line whose header block names no *.m_mos devices is skipped.
+    """
+    devices = []
+    table_first = array("q")
+    table_start = array("q")
+    table_end = array("q")
+    table_rows = array("i")
+    row_sets = []
+    row_set_ids = {}
+    size = len(data)
+
+    for m in MODEL_LINE_RE.finditer(data):
+        start = m.start()
+        header = data[header_start(data, start):start].decode("utf-8", errors="replace")
+        insts = INST_RE.findall(" ".join(header.split()))
+        if not insts:
+            continue
 
-    header_block = " ".join(l.strip() for l in lines[k + 1 : h + 1])
-    insts = INST_RE.findall(header_block)
-    if not insts:
-        return None
+        blank = BLANK_LINE_RE.search(data, start)
+        end = blank.start() + 1 if blank else size
 
-    matched_device = None
-    for d in device_candidates:
-        if d in insts:
-            matched_device = d
-            break
+        text = data[start:end].decode("utf-8", errors="replace")
+        rows = tuple(ROW_NAME_RE.findall(text))
+        row_id = row_set_ids.get(rows)
+        if row_id is None:
+            row_id = row_set_ids[rows] = len(row_sets)
+            row_sets.append(rows)
 
-    if matched_device is None:
-        return None
+        table_first.append(len(devices))
+        devices.extend(insts)
+        table_start.append(start)
+        table_end.append(end)
+        table_rows.append(row_id)
 
-    col = insts.index(matched_device)
+    table_first.append(len(devices))
+    return OpIndex(devices, table_first, table_start, table_end, table_rows, row_sets)
 
-    rows = {}
-    j = start_model_idx
-    while j < n and lines[j].strip() != "":
-        row = lines[j].strip()
-        parts = row.split()
-        if not parts:
-            j += 1
-            continue
-        rowname = parts[0]
-        values = parts[1:]
-        if col < len(values):
-            rows[rowname] = values[col]
-        # else: malformed/short row => ignore (fault tolerant)
-        j += 1
 
-    return matched_device, insts, col, rows, j
+def map_listing(f):
+    try:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except ValueError:
+        # empty file: nothing to map
+        return b""
+
+
+def default_cache_dir() -> str:
+    return user_cache_dir("extr_op_hspice_tspice")
+
+
+def listing_cache_path(path: str, suffix: str) -> str:
+    """
+    One cache file per resolved listing path, in default_cache_dir(). The
+    directory is created on demand; the listing's own directory is never
+    written to, since that would bump its mtime and mislead -latest.
+    """
+    return user_cache_path(default_cache_dir(), path, suffix)
 
 
-def extract_device_table(path: str, device_arg: str, print_all: bool) -> int:
+def load_op_index(path: str, data, use_cache: bool = True) -> OpIndex:
+    """
+    Return the OpIndex of the listing at path, whose contents are data.
+
+    With use_cache, the index is pickled under default_cache_dir(), keyed by
+    the listing's path, size and mtime, and loaded from there on later runs.
+    A stale or unreadable cache is ignored; a cache that cannot be written
+    is not an error.
+    """
+    cache_path = listing_cache_path(path, CACHE_SUFFIX)
+    stamp = netlist_stamp(path)
+
+    if use_cache:
+        index = load_pickle_cache(cache_path, CACHE_VERSION, stamp)
+        if index is not None:
+            return index
+
+    index = scan_op_tables(data)
+
+    if use_cache:
+        save_pickle_cache(cache_path, CACHE_VERSION, stamp, index)
+
+    return index
+
+
+def read_table(data, index: OpIndex, t: int) -> list[tuple[str, list[str]]]:
+    """(row name, values) of every row of table t, in file order."""
+    text = data[index.table_start[t]:index.table_end[t]].decode("utf-8", errors="replace")
+    rows = []
+    for line in text.splitlines():
+        parts = line.split()
+        if parts:
+            rows.append((parts[0], parts[1:]))
+    return rows
+
+
+def column_values(rows: list[tuple[str, list[str]]], col: int) -> dict[str, str]:
+    """
+    rowname -> value of column col. Short (malformed) rows are ignored; a
+    repeated row name keeps its last value.
+    """
+    return {name: values[col] for name, values in rows if col < len(values)}
+
+
+def select_params(values: dict[str, str], params: list[str]) -> list[str | None]:
+    """Values of params in order (None if missing), with id falling back to ids."""
+    out = []
+    for key in params:
+        value = values.get(key)
+        if value is None and key == "id":
+            value = values.get("ids")
+        out.append(value)
+    return out
+
+
+def not_found_message(device_arg: str, device_candidates: list[str]) -> str:
+    if len(device_candidates) == 1:
+        return f"Device not found in any MOS mini-table: {device_arg}"
+    return "Device not found in any MOS mini-table. Tried:\n" + "\n".join(
+        f"  {d}" for d in device_candidates
+    )
+
+
+def extract_device_table(path: str, device_arg: str, print_all: bool, use_cache: bool = True) -> int:
     device_candidates = device_candidates_from_arg(device_arg)
 
     try:
-        with open(path, "r", errors="replace") as f:
-            lines = f.readlines()
+        with open(path, "rb") as f:
+            data = map_listing(f)
+            index = load_op_index(path, data, use_cache)
     except OSError as e:
         print(f"Error opening '{path}': {e}", file=sys.stderr)
         return 2
 
-    n = len(lines)
-    i = 0
-    while i < n:
-        if lines[i].lstrip().startswith("MODEL"):
-            parsed = parse_table_for_device(lines, i, device_candidates)
-            if parsed is None:
-                i += 1
-                continue
+    pos = index.find(device_candidates)
+    if pos is None:
+        print(not_found_message(device_arg, device_candidates), file=sys.stderr)
+        return 1
 
-            _matched_device, _insts, _col, rows, _end = parsed
-
-            if print_all:
-                # Print in file order (MODEL line onward)
-                j = i
-                while j < n and lines[j].strip() != "":
-                    parts = lines[j].split()
-                    if parts:
-                        rowname = parts[0].strip()
-                        if rowname in rows:
-                            print(f"{rowname:<12} {rows[rowname]}")
-                    j += 1
-                return 0
-
-            # Default: print selected keys in desired order, with id->ids fallback
-            for key in DEFAULT_ORDER:
-                if key == "id":
-                    if "id" in rows:
-                        print(f"{'id':<12} {rows['id']}")
-                    elif "ids" in rows:
-                        # fallback: print under label "id" but value from "ids"
-                        print(f"{'id':<12} {rows['ids']}")
-                    # else: neither exists => skip silently
-                else:
-                    if key in rows:
-                        print(f"{key:<12} {rows[key]}")
-            return 0
+    t, col = index.locate(pos)
+    table = read_table(data, index, t)
+    rows = column_values(table, col)
 
-        i += 1
+    if print_all:
+        # Print in file order (MODEL line onward)
+        for rowname, _values in table:
+            if rowname in rows:
+                print(f"{rowname:<12} {rows[rowname]}")
+        return 0
 
-    if len(device_candidates) == 1:
-        print(f"Device not found in any MOS mini-table: {device_arg}", file=sys.stderr)
+    # Default: print selected keys in desired order, with id->ids fallback
+    for key, value in zip(DEFAULT_ORDER, select_params(rows, DEFAULT_ORDER)):
+        if value is not None:
+            print(f"{key:<12} {value}")
+    return 0
+
+
+def iter_device_values(data, index: OpIndex, positions, params: list[str]):
+    """
+    Yield (position, select_params() values) for the device positions, in
+    the given order, reading each needed table once in file order.
+
+    Positions already in file order are streamed; otherwise only the
+    selected values are held until their turn comes.
+    """
+    positions = list(positions)
+    table_first = index.table_first
+
+    if all(a <= b for a, b in zip(positions, positions[1:])):
+        t = -1
+        rows = None
+        for pos in positions:
+            if t < 0 or not table_first[t] <= pos < table_first[t + 1]:
+                t = index.locate(pos)[0]
+                rows = read_table(data, index, t)
+            yield pos, select_params(column_values(rows, pos - table_first[t]), params)
+        return
+
+    by_table = {}
+    for pos in positions:
+        by_table.setdefault(index.locate(pos)[0], []).append(pos)
+
+    values = {}
+    for t in sorted(by_table):
+        rows = read_table(data, index, t)
+        first = table_first[t]
+        for pos in by_table[t]:
+            values[pos] = select_params(column_values(rows, pos - first), params)
+
+    for pos in positions:
+        yield pos, values[pos]
+
+
+def iter_all_device_values(data, index: OpIndex, params: list[str]):
+    """Yield (position, select_params() values) for every device, in file order."""
+    table_first = index.table_first
+    for t in range(index.table_count):
+        rows = read_table(data, index, t)
+        for pos in range(table_first[t], table_first[t + 1]):
+            yield pos, select_params(column_values(rows, pos - table_first[t]), params)
+
+
+def write_device_csv(path: str, out, device_args: list[str], params: list[str] | None,
+                     use_cache: bool = True, query: dict | None = None) -> int:
+    """
+    Write a CSV with a header row (device, params...) and one row per
+    device to the text stream out. With no device_args every device in the
+    listing is written, in file order; otherwise the named ones in the order
+    given. params None means every row name in the listing. Devices that
+    cannot be found are reported and skipped (return 1).
+
+    query holds OpPointDB.select() arguments (where, by, top, ascending)
+    applied to those devices first.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = map_listing(f)
+            index = load_op_index(path, data, use_cache)
+    except OSError as e:
+        print(f"Error opening '{path}': {e}", file=sys.stderr)
+        return 2
+
+    if params is None:
+        params = index.row_names()
+
+    status = 0
+    if device_args:
+        positions = []
+        for device_arg in device_args:
+            device_candidates = device_candidates_from_arg(device_arg)
+            pos = index.find(device_candidates)
+            if pos is None:
+                print(not_found_message(device_arg, device_candidates), file=sys.stderr)
+                status = 1
+            else:
+                positions.append(pos)
     else:
-        print(
-            "Device not found in any MOS mini-table. Tried:\n"
-            + "\n".join(f"  {d}" for d in device_candidates),
-            file=sys.stderr,
-        )
-    return 1
+        positions = None
+
+    if query:
+        db = load_op_db(path, data, index, use_cache)
+        try:
+            positions = db.select(positions=positions, **query).tolist()
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 2
+        except (ArithmeticError, TypeError) as e:
+            print(f"Error evaluating query: {type(e).__name__}: {e}", file=sys.stderr)
+            return 2
+
+    if positions is None:
+        values = iter_all_device_values(data, index, params)
+    else:
+        values = iter_device_values(data, index, positions, params)
+
+    writer = csv.writer(out, lineterminator="\n")
+    writer.writerow(["device"] + params)
+    devices = index.devices
+    for pos, selected in values:
+        writer.writerow([devices[pos]] + ["" if v is None else v for v in selected])
+
+    return status
+
+
+def spice_float(text: str) -> float:
+    """Value of a SPICE number such as 1.2u or 3.3meg; NaN if it is not one."""
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    m = SPICE_NUMBER_RE.match(text)
+    if m is None:
+        return float("nan")
+    value = float(m.group(1))
+    if m.group(2):
+        value *= SCALE_FACTORS[m.group(2).lower()]
+    return value
+
+
+class OpPointDB:
+    """
+    Device x parameter table of every MOS mini-table in a listing.
+
+    Row p is device position p of the OpIndex. numeric[k] holds parameter
+    numeric_names[k] as floats (NaN where a table has no such row or the
+    value does not parse); text[k] holds the columns with no numeric value
+    at all (REGION, MODEL, ...) as strings.
+    """
+
+    def __init__(self, numeric_names, numeric, text_names, text):
+        self.numeric_names = list(numeric_names)
+        self.numeric = numeric
+        self.text_names = list(text_names)
+        self.text = text
+        self._numeric_ids = {name: k for k, name in enumerate(self.numeric_names)}
+        self._text_ids = {name: k for k, name in enumerate(self.text_names)}
+
+    @property
+    def device_count(self) -> int:
+        return self.numeric.shape[1] if self.numeric_names else self.text.shape[1]
+
+    def column(self, name: str):
+        """Values of row name for every device, with id falling back to ids."""
+        k = self._numeric_ids.get(name)
+        if k is not None:
+            values = self.numeric[k]
+            if name == "id" and "ids" in self._numeric_ids:
+                values = np.where(np.isnan(values), self.numeric[self._numeric_ids["ids"]], values)
+            return values
+        k = self._text_ids.get(name)
+        if k is not None:
+            return self.text[k]
+        if name == "id" and "ids" in self._numeric_ids:
+            return self.numeric[self._numeric_ids["ids"]]
+        raise ValueError(f"no such parameter: {name}")
+
+    def evaluate(self, expr: str):
+        """Evaluate a query expression (see usage) over all devices."""
+        return QueryEvaluator(self).evaluate(expr)
+
+    def select(self, where: str | None = None, by: str | None = None, top: int | None = None,
+               ascending: bool = False, positions=None):
+        """
+        Device positions (from positions, default all) where the where
+        expression holds, ordered by the by expression (file order without
+        one) and cut to the first top. NaN comparisons are false and NaN
+        sort keys are dropped.
+        """
+        if positions is None:
+            positions = np.arange(self.device_count)
+        else:
+            positions = np.asarray(positions, dtype=np.int64)
+
+        if where is not None:
+            mask = np.broadcast_to(np.asarray(self.evaluate(where), dtype=bool), (self.device_count,))
+            positions = positions[mask[positions]]
+
+        if by is not None:
+            key = np.broadcast_to(np.asarray(self.evaluate(by), dtype=np.float64), (self.device_count,))
+            key = key[positions]
+            keep = ~np.isnan(key)
+            positions, key = positions[keep], key[keep]
+            order = np.argsort(key if ascending else -key, kind="stable")
+            positions = positions[order]
+
+        if top is not None:
+            positions = positions[:top]
+        return positions
+
+
+class QueryEvaluator:
+    """
+    Evaluate a small, side-effect free expression language over OpPointDB
+    columns with numpy. Only the node types below are accepted.
+    """
+
+    BINARY = {
+        ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul,
+        ast.Div: operator.truediv, ast.Pow: operator.pow, ast.Mod: operator.mod,
+        ast.BitAnd: operator.and_, ast.BitOr: operator.or_,
+    }
+    COMPARE = {
+        ast.Lt: operator.lt, ast.LtE: operator.le, ast.Gt: operator.gt,
+        ast.GtE: operator.ge, ast.Eq: operator.eq, ast.NotEq: operator.ne,
+    }
+    # One-argument, element-wise; min()/max() take two or more arguments.
+    FUNCTIONS = ("abs", "sqrt", "log10", "log", "exp")
+
+    def __init__(self, db: OpPointDB):
+        self.db = db
+
+    def evaluate(self, expr: str):
+        try:
+            tree = ast.parse(spice_literals(expr), mode="eval")
+        except SyntaxError as e:
+            raise ValueError(f"bad expression {expr!r}: {e.msg}") from None
+        with np.errstate(all="ignore"):
+            return self.visit(tree.body)
+
+    def visit(self, node):
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float, str)):
+            return node.value
+        if isinstance(node, ast.Name):
+            return self.db.column(node.id)
+        if isinstance(node, ast.BinOp) and type(node.op) in self.BINARY:
+            return self.BINARY[type(node.op)](self.visit(node.left), self.visit(node.right))
+        if isinstance(node, ast.UnaryOp):
+            operand = self.visit(node.operand)
+            if isinstance(node.op, ast.USub):
+                return -operand
+            if isinstance(node.op, ast.UAdd):
+                return operand
+            if isinstance(node.op, ast.Not):
+                return np.logical_not(operand)
+        if isinstance(node, ast.BoolOp):
+            combine = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+            result = self.visit(node.values[0])
+            for value in node.values[1:]:
+                result = combine(result, self.visit(value))
+            return result
+        if isinstance(node, ast.Compare) and all(type(op) in self.COMPARE for op in node.ops):
+            left = self.visit(node.left)
+            result = True
+            for op, right_node in zip(node.ops, node.comparators):
+                right = self.visit(right_node)
+                result = np.logical_and(result, self.COMPARE[type(op)](left, right))
+                left = right
+            return result
+        if (
+            isinstance(node, ast.Call)
+            and isinstance(node.func, ast.Name)
+            and not node.keywords
+        ):
+            name = node.func.id
+            if name == "col" and len(node.args) == 1:
+                arg = node.args[0]
+                if isinstance(arg, ast.Constant) and isinstance(arg.value, str):
+                    return self.db.column(arg.value)
+            elif name in ("min", "max") and len(node.args) >= 2:
+                pick = np.fmin if name == "min" else np.fmax
+                result = self.visit(node.args[0])
+                for arg in node.args[1:]:
+                    result = pick(result, self.visit(arg))
+                return result
+            elif name in self.FUNCTIONS and len(node.args) == 1:
+                func = np.absolute if name == "abs" else getattr(np, name)
+                return func(self.visit(node.args[0]))
+        raise ValueError(f"unsupported expression: {ast.unparse(node)}")
+
+
+def spice_literals(expr: str) -> str:
+    """Rewrite SPICE numbers in expr (50mV, 1.2u, 3meg) as plain floats."""
+
+    def replace(m):
+        if m.group(1):
+            return m.group(1)
+        value = float(m.group(2))
+        if m.group(3):
+            value *= SCALE_FACTORS[m.group(3).lower()]
+        return repr(value)
+
+    return QUERY_LITERAL_RE.sub(replace, expr)
+
+
+def spice_floats(strings: list[str]):
+    """
+    spice_float() over a list of strings, vectorized for the common listing
+    forms (plain numbers with at most one scale letter). Empty strings are
+    NaN.
+    """
+    n = len(strings)
+    arr = np.array(strings, dtype=str).reshape(n)
+    width = arr.dtype.itemsize // 4
+    if n == 0 or width == 0:
+        return np.full(n, np.nan)
+
+    # code points, one row per string, zero padded; edited in place
+    codes = arr.view(np.uint32).reshape(n, width).copy()
+    lengths = np.count_nonzero(codes, axis=1)
+    empty = lengths == 0
+    codes[empty, 0] = ord("0")
+    lengths[empty] = 1
+
+    rows = np.arange(n)
+    last = codes[rows, lengths - 1]
+    factors = np.array(SCALE_TABLE)[np.minimum(last, len(SCALE_TABLE) - 1)]
+    scaled = factors != 1.0
+    codes[rows[scaled], lengths[scaled] - 1] = 0
+
+    try:
+        values = codes.view(f"U{width}").reshape(n).astype(np.float64)
+    except ValueError:
+        return np.fromiter(map(spice_float, strings), dtype=np.float64, count=n)
+
+    values *= factors
+    values[empty] = np.nan
+    return values
+
+
+def build_op_db(data, index: OpIndex) -> OpPointDB:
+    """
+    Read every table once and convert each row name to a column. Values are
+    converted BUILD_TABLES tables at a time so the text is never all held at
+    once. A row name whose first value in the file is not a number (REGION,
+    MODEL, ...) becomes a text column.
+    """
+    n = len(index.devices)
+    table_first = index.table_first
+    numeric = {}
+    text = {}
+
+    def flush(pending):
+        # a repeated row name keeps its last value, as in column_values()
+        for name, (positions, strings) in pending.items():
+            if name not in numeric and name not in text:
+                if math.isnan(spice_float(strings[0])):
+                    text[name] = [""] * n
+                else:
+                    numeric[name] = np.full(n, np.nan)
+
+            column = text.get(name)
+            if column is not None:
+                for pos, value in zip(positions, strings):
+                    column[pos] = value
+            else:
+                numeric[name][positions] = spice_floats(strings)
+
+    pending = {}
+    for t in range(index.table_count):
+        first = table_first[t]
+        width = table_first[t + 1] - first
+        for name, values in read_table(data, index, t):
+            values = values[:width]
+            if not values:
+                # truncated row: no value for any device, as in column_values()
+                continue
+            entry = pending.get(name)
+            if entry is None:
+                entry = pending[name] = ([], [])
+            entry[0].extend(range(first, first + len(values)))
+            entry[1].extend(values)
+        if t % BUILD_TABLES == BUILD_TABLES - 1:
+            flush(pending)
+            pending = {}
+    flush(pending)
+
+    names = list(dict.fromkeys([*index.row_names(), *numeric, *text]))
+    numeric_names = [name for name in names if name in numeric]
+    text_names = [name for name in names if name in text]
+
+    return OpPointDB(
+        numeric_names,
+        np.array([numeric[name] for name in numeric_names], dtype=np.float64).reshape(-1, n),
+        text_names,
+        np.array([text[name] for name in text_names], dtype=str).reshape(len(text_names), n),
+    )
+
+
+def load_op_db(path: str, data, index: OpIndex, use_cache: bool = True) -> OpPointDB:
+    """
+    Return the OpPointDB of the listing at path. With use_cache it is kept
+    next to the OpIndex cache under default_cache_dir(), keyed by the
+    listing's path, size and mtime, on the same terms.
+    """
+    cache_path = listing_cache_path(path, DB_SUFFIX)
+    stamp = netlist_stamp(path)
+
+    if use_cache:
+        try:
+            with np.load(cache_path, allow_pickle=False) as z:
+                if int(z["version"]) == DB_VERSION and tuple(int(v) for v in z["stamp"]) == stamp:
+                    return OpPointDB(z["numeric_names"].tolist(), z["numeric"],
+                                     z["text_names"].tolist(), z["text"])
+        except (OSError, EOFError, ValueError, KeyError, TypeError, zipfile.BadZipFile):
+            pass
+
+    db = build_op_db(data, index)
+
+    if use_cache:
+        tmp_path = f"{cache_path}.tmp{os.getpid()}"
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                np.savez(
+                    f,
+                    version=np.array(DB_VERSION),
+                    stamp=np.array(stamp, dtype=np.int64),
+                    numeric_names=np.array(db.numeric_names, dtype=str),
+                    numeric=db.numeric,
+                    text_names=np.array(db.text_names, dtype=str),
+                    text=db.text,
+                )
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    return db
+
+
+def read_device_list(path: str) -> list[str]:
+    with open(path, "r", errors="replace") as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
 
 
 def main() -> int:
@@ -226,24 +866,65 @@ def main() -> int:
 
     print_all = False
     latest = False
+    use_cache = True
+    csv_path = None
+    params = None
+    query = {}
+    device_files: list[str] = []
     positionals: list[str] = []
 
     # Allow flags anywhere
-    for a in args:
+    args_iter = iter(args)
+    for a in args_iter:
         if a == "-all":
             print_all = True
         elif a == "-latest":
             latest = True
+        elif a == "-nocache":
+            use_cache = False
+        elif a == "-asc":
+            query["ascending"] = True
+        elif a in ("-csv", "-params", "-devices", "-where", "-by", "-top"):
+            value = next(args_iter, None)
+            if value is None:
+                print(f"Option {a} needs a value", file=sys.stderr)
+                return usage(sys.argv[0])
+            if a == "-csv":
+                csv_path = value
+            elif a == "-params":
+                params = [p for p in value.split(",") if p]
+            elif a == "-top":
+                try:
+                    query["top"] = int(value)
+                except ValueError:
+                    query["top"] = -1
+                if query["top"] < 0:
+                    print(f"-top needs a count >= 0, got {value}", file=sys.stderr)
+                    return usage(sys.argv[0])
+            elif a in ("-where", "-by"):
+                query[a[1:]] = value
+            else:
+                device_files.append(value)
         elif a.startswith("-"):
             print(f"Unknown option: {a}", file=sys.stderr)
             return usage(sys.argv[0])
         else:
             positionals.append(a)
 
-    if len(positionals) != 2:
+    if query:
+        if np is None:
+            print("-where/-by/-top need numpy (pip install numpy)", file=sys.stderr)
+            return 2
+        if csv_path is None:
+            csv_path = "-"
+
+    if csv_path is None:
+        if len(positionals) != 2 or params is not None or device_files:
+            return usage(sys.argv[0])
+    elif not positionals:
         return usage(sys.argv[0])
 
-    path_arg, device_arg = positionals
+    path_arg, device_args = positionals[0], positionals[1:]
 
     try:
         path, latest_applied = resolve_latest(path_arg, latest)
@@ -251,10 +932,30 @@ def main() -> int:
         print(str(e), file=sys.stderr)
         return 2
 
+    if csv_path is not None:
+        if latest and latest_applied:
+            print(f"Using file: {os.path.abspath(path)}", file=sys.stderr)
+        try:
+            for device_file in device_files:
+                device_args.extend(read_device_list(device_file))
+        except OSError as e:
+            print(f"Error reading device list: {e}", file=sys.stderr)
+            return 2
+        if params is None and not print_all:
+            params = DEFAULT_ORDER
+        if csv_path == "-":
+            return write_device_csv(path, sys.stdout, device_args, params, use_cache, query)
+        try:
+            with open(csv_path, "w", newline="") as out:
+                return write_device_csv(path, out, device_args, params, use_cache, query)
+        except OSError as e:
+            print(f"Error writing '{csv_path}': {e}", file=sys.stderr)
+            return 2
+
     if latest and latest_applied:
         print(f"Using file: {os.path.abspath(path)}\n")
 
-    return extract_device_table(path, device_arg, print_all)
+    return extract_device_table(path, device_args[0], print_all, use_cache)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,62 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import unittest
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "extr_op_hspice_tspice.py")
+
+# One device whose vth row was truncated to its name.
+LISTING = """\
+ operating point information
+
+     element  XDUT.X1.xMN.m_mos
+     MODEL    0:nch.1
+     REGION   Saturati
+     id       12.0u
+     vds      1.0
+     vdsat    0.2
+     vth
+
+"""
+
+
+class Test_truncated_row( unittest.TestCase ) :
+
+    def setUp(self) :
+        self.dir = tempfile.mkdtemp()
+        self.listing = os.path.join(self.dir, "a.lis")
+        with open(self.listing, "w") as f:
+            f.write(LISTING)
+
+    def tearDown(self) :
+        shutil.rmtree(self.dir)
+
+    def run_script(self, *args) :
+        env = dict(os.environ, XDG_CACHE_HOME=os.path.join(self.dir, "cache"))
+        return subprocess.run(
+            [sys.executable, SCRIPT] + list(args),
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, env=env,
+        )
+
+    def test_lookup(self) :
+        out = self.run_script(self.listing, "XDUT.X1.xMN.m_mos")
+        self.assertEqual( out.returncode, 0 )
+        self.assertIn( "vds          1.0", out.stdout )
+
+    @unittest.skipIf(numpy is None, "queries need numpy")
+    def test_query(self) :
+        out = self.run_script("-where", "vds - vdsat > 0", "-params", "vds,vth", self.listing)
+        self.assertEqual( out.returncode, 0, out.stderr )
+        self.assertEqual( out.stdout.splitlines(), ["device,vds,vth", "XDUT.X1.xMN.m_mos,1.0,"] )
+
+
+if __name__ == '__main__':
+    unittest.main()
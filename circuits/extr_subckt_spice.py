@@ -1,15 +1,36 @@
 #!/usr/bin/env python3
 """
-Extract a .subckt definition from a SPICE-style netlist.
+Extract .subckt definitions from a SPICE-style netlist.
 
 Usage:
-    python extract_subckt.py /path/to/netlist SUBCKT_NAME
+    python extract_subckt.py /path/to/netlist SUBCKT_NAME [SUBCKT_NAME ...]
+    python extract_subckt.py /path/to/netlist @cells.txt
+    python extract_subckt.py --with-deps /path/to/netlist SUBCKT_NAME ...
+    python extract_subckt.py --with-deps -o OUTDIR -j 8 /path/to/netlist @cells.txt
+
+Definitions are printed in the order requested. --with-deps adds every
+subckt instantiated below the requested ones, children before parents, so
+the output is a self-contained netlist. With -o each requested cell goes to
+its own OUTDIR/<cell>.sp instead, written by a pool of threads that share
+one mapping of the netlist. Byte offsets come from the
+netlist's cached hierarchy index and the file is mmapped once, so pulling
+many cells out of a large netlist costs one index load plus one slice per
+cell rather than one full scan per cell.
 """
 
+import argparse
+import io
+import mmap
 import sys
 import re
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+from hier_walk import fold_postorder
+from spice_netlist import load_hierarchy
+
+UNSAFE_FILENAME_RE = re.compile(r"[^\w.+-]")
+
 
 def is_subckt_start(line: str, subckt_name: str) -> bool:
     """
@@ -46,7 +67,238 @@ def is_matching_ends(line: str, subckt_name: str) -> bool:
     return tokens[1].lower() == subckt_name.lower()
 
 
-def extract_subckt(netlist_path: Path, subckt_name: str) -> list[str]:
+class SubcktExtractor:
+    """
+    Slice any number of .subckt definitions out of one netlist.
+
+    The hierarchy index is loaded once and turned into a case-insensitive
+    name -> slot table (the first definition of a name wins); the
+    file is mmapped once and each definition is a slice of the map. Use as a
+    context manager, or call close().
+    """
+
+    def __init__(self, netlist_path: Path, use_cache: bool = True):
+        self.netlist_path = Path(netlist_path)
+        self.index = load_hierarchy(str(self.netlist_path), use_cache=use_cache)
+
+        names = self.index.names
+        self.slots = {}
+        for k, name_id in enumerate(self.index.subckt_ids):
+            self.slots.setdefault(names[name_id].lower(), k)
+        self._child_slots = {}
+        self._lines = {}
+
+        with self.netlist_path.open("rb") as f:
+            try:
+                self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # empty file: nothing to map
+                self.data = b""
+
+    def close(self) -> None:
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self.data = b""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def span(self, subckt_name: str):
+        """
+        Return the (start, end) byte offsets of subckt_name, or None if the
+        index has no complete definition for it.
+        """
+        k = self.slots.get(subckt_name.lower())
+        if k is None:
+            return None
+        end = self.index.subckt_end[k]
+        if end < 0:
+            return None
+        return self.index.subckt_start[k], end
+
+    def lines(self, subckt_name: str) -> list[str]:
+        """
+        Return the lines of .subckt subckt_name through its .ends.
+
+        If the indexed range does not look like a complete definition (for
+        example an unusual .ends line), fall back to a line-by-line scan.
+        """
+        span = self.span(subckt_name)
+
+        if span is not None:
+            start, end = span
+            text = self.data[start:end].decode("utf-8", errors="replace")
+            lines = list(io.StringIO(text, newline=None))
+
+            if (
+                lines
+                and is_subckt_start(lines[0], subckt_name)
+                and is_matching_ends(lines[-1], subckt_name)
+            ):
+                return lines
+
+        return scan_subckt(self.netlist_path, subckt_name)
+
+    def extract(self, subckt_names) -> list[list[str]]:
+        """Return lines(name) for each name, in order."""
+        return [self.lines(name) for name in subckt_names]
+
+    def child_slots(self, k: int) -> list[int]:
+        """
+        Slots of the defined subckts instantiated inside slot k, in file
+        order without repeats. Cell names match case-insensitively.
+        """
+        slots = self._child_slots.get(k)
+        if slots is None:
+            index = self.index
+            names = index.names
+            edge_child = index.edge_child
+            seen = set()
+            slots = []
+            for e in index.children(index.subckt_ids[k]):
+                c = self.slots.get(names[edge_child[e]].lower())
+                if c is not None and c not in seen:
+                    seen.add(c)
+                    slots.append(c)
+            self._child_slots[k] = slots
+        return slots
+
+    def undefined_children(self, slots) -> list[str]:
+        """Cells instantiated inside any of slots that have no .subckt."""
+        index = self.index
+        names = index.names
+        edge_child = index.edge_child
+        missing = {}
+        for k in slots:
+            for e in index.children(index.subckt_ids[k]):
+                name = names[edge_child[e]]
+                if name.lower() not in self.slots:
+                    missing.setdefault(name, None)
+        return list(missing)
+
+    def closure(self, subckt_names, memo=None) -> list[str]:
+        """
+        Return subckt_names plus every subckt they instantiate, directly or
+        not, as definition names in dependency order (children first).
+
+        Slots already in memo (a dict shared across calls) are skipped, so
+        calling this per cell with one memo yields each subckt once. A
+        requested name with no indexed definition is passed through as-is
+        for lines() to resolve or reject.
+        """
+        if memo is None:
+            memo = {}
+        names = self.index.names
+        subckt_ids = self.index.subckt_ids
+        order = []
+
+        for subckt_name in subckt_names:
+            k = self.slots.get(subckt_name.lower())
+            if k is None:
+                order.append(subckt_name)
+                continue
+            before = len(memo)
+            fold_postorder(k, self.child_slots, int, lambda node, _edges: node, memo)
+            order.extend(names[subckt_ids[c]] for c in list(memo)[before:])
+
+        return order
+
+    def cached_lines(self, subckt_name: str) -> list[str]:
+        """lines(), remembered per name; for subckts shared by many closures."""
+        key = subckt_name.lower()
+        lines = self._lines.get(key)
+        if lines is None:
+            lines = self._lines[key] = self.lines(subckt_name)
+        return lines
+
+
+def extract_subckts(netlist_path: Path, subckt_names, use_cache: bool = True) -> list[list[str]]:
+    """
+    Return the definition lines of every subckt in subckt_names, in order,
+    reading the index and mapping the file once for the whole batch.
+    Raises RuntimeError for the first name that cannot be extracted.
+    """
+    with SubcktExtractor(netlist_path, use_cache=use_cache) as extractor:
+        return extractor.extract(subckt_names)
+
+
+def extract_subckt(netlist_path: Path, subckt_name: str, use_cache: bool = True) -> list[str]:
+    """
+    Return the lines of .subckt subckt_name through its .ends.
+
+    The byte range comes from the netlist's hierarchy index, so repeat
+    extractions from an unchanged netlist seek straight to the definition.
+    """
+    return extract_subckts(netlist_path, [subckt_name], use_cache=use_cache)[0]
+
+
+def output_filename(subckt_name: str) -> str:
+    return UNSAFE_FILENAME_RE.sub("_", subckt_name) + ".sp"
+
+
+def write_cell_file(extractor: SubcktExtractor, subckt_name: str, output_dir: Path,
+                    with_deps: bool) -> Path:
+    """
+    Write subckt_name (and with_deps, its closure) to output_dir. Raises
+    RuntimeError, before creating the file, if any definition cannot be
+    extracted.
+    """
+    if with_deps:
+        order = extractor.closure([subckt_name])
+        blocks = [extractor.cached_lines(name) for name in order]
+    else:
+        blocks = [extractor.lines(subckt_name)]
+
+    path = output_dir / output_filename(subckt_name)
+    with path.open("w", encoding="utf-8") as f:
+        for lines in blocks:
+            f.writelines(lines)
+    return path
+
+
+def write_cell_files(extractor: SubcktExtractor, subckt_names, output_dir: Path,
+                     with_deps: bool = False, jobs: int = 1):
+    """
+    Write one file per requested cell with a pool of jobs threads sharing
+    the extractor's mapping. Yields (subckt_name, path or None, error or
+    None) in request order. A repeated request is written once; a different
+    request mapping to a file name already taken (e.g. a/b and a_b) is not
+    written and gets a RuntimeError.
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    # The extractor's lazily filled tables may be computed twice by racing
+    # threads, which is harmless: both produce the same value. Two requests
+    # writing the same file are not, so each output file is written once.
+    owners = {}
+    plan = []
+    for subckt_name in subckt_names:
+        filename = output_filename(subckt_name)
+        owner = owners.get(filename)
+        if owner is None:
+            owners[filename] = subckt_name
+            plan.append((subckt_name, None))
+        elif owner != subckt_name:
+            plan.append((subckt_name, RuntimeError(
+                f"output file {output_dir / filename} is already written for {owner}"
+            )))
+
+    def task(subckt_name):
+        try:
+            return subckt_name, write_cell_file(extractor, subckt_name, output_dir, with_deps), None
+        except (RuntimeError, OSError) as e:
+            return subckt_name, None, e
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        written = pool.map(task, [name for name, error in plan if error is None])
+        for subckt_name, error in plan:
+            yield next(written) if error is None else (subckt_name, None, error)
+
+
+def scan_subckt(netlist_path: Path, subckt_name: str) -> list[str]:
     inside = False
     extracted = []
 
@@ -70,28 +322,79 @@ def extract_subckt(netlist_path: Path, subckt_name: str) -> list[str]:
     )
 
 
-def main() -> int:
-    if len(sys.argv) != 3:
-        print(
-            f"Usage: python {sys.argv[0]} /path/to/netlist SUBCKT_NAME",
-            file=sys.stderr,
-        )
-        return 2
+def parse_args(argv=None) -> argparse.Namespace:
+    ap = argparse.ArgumentParser(
+        description="Extract .subckt definitions from a SPICE netlist.",
+        fromfile_prefix_chars="@",
+        epilog="@FILE reads more SUBCKT_NAME arguments from FILE, one per line.",
+    )
+    ap.add_argument("netlist", type=Path)
+    ap.add_argument("subckt_names", metavar="SUBCKT_NAME", nargs="+")
+    ap.add_argument("--with-deps", action="store_true",
+                    help="Also extract every subckt instantiated below the requested ones, "
+                         "children first")
+    ap.add_argument("-o", "--output-dir", type=Path,
+                    help="Write each requested cell to OUTPUT_DIR/<cell>.sp instead of stdout")
+    ap.add_argument("-j", "--jobs", type=int, default=1,
+                    help="Threads writing --output-dir files (default: 1)")
+    ap.add_argument("--no-cache", action="store_true",
+                    help="Do not read or write the cached netlist index (~/.cache/spice_netlist)")
+    args = ap.parse_args(argv)
+
+    if args.jobs < 1:
+        ap.error("--jobs must be >= 1")
+    if args.jobs > 1 and args.output_dir is None:
+        ap.error("--jobs needs --output-dir")
+    return args
+
 
-    netlist_path = Path(sys.argv[1])
-    subckt_name = sys.argv[2]
+def warn_undefined(extractor: SubcktExtractor, order) -> None:
+    slots = [extractor.slots[n.lower()] for n in order if n.lower() in extractor.slots]
+    missing = extractor.undefined_children(slots)
+    if missing:
+        print(f"Warning: no .subckt for instantiated cell(s): {', '.join(missing)}",
+              file=sys.stderr)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    netlist_path = args.netlist
 
     if not netlist_path.is_file():
         print(f"Error: file not found: {netlist_path}", file=sys.stderr)
         return 1
 
-    try:
-        lines = extract_subckt(netlist_path, subckt_name)
-    except RuntimeError as e:
-        print(f"Error: {e}", file=sys.stderr)
-        return 1
+    blocks = []
+    status = 0
+
+    with SubcktExtractor(netlist_path, use_cache=not args.no_cache) as extractor:
+        if args.output_dir is not None:
+            results = write_cell_files(extractor, args.subckt_names, args.output_dir,
+                                       with_deps=args.with_deps, jobs=args.jobs)
+            for subckt_name, _path, error in results:
+                if error is not None:
+                    print(f"Error: {subckt_name}: {error}", file=sys.stderr)
+                    status = 1
+            return status
+
+        names = args.subckt_names
+        if args.with_deps:
+            names = extractor.closure(names)
+            warn_undefined(extractor, names)
+
+        for subckt_name in names:
+            try:
+                blocks.append(extractor.lines(subckt_name))
+            except RuntimeError as e:
+                print(f"Error: {e}", file=sys.stderr)
+                status = 1
+
+    if status:
+        return status
 
-    print("".join(lines), end="")
+    out = sys.stdout
+    for lines in blocks:
+        out.writelines(lines)
     return 0
 
 
@@ -24,22 +24,40 @@ List-file format:
     * On a non-comment line, the first whitespace- or comma-separated token
       is used as the subcircuit name.
 
+Several names/list files may be given; the library is indexed once and
+each one is reported in turn under a "==> NAME <==" header.
+
+The library index is cached under $XDG_CACHE_HOME/find_subckt_sections (or
+~/.cache/...), keyed by the library's path, size and mtime, so later runs
+against an unchanged library skip the scan. Use --no-cache to disable it.
+
 Usage:
 
     python3 find_subckt_sections_v2.py u0_onc18.splib ndio_3
     python3 find_subckt_sections_v2.py u0_onc18.splib required_subckts.txt
     python3 find_subckt_sections_v2.py --case-sensitive u0_onc18.splib ndio_3
+    python3 find_subckt_sections_v2.py u0_onc18.splib netlists/*.txt
 """
 
 from __future__ import annotations
 
 import argparse
+import math
 import re
 import sys
+import time
 from collections import defaultdict
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 
+from spice_netlist import (
+    load_pickle_cache,
+    netlist_stamp,
+    save_pickle_cache,
+    user_cache_dir,
+    user_cache_path,
+)
+
 
 SECTION_RE = re.compile(r"^\s*section(?:\s+|\s*=\s*)(?P<name>[^\s/]+)", re.IGNORECASE)
 ENDSECTION_RE = re.compile(
@@ -68,6 +86,11 @@ class Match:
 class LibraryIndex:
     matches_by_name: dict[str, list[Match]]
     display_name_by_key: dict[str, str]
+    warnings: list[str] = field(default_factory=list)
+
+
+CACHE_SUFFIX = ".fsidx"
+CACHE_VERSION = 1
 
 
 def canonical(name: str, case_sensitive: bool) -> str:
@@ -126,6 +149,12 @@ def build_library_index(filename: Path, case_sensitive: bool) -> LibraryIndex:
     matches_by_name: dict[str, list[Match]] = defaultdict(list)
     display_name_by_key: dict[str, str] = {}
     section_stack: list[str] = []
+    section_paths: dict[tuple[str, ...], tuple[str, ...]] = {}
+    warnings: list[str] = []
+
+    def warn(message: str) -> None:
+        warnings.append(message)
+        print(message, file=sys.stderr)
 
     with filename.open("r", encoding="utf-8", errors="replace") as handle:
         for line_number, raw_line in enumerate(handle, start=1):
@@ -142,21 +171,19 @@ def build_library_index(filename: Path, case_sensitive: bool) -> LibraryIndex:
             if endsection_match:
                 closing_name = endsection_match.group("name")
                 if not section_stack:
-                    print(
+                    warn(
                         f"warning: line {line_number}: endsection found "
-                        "while no section is active",
-                        file=sys.stderr,
+                        "while no section is active"
                     )
                 elif closing_name is None:
                     section_stack.pop()
                 elif names_equal(section_stack[-1], closing_name, False):
                     section_stack.pop()
                 else:
-                    print(
+                    warn(
                         f"warning: line {line_number}: endsection "
                         f"{closing_name!r} does not match active section "
-                        f"{section_stack[-1]!r}; closing the active section",
-                        file=sys.stderr,
+                        f"{section_stack[-1]!r}; closing the active section"
                     )
                     section_stack.pop()
                 continue
@@ -168,16 +195,56 @@ def build_library_index(filename: Path, case_sensitive: bool) -> LibraryIndex:
             declared_name = subckt_match.group("name")
             key = canonical(declared_name, case_sensitive)
             display_name_by_key.setdefault(key, declared_name)
+            # share one tuple per distinct section path (smaller cache)
+            section_path = tuple(section_stack)
+            section_path = section_paths.setdefault(section_path, section_path)
             matches_by_name[key].append(
                 Match(
                     line_number=line_number,
                     declared_name=declared_name,
-                    section_path=tuple(section_stack),
+                    section_path=section_path,
                     source_line=raw_line.rstrip("\n"),
                 )
             )
 
-    return LibraryIndex(dict(matches_by_name), display_name_by_key)
+    return LibraryIndex(dict(matches_by_name), display_name_by_key, warnings)
+
+
+def default_cache_dir() -> Path:
+    return Path(user_cache_dir("find_subckt_sections"))
+
+
+def library_cache_path(library: Path, case_sensitive: bool, cache_dir: Path) -> Path:
+    """One cache file per (resolved library path, case mode)."""
+    return Path(user_cache_path(cache_dir, library, CACHE_SUFFIX, str(int(case_sensitive))))
+
+
+def load_library_index(
+    library: Path, case_sensitive: bool, cache_dir: Path | None
+) -> LibraryIndex:
+    """
+    build_library_index(), cached in cache_dir (None disables the cache).
+
+    The cache is keyed by the library's resolved path, size and mtime and
+    the case mode; warnings from the original scan are printed again when
+    it is reused. A stale or unreadable cache is ignored and rebuilt; a
+    cache that cannot be written is not an error.
+    """
+    if cache_dir is None:
+        return build_library_index(library, case_sensitive)
+
+    cache_path = library_cache_path(library, case_sensitive, cache_dir)
+    stamp = (str(library.resolve()), *netlist_stamp(library), case_sensitive)
+
+    index = load_pickle_cache(cache_path, CACHE_VERSION, stamp)
+    if index is not None:
+        for message in index.warnings:
+            print(message, file=sys.stderr)
+        return index
+
+    index = build_library_index(library, case_sensitive)
+    save_pickle_cache(cache_path, CACHE_VERSION, stamp, index)
+    return index
 
 
 def read_requested_subckts(filename: Path, case_sensitive: bool) -> list[str]:
@@ -202,88 +269,362 @@ def read_requested_subckts(filename: Path, case_sensitive: bool) -> list[str]:
     return names
 
 
-def minimum_section_cover(
-    choices_by_name: dict[str, set[str]],
-) -> list[str] | None:
-    """
-    Return an exact minimum-cardinality section cover.
+@dataclass(frozen=True)
+class SectionCover:
+    sections: list[str] | None
+    optimal: bool
+    lower_bound: int
 
-    Each key is a requested subcircuit and each value is the set of sections
-    in which that subcircuit is defined. A branch-and-bound search is used,
-    with forced-choice propagation. Ties are resolved lexicographically.
+
+class CoverTimeout(Exception):
+    pass
+
+
+try:
+    popcount = int.bit_count  # Python 3.10+
+except AttributeError:
+    def popcount(mask: int) -> int:
+        return bin(mask).count("1")
+
+
+def iter_bits(mask: int):
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def minimal_masks(masks: set[int]) -> list[int]:
+    """Drop masks that contain another mask (subsumed requirements)."""
+    kept: list[int] = []
+    for mask in sorted(masks, key=lambda m: (popcount(m), m)):
+        if not any(k & ~mask == 0 for k in kept):
+            kept.append(mask)
+    return kept
+
+
+def reduce_cover_instance(
+    requirements: list[int], n_sections: int, keep_ties: bool
+) -> tuple[int, list[int], list[int]]:
     """
-    if not choices_by_name:
-        return []
-    if any(not choices for choices in choices_by_name.values()):
-        return None
+    Shrink a cover instance given as requirement bitmasks over sections.
 
-    best: tuple[str, ...] | None = None
+    Returns (forced, requirements, coverage): sections every cover needs, the
+    remaining requirements, and for each section the bitmask of remaining
+    requirements it covers (0 for dropped sections).
 
-    def search(remaining: dict[str, set[str]], chosen: set[str]) -> None:
-        nonlocal best
+      - a requirement with one section forces it
+      - a requirement that contains another requirement is dropped
+      - a section covering a subset of what another section covers is dropped
 
-        # Remove requirements already covered by a chosen section.
-        remaining = {
-            name: sections
-            for name, sections in remaining.items()
-            if chosen.isdisjoint(sections)
-        }
-        if not remaining:
-            candidate = tuple(sorted(chosen, key=str.casefold))
-            if best is None or len(candidate) < len(best) or (
-                len(candidate) == len(best)
-                and tuple(s.casefold() for s in candidate)
-                < tuple(s.casefold() for s in best)
-            ):
-                best = candidate
-            return
+    With keep_ties, a section is only dropped in favour of one that comes
+    earlier in the section order, so the lexicographically first minimum
+    cover survives the reduction.
+    """
+    forced = 0
+    reqs = set(requirements)
+    alive = (1 << n_sections) - 1
+
+    while True:
+        single = 0
+        for mask in reqs:
+            if mask & (mask - 1) == 0:
+                single |= mask
+        new_forced = single & ~forced
+        forced |= single
+        reqs = {mask & alive for mask in reqs if not mask & forced}
+        req_list = minimal_masks(reqs)
+
+        coverage = [0] * n_sections
+        for r, mask in enumerate(req_list):
+            for section in iter_bits(mask):
+                coverage[section] |= 1 << r
+
+        live = [i for i in iter_bits(alive) if coverage[i]]
+        dropped = alive & ~sum(1 << i for i in live)
+        for a in live:
+            cov_a = coverage[a]
+            for b in live:
+                if b == a or dropped >> b & 1:
+                    continue
+                cov_b = coverage[b]
+                if cov_a & ~cov_b:
+                    continue
+                if b < a or (not keep_ties and cov_a != cov_b):
+                    dropped |= 1 << a
+                    break
+
+        if not dropped and not new_forced and len(req_list) == len(reqs):
+            return forced, req_list, coverage
+
+        alive &= ~dropped
+        reqs = {mask & alive for mask in req_list}
+
+
+class CoverSearch:
+    """
+    Branch and bound over a reduced instance (see reduce_cover_instance).
+
+    Uncovered requirements and allowed sections are bitmasks. Once a branch
+    for a section is finished, later sibling branches exclude that section,
+    so no cover is enumerated twice.
+
+    Lower bound, the larger of:
+      - requirements with pairwise disjoint sections each need their own
+        section
+      - weighting each requirement by 1 / (most requirements any of its
+        sections covers), a section covers at most weight 1, so the total
+        weight is a bound
+    A memo remembers the fewest sections with which a state was reached.
+
+    With a deadline, the clock is read every `check_every` nodes, an
+    interval re-fitted at each check from the measured time per node so
+    that checks are about CHECK_SECONDS apart (at most MAX_CHECK_EVERY
+    nodes), which keeps the overrun small even when nodes are expensive.
+    """
 
-        if best is not None and len(chosen) >= len(best):
+    CHECK_SECONDS = 0.01
+    MAX_CHECK_EVERY = 1024
+
+    def __init__(self, requirements: list[int], coverage: list[int],
+                 deadline: float | None) -> None:
+        self.requirements = requirements
+        self.coverage = coverage
+        self.deadline = deadline
+        self.nodes = 0
+        self.check_every = 1
+        self.next_check = 1
+        self.last_check = (0, time.monotonic())
+        self.best: list[int] = []
+        # requirements by ascending section count, for the disjoint bound
+        self.by_size = sorted(
+            range(len(requirements)),
+            key=lambda r: (popcount(requirements[r]), r),
+        )
+
+    def tick(self) -> None:
+        self.nodes += 1
+        if self.deadline is None or self.nodes < self.next_check:
             return
 
-        # Repeatedly apply forced choices.
-        while True:
-            forced = {
-                next(iter(sections))
-                for sections in remaining.values()
-                if len(sections) == 1
-            }
-            new_forced = forced - chosen
-            if not new_forced:
-                break
-            chosen = chosen | new_forced
-            if best is not None and len(chosen) >= len(best):
+        now = time.monotonic()
+        if now > self.deadline:
+            raise CoverTimeout()
+
+        last_nodes, last_time = self.last_check
+        per_node = (now - last_time) / (self.nodes - last_nodes)
+        if per_node > 0:
+            self.check_every = max(1, min(self.MAX_CHECK_EVERY, int(self.CHECK_SECONDS / per_node)))
+        else:
+            self.check_every = min(self.MAX_CHECK_EVERY, 2 * self.check_every)
+        self.last_check = (self.nodes, now)
+        self.next_check = self.nodes + self.check_every
+
+    def disjoint_bound(self, uncovered: int, allowed: int = -1) -> int:
+        """Requirements with pairwise disjoint (allowed) sections; -1 if one has none."""
+        used = 0
+        count = 0
+        requirements = self.requirements
+        for r in self.by_size:
+            if uncovered >> r & 1:
+                mask = requirements[r] & allowed
+                if not mask:
+                    return -1
+                if not mask & used:
+                    used |= mask
+                    count += 1
+        return count
+
+    def lower_bound(self, uncovered: int, allowed: int) -> int:
+        """Best of both bounds for covering uncovered; -1 if impossible."""
+        disjoint = self.disjoint_bound(uncovered, allowed)
+        if disjoint < 0:
+            return -1
+        coverage = self.coverage
+        gain = {i: popcount(coverage[i] & uncovered) for i in iter_bits(allowed)}
+        weight = 0.0
+        for r in iter_bits(uncovered):
+            weight += 1.0 / max(gain[i] for i in iter_bits(self.requirements[r] & allowed))
+        return max(disjoint, math.ceil(weight - 1e-9))
+
+    def greedy(self, uncovered: int) -> list[int]:
+        chosen: list[int] = []
+        coverage = self.coverage
+        while uncovered:
+            best = max(
+                range(len(coverage)),
+                key=lambda i: (popcount(coverage[i] & uncovered), -i),
+            )
+            chosen.append(best)
+            uncovered &= ~coverage[best]
+        return chosen
+
+    def minimum(self, uncovered: int, incumbent: list[int]) -> list[int]:
+        """
+        Smallest cover of uncovered, starting from a known cover. On
+        timeout, CoverTimeout is raised and .best holds the best cover so far.
+        """
+        self.best = list(incumbent)
+        seen: dict[tuple[int, int], int] = {}
+        requirements = self.requirements
+        coverage = self.coverage
+
+        def search(uncovered: int, allowed: int, chosen: list[int]) -> None:
+            if not uncovered:
+                if len(chosen) < len(self.best):
+                    self.best = list(chosen)
                 return
-            remaining = {
-                name: sections
-                for name, sections in remaining.items()
-                if chosen.isdisjoint(sections)
-            }
-            if not remaining:
-                search({}, chosen)
+            self.tick()
+            key = (uncovered, allowed)
+            if seen.get(key, len(self.best)) <= len(chosen):
+                return
+            seen[key] = len(chosen)
+            bound = self.lower_bound(uncovered, allowed)
+            if bound < 0 or len(chosen) + bound >= len(self.best):
                 return
 
-        # Choose the most constrained uncovered subcircuit.
-        pivot_name, pivot_sections = min(
-            remaining.items(),
-            key=lambda item: (len(item[1]), item[0].casefold()),
-        )
+            pivot = min(
+                iter_bits(uncovered),
+                key=lambda r: (popcount(requirements[r] & allowed), r),
+            )
+            options = sorted(
+                iter_bits(requirements[pivot] & allowed),
+                key=lambda i: (-popcount(coverage[i] & uncovered), i),
+            )
+            for section in options:
+                chosen.append(section)
+                search(uncovered & ~coverage[section], allowed, chosen)
+                chosen.pop()
+                allowed &= ~(1 << section)
+
+        search(uncovered, (1 << len(coverage)) - 1, [])
+        return self.best
+
+    def first_in_order(self, uncovered: int, budget: int) -> list[int] | None:
+        """
+        Lexicographically first cover (by section index) using at most
+        budget sections, or None. Sections are tried in index order; the
+        next one can be no later than the last section of any uncovered
+        requirement.
+        """
+        failed: dict[tuple[int, int], int] = {}
+        requirements = self.requirements
+        coverage = self.coverage
+        everything = (1 << len(coverage)) - 1
+
+        def search(uncovered: int, last: int, budget: int,
+                   chosen: list[int]) -> bool:
+            if not uncovered:
+                return True
+            if budget == 0:
+                return False
+            self.tick()
+            key = (uncovered, last)
+            if failed.get(key, -1) >= budget:
+                return False
+
+            allowed = everything & ~((1 << (last + 1)) - 1)
+            # the weighted bound rarely cuts here; the disjoint one is cheaper
+            bound = self.disjoint_bound(uncovered, allowed)
+            if bound < 0 or bound > budget:
+                failed[key] = budget
+                return False
+
+            limit = min(
+                (requirements[r] & allowed).bit_length() - 1
+                for r in iter_bits(uncovered)
+            )
+            for section in range(last + 1, limit + 1):
+                if not coverage[section] & uncovered:
+                    continue
+                chosen.append(section)
+                if search(uncovered & ~coverage[section], section,
+                          budget - 1, chosen):
+                    return True
+                chosen.pop()
+
+            failed[key] = budget
+            return False
+
+        chosen: list[int] = []
+        if search(uncovered, -1, budget, chosen):
+            return chosen
+        return None
 
-        # Try sections covering the most remaining names first.
-        section_scores = {
-            section: sum(section in choices for choices in remaining.values())
-            for section in pivot_sections
-        }
-        ordered_sections = sorted(
-            pivot_sections,
-            key=lambda section: (-section_scores[section], section.casefold()),
+
+def solve_section_cover(
+    choices_by_name: dict[str, set[str]],
+    time_limit: float | None = None,
+) -> SectionCover:
+    """
+    Minimum-cardinality section cover on integer bitsets.
+
+    Each key is a requested subcircuit and each value is the set of sections
+    in which that subcircuit is defined. Among minimum covers, the one whose
+    sorted section names come first (case-insensitively) is returned.
+
+    With time_limit (seconds), the search stops when time runs out and
+    returns the best cover found so far (optimal=False), together with a
+    lower bound on the minimum size. If only the tie-break ran out of
+    time, the cover is minimum but may not be the first in name order.
+    """
+    if not choices_by_name:
+        return SectionCover([], True, 0)
+    if any(not choices for choices in choices_by_name.values()):
+        return SectionCover(None, True, 0)
+
+    deadline = None if time_limit is None else time.monotonic() + time_limit
+    names = sorted(
+        {section for choices in choices_by_name.values() for section in choices},
+        key=lambda section: (section.casefold(), section),
+    )
+    index = {section: i for i, section in enumerate(names)}
+    requirements = [
+        sum(1 << index[section] for section in choices)
+        for choices in choices_by_name.values()
+    ]
+
+    def as_names(mask: int, extra: list[int]) -> list[str]:
+        picked = set(iter_bits(mask)) | set(extra)
+        return [names[i] for i in sorted(picked)]
+
+    # Size: full dominance, greedy start, branch and bound.
+    forced, reqs, coverage = reduce_cover_instance(requirements, len(names), False)
+    search = CoverSearch(reqs, coverage, deadline)
+    everything = (1 << len(reqs)) - 1
+    lower = popcount(forced) + search.lower_bound(everything, (1 << len(names)) - 1)
+    try:
+        best = search.minimum(everything, search.greedy(everything))
+    except CoverTimeout:
+        return SectionCover(as_names(forced, search.best), False, lower)
+    size = popcount(forced) + len(best)
+    fallback = SectionCover(as_names(forced, best), True, size)
+
+    # Tie-break: first cover of that size in section name order.
+    forced, reqs, coverage = reduce_cover_instance(requirements, len(names), True)
+    search = CoverSearch(reqs, coverage, deadline)
+    try:
+        first = search.first_in_order(
+            (1 << len(reqs)) - 1, size - popcount(forced)
         )
+    except CoverTimeout:
+        return fallback
+    if first is None:  # cannot happen: the reduction keeps a minimum cover
+        return fallback
+    return SectionCover(as_names(forced, first), True, size)
 
-        for section in ordered_sections:
-            search(remaining, chosen | {section})
 
-    search(choices_by_name, set())
-    return list(best) if best is not None else None
+def minimum_section_cover(
+    choices_by_name: dict[str, set[str]],
+) -> list[str] | None:
+    """
+    Return an exact minimum-cardinality section cover.
+
+    Each key is a requested subcircuit and each value is the set of sections
+    in which that subcircuit is defined. See solve_section_cover(); ties are
+    resolved lexicographically.
+    """
+    return solve_section_cover(choices_by_name).sections
 
 
 def report_single(
@@ -322,6 +663,7 @@ def report_list(
     requested_names: list[str],
     index: LibraryIndex,
     case_sensitive: bool,
+    time_limit: float | None = None,
 ) -> int:
     if not requested_names:
         print(f"error: no subcircuit names found in {list_file}", file=sys.stderr)
@@ -349,7 +691,8 @@ def report_list(
             match.section for match in matches if match.section is not None
         }
 
-    selected_sections = minimum_section_cover(choices_by_name)
+    cover = solve_section_cover(choices_by_name, time_limit)
+    selected_sections = cover.sections
 
     print(f"Library:       {library}")
     print(f"Subcircuit list: {list_file}")
@@ -371,7 +714,13 @@ def report_list(
         print("\nNo section cover could be found.")
         return 1
 
-    print(f"\nMinimum section count: {len(selected_sections)}")
+    if cover.optimal:
+        print(f"\nMinimum section count: {len(selected_sections)}")
+    else:
+        print(
+            f"\nSection count: {len(selected_sections)} (best found within "
+            f"{time_limit:g}s; minimum is at least {cover.lower_bound})"
+        )
     if selected_sections:
         for section in selected_sections:
             print(f"  {section}")
@@ -419,14 +768,18 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("library", type=Path, help="Spectre/SPICE library file")
     parser.add_argument(
         "subckt_or_file",
-        help="A subcircuit name, or an existing regular file listing names",
+        nargs="+",
+        help=(
+            "A subcircuit name, or an existing regular file listing names. "
+            "Several may be given; the library is scanned once for all."
+        ),
     )
     parser.add_argument(
         "--list-file",
         action="store_true",
         help=(
-            "Require the second argument to be a list file. This avoids any "
-            "ambiguity and gives an error if the file cannot be found."
+            "Require every subckt_or_file argument to be a list file. This "
+            "avoids any ambiguity and gives an error if a file cannot be found."
         ),
     )
     parser.add_argument(
@@ -434,25 +787,41 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="Match subcircuit names case-sensitively",
     )
+    parser.add_argument(
+        "--time-limit",
+        type=float,
+        metavar="SECONDS",
+        help=(
+            "Stop the section-cover search after this many seconds and report "
+            "the best cover found so far"
+        ),
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=None,
+        help="Directory for the library index cache (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always rescan the library; do not read or write the index cache",
+    )
+    parser.set_defaults(cache_dir=default_cache_dir())
     return parser.parse_args()
 
 
-def main() -> int:
-    args = parse_args()
-
-    if not args.library.is_file():
-        print(f"error: library is not a regular file: {args.library}", file=sys.stderr)
-        return 2
-
-    source = Path(args.subckt_or_file).expanduser()
+def check_source(argument: str, list_file: bool) -> bool:
+    """Validate one subckt-or-file argument, printing why it is unusable."""
+    source = Path(argument).expanduser()
 
-    if args.list_file and not source.is_file():
+    if list_file and not source.is_file():
         print(
             f"error: list file is not a regular file: {source}",
             file=sys.stderr,
         )
         print(f"       current directory: {Path.cwd()}", file=sys.stderr)
-        return 2
+        return False
 
     # In automatic mode, a path-looking argument that does not exist is much
     # more likely to be a mistyped/mislocated file than a subcircuit name.
@@ -460,9 +829,9 @@ def main() -> int:
         source.suffix.lower() in {".txt", ".lst", ".list", ".cir", ".sp", ".spi", ".scs", ".net"}
         or source.parent != Path(".")
     )
-    if not args.list_file and looks_like_path and not source.is_file():
+    if not list_file and looks_like_path and not source.is_file():
         print(
-            f"error: second argument looks like a file, but it was not found: {source}",
+            f"error: argument '{argument}' looks like a file, but it was not found: {source}",
             file=sys.stderr,
         )
         print(f"       current directory: {Path.cwd()}", file=sys.stderr)
@@ -470,28 +839,68 @@ def main() -> int:
             "       pass the correct path, or use a bare subcircuit name",
             file=sys.stderr,
         )
-        return 2
+        return False
 
-    try:
-        index = build_library_index(args.library, args.case_sensitive)
-
-        if source.is_file():
-            requested_names = read_requested_subckts(source, args.case_sensitive)
-            return report_list(
-                args.library,
-                source,
-                requested_names,
-                index,
-                args.case_sensitive,
-            )
+    return True
 
-        return report_single(
+
+def report_source(argument: str, index: LibraryIndex, args: argparse.Namespace) -> int:
+    source = Path(argument).expanduser()
+
+    if source.is_file():
+        requested_names = read_requested_subckts(source, args.case_sensitive)
+        return report_list(
             args.library,
-            args.subckt_or_file,
+            source,
+            requested_names,
             index,
             args.case_sensitive,
+            args.time_limit,
+        )
+
+    return report_single(
+        args.library,
+        argument,
+        index,
+        args.case_sensitive,
+    )
+
+
+def main() -> int:
+    args = parse_args()
+
+    if not args.library.is_file():
+        print(f"error: library is not a regular file: {args.library}", file=sys.stderr)
+        return 2
+
+    if args.time_limit is not None and not (
+        math.isfinite(args.time_limit) and args.time_limit > 0
+    ):
+        print("error: --time-limit must be a positive number of seconds", file=sys.stderr)
+        return 2
+
+    if not all([check_source(arg, args.list_file) for arg in args.subckt_or_file]):
+        return 2
+
+    try:
+        index = load_library_index(
+            args.library,
+            args.case_sensitive,
+            None if args.no_cache else args.cache_dir,
         )
 
+        if len(args.subckt_or_file) == 1:
+            return report_source(args.subckt_or_file[0], index, args)
+
+        status = 0
+        for number, argument in enumerate(args.subckt_or_file):
+            if number:
+                print()
+            print(f"==> {argument} <==")
+            status = max(status, report_source(argument, index, args))
+            sys.stdout.flush()
+        return status
+
     except OSError as error:
         print(f"error: {error}", file=sys.stderr)
         return 2
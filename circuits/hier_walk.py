@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Recursion-free hierarchy traversal shared by the circuits/ tools.
+
+rpt_inst_path.py, report_hierarchy.py and map_pin_net.py all walk a
+cell -> instance -> cell graph depth first. Doing that with recursive Python
+functions hits the interpreter recursion limit on deep analog hierarchies
+(a few hundred to a few thousand levels) and copies the path prefix at every
+level. This module provides the two walks they need on an explicit stack:
+
+  HierWalk        pre-order walk over edges with one shared path buffer
+  fold_postorder  memoized bottom-up value per node (e.g. match counts)
+
+Both take the graph as plain functions, so the tools keep their own data
+layout (interned id arrays, dicts of names, lazily created nodes).
+"""
+
+class HierWalk(object):
+    """
+    Depth-first, pre-order walk over the edges below a root node.
+
+      expand(node)   sequence/iterable of edges out of node, in order
+      child(edge)    node an edge leads to
+      label(edge)    value pushed on the path for an edge (default: the edge)
+      key(node)      identity used for cycle detection (default: the node)
+      max_depth      nodes at this depth or deeper are not expanded
+
+    edges(root) yields every edge reached. While an edge is being handled,
+    `path` holds the labels from the root down to and including it, and
+    `depth` is len(path). The list is reused in place for the whole walk:
+    copy it (tuple(walk.path)) to keep a path.
+
+    After an edge is yielded the walk descends into its child unless the
+    consumer called prune(), the depth limit is reached, or the child's key
+    is already on the current path (`active`). In that last case `cut` is
+    set, and consumers that report recursion can check
+    walk.is_active(walk.child(edge)) themselves.
+    """
+
+    def __init__(self, expand, child, label=None, key=None, max_depth=None):
+        self.expand = expand
+        self.child = child
+        self.label = label
+        self.key = key
+        self.max_depth = max_depth
+        self.path = []
+        self.active = set()
+        self.cut = False
+        self._prune = False
+
+    @property
+    def depth(self):
+        return len(self.path)
+
+    def prune(self):
+        """
+        Do not descend into the child of the edge just yielded.
+        """
+        self._prune = True
+
+    def is_active(self, node):
+        return (self.key(node) if self.key else node) in self.active
+
+    def edges(self, root):
+        expand = self.expand
+        child = self.child
+        label = self.label
+        key = self.key
+        max_depth = self.max_depth
+        path = self.path
+        active = self.active
+
+        del path[:]
+        active.clear()
+
+        if max_depth is not None and max_depth <= 0:
+            return
+        if max_depth is None:
+            max_depth = -1
+
+        push = path.append
+        active.add(key(root) if key else root)
+        stack = [(root, iter(expand(root)))]
+
+        while stack:
+            node, it = stack[-1]
+
+            for e in it:
+                push(label(e) if label else e)
+                self._prune = False
+                yield e
+
+                c = child(e)
+                c_key = key(c) if key else c
+
+                if self._prune or len(path) == max_depth:
+                    path.pop()
+                elif c_key in active:
+                    self.cut = True
+                    path.pop()
+                else:
+                    active.add(c_key)
+                    stack.append((c, iter(expand(c))))
+                    break
+            else:
+                stack.pop()
+                active.discard(key(node) if key else node)
+                if stack:
+                    path.pop()
+
+
+def fold_postorder(root, expand, child, value, memo):
+    """
+    Fill memo[node] = value(node, edges) for root and every node below it,
+    children first, without recursion.
+
+    value() reads the children's results from memo. A child that closes a
+    cycle (it is still on the current path) has no entry yet, so value()
+    should use memo.get(child, default) and treat it as cut. Returns True
+    if any cycle was cut.
+
+    Nodes already in memo are not revisited, so repeated subtrees are
+    evaluated once across calls that share a memo.
+    """
+    if root in memo:
+        return False
+
+    cut = False
+    active = {root}
+    stack = [[root, list(expand(root)), 0]]
+
+    while stack:
+        frame = stack[-1]
+        node, edges, i = frame
+
+        if i < len(edges):
+            frame[2] = i + 1
+            c = child(edges[i])
+
+            if c in memo:
+                continue
+            if c in active:
+                cut = True
+                continue
+
+            active.add(c)
+            stack.append([c, list(expand(c)), 0])
+            continue
+
+        stack.pop()
+        active.discard(node)
+        memo[node] = value(node, edges)
+
+    return cut
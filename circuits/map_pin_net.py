@@ -1,13 +1,28 @@
 #!/usr/bin/env python3
 import argparse
+import os
 import re
 import sys
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Tuple
-
-
+from itertools import chain, groupby
+from operator import itemgetter
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from hier_walk import HierWalk
+from spice_netlist import (
+    ENDS_RE,
+    load_pickle_cache,
+    netlist_stamp,
+    read_logical_lines,
+    save_pickle_cache,
+    strip_dollar_comment,
+    user_cache_dir,
+    user_cache_path,
+)
+
+
+# Unlike spice_netlist.SUBCKT_RE, this also captures the pin list.
 SUBCKT_RE = re.compile(r"^\s*\.subckt\s+(\S+)(.*)$", re.IGNORECASE)
-ENDS_RE   = re.compile(r"^\s*\.ends\b", re.IGNORECASE)
 
 
 @dataclass
@@ -26,6 +41,14 @@ class Subckt:
     lines: List[Tuple[int, str]] = field(default_factory=list)
     insts: List[Inst] = field(default_factory=list)
 
+    # Inverted indexes over insts, filled by index_subckts():
+    #   net_pins[net]       -> [(inst index, pin position, pin name), ...]
+    #   insts_by_cell[cell] -> [inst index, ...]
+    #   insts_by_name[name] -> [inst index, ...]
+    net_pins: Dict[str, List[Tuple[int, int, str]]] = field(default_factory=dict)
+    insts_by_cell: Dict[str, List[int]] = field(default_factory=dict)
+    insts_by_name: Dict[str, List[int]] = field(default_factory=dict)
+
 
 @dataclass
 class Occurrence:
@@ -36,65 +59,18 @@ class Occurrence:
     line_no: int
 
 
-def strip_inline_comment(line: str) -> str:
+def logical_lines(path: str) -> Iterator[Tuple[int, str]]:
     """
-    Conservative comment handling:
-      * full-line comments starting with '*' are removed elsewhere
-      * inline '$' comments are stripped
-    """
-    if "$" in line:
-        line = line.split("$", 1)[0]
-    return line.rstrip()
-
-
-def logical_lines(path: str) -> List[Tuple[int, str]]:
-    """
-    Return HSPICE-style logical lines with '+' continuations joined.
+    Yield HSPICE-style logical lines with '+' continuations joined.
 
     Full-line comments beginning with '*' are ignored.
+    Inline '$' comments are stripped.
     Blank lines are ignored.
     """
-    out: List[Tuple[int, str]] = []
-    cur = ""
-    cur_line_no = 0
-
-    with open(path, "r", errors="replace") as f:
-        for line_no, raw in enumerate(f, 1):
-            s = raw.rstrip("\n")
-
-            if not s.strip():
-                continue
-
-            if s.lstrip().startswith("*"):
-                continue
-
-            s = strip_inline_comment(s)
-
-            if not s.strip():
-                continue
-
-            stripped = s.lstrip()
-
-            if stripped.startswith("+"):
-                cont = stripped[1:].strip()
-                if cur:
-                    cur += " " + cont
-                else:
-                    # Continuation without a previous line; keep it as its own line.
-                    cur = cont
-                    cur_line_no = line_no
-                continue
-
-            if cur:
-                out.append((cur_line_no, cur.strip()))
-
-            cur = s.strip()
-            cur_line_no = line_no
-
-    if cur:
-        out.append((cur_line_no, cur.strip()))
-
-    return out
+    for line_no, _start, _end, text in read_logical_lines(
+        path, strip=strip_dollar_comment, errors="replace"
+    ):
+        yield line_no, text
 
 
 def split_tokens(line: str) -> List[str]:
@@ -102,7 +78,7 @@ def split_tokens(line: str) -> List[str]:
 
 
 def collect_subckts_and_top_lines(
-    lines: List[Tuple[int, str]]
+    lines: Iterable[Tuple[int, str]]
 ) -> Tuple[Dict[str, Subckt], List[Tuple[int, str]]]:
     """
     First pass:
@@ -164,7 +140,8 @@ def parse_x_instance(
         Xname net1 net2 ... cellname [params...]
 
     The cell name is recognized by matching token[1 + pin_count] against
-    a known .subckt name.
+    a known .subckt name. Only tokens that name a .subckt are checked, so
+    the cost does not grow with the number of subckts in the file.
 
     Primitives and undefined subckts are ignored.
     """
@@ -179,16 +156,17 @@ def parse_x_instance(
 
     matches: List[Tuple[str, List[str]]] = []
 
-    for cell, sub in subckts.items():
-        idx = 1 + len(sub.pins)
-        if len(toks) > idx and toks[idx] == cell:
-            nets = toks[1:idx]
-            matches.append((cell, nets))
+    for idx in range(1, len(toks)):
+        sub = subckts.get(toks[idx])
+        if sub is not None and idx == 1 + len(sub.pins):
+            matches.append((sub.name, toks[1:idx]))
 
     if not matches:
         return None
 
     if len(matches) > 1:
+        order = {cell: i for i, cell in enumerate(subckts)}
+        matches.sort(key=lambda m: order[m[0]])
         cells = ", ".join(c for c, _ in matches)
         raise SystemExit(
             f"Error: ambiguous subckt instance at line {line_no}; could match: {cells}\n"
@@ -219,6 +197,73 @@ def parse_top_instances(
     return out
 
 
+def index_subckts(subckts: Dict[str, Subckt]) -> None:
+    """
+    Fill the per-subckt inverted indexes used to answer queries in
+    O(result): local net -> instance pins, child cell -> instances and
+    instance name -> instances.
+
+    Pins follow the same dict(zip(pins, nets)) rule as pin_to_hnet, so a
+    repeated formal pin name keeps its first position and last net.
+    """
+    for sub in subckts.values():
+        net_pins: Dict[str, List[Tuple[int, int, str]]] = {}
+        insts_by_cell: Dict[str, List[int]] = {}
+        insts_by_name: Dict[str, List[int]] = {}
+
+        for i, inst in enumerate(sub.insts):
+            pin_nets = dict(zip(subckts[inst.cell].pins, inst.nets))
+            for pin_no, (pin, net) in enumerate(pin_nets.items()):
+                net_pins.setdefault(net, []).append((i, pin_no, pin))
+            insts_by_cell.setdefault(inst.cell, []).append(i)
+            insts_by_name.setdefault(inst.name, []).append(i)
+
+        sub.net_pins = net_pins
+        sub.insts_by_cell = insts_by_cell
+        sub.insts_by_name = insts_by_name
+
+
+CACHE_SUFFIX = ".pnidx"
+CACHE_VERSION = 1
+
+
+def load_model(
+    path: str, use_cache: bool = True
+) -> Tuple[Dict[str, Subckt], List[Inst]]:
+    """
+    Parse and index the netlist, returning (subckts, top_insts).
+
+    With use_cache, the indexed model is pickled under
+    $XDG_CACHE_HOME/map_pin_net (or ~/.cache/map_pin_net), keyed by the
+    netlist's resolved path, size and mtime, and loaded from there on later
+    runs. It is never written next to the netlist, where anyone able to
+    write that directory could plant a pickle.
+    A stale or unreadable cache is ignored; a cache that cannot be written
+    is not an error.
+    """
+    cache_path = user_cache_path(user_cache_dir("map_pin_net"), path, CACHE_SUFFIX)
+    stamp = netlist_stamp(path)
+
+    if use_cache:
+        model = load_pickle_cache(cache_path, CACHE_VERSION, stamp)
+        if model is not None:
+            return model
+
+    subckts, top_lines = collect_subckts_and_top_lines(logical_lines(path))
+    parse_instances_in_subckts(subckts)
+    top_insts = parse_top_instances(top_lines, subckts)
+    index_subckts(subckts)
+
+    # Body lines are only needed to find the instances.
+    for sub in subckts.values():
+        sub.lines = []
+
+    if use_cache:
+        save_pickle_cache(cache_path, CACHE_VERSION, stamp, (subckts, top_insts))
+
+    return subckts, top_insts
+
+
 def hier_join(parts: List[str]) -> str:
     return ".".join(p for p in parts if p)
 
@@ -248,62 +293,299 @@ def resolve_net(
     return local_net
 
 
-def walk_scope(
-    subckts: Dict[str, Subckt],
-    cell: str,
-    scope_path: List[str],
-    formal_to_parent_hnet: Dict[str, str],
-    occurrences: List[Occurrence],
-) -> None:
-    sub = subckts[cell]
-
-    for inst in sub.insts:
-        child_sub = subckts[inst.cell]
-
-        pin_to_hnet: Dict[str, str] = {}
-        for pin, net in zip(child_sub.pins, inst.nets):
-            pin_to_hnet[pin] = resolve_net(net, scope_path, formal_to_parent_hnet)
-
-        hier_inst = hier_join(scope_path + [inst.name])
-
-        occurrences.append(
-            Occurrence(
-                hier_inst=hier_inst,
-                inst_name=inst.name,
-                cell=inst.cell,
-                pin_to_hnet=pin_to_hnet,
-                line_no=inst.line_no,
-            )
-        )
+@dataclass(eq=False)
+class OccNode:
+    """
+    One occurrence in the lazily expanded hierarchy: a node of the path trie.
+
+    Nodes hold only a parent pointer and the (shared, per-subckt) Inst they
+    instantiate. Hierarchical names and pin maps are materialized on demand
+    by Design and cached on the node, so only occurrences a query touches
+    cost more than a couple of pointers -- and nodes outside the searched
+    subtrees are never created at all.
+    """
+
+    parent: Optional["OccNode"]
+    inst: Inst
+    hier_inst: Optional[str] = None
+    pin_to_hnet: Optional[Dict[str, str]] = None
+
+
+class Design:
+    """
+    Lazily expanded view of the design below one top-level instance.
+
+    The per-subckt Inst lists are the pin maps: each Inst records the local
+    nets on its pins, and a local net that is a formal pin of the enclosing
+    subckt resolves through the parent occurrence. Occurrences are created
+    while walking and discarded unless a query keeps them.
+    """
 
-        # Descend into this instance.
-        walk_scope(
-            subckts=subckts,
-            cell=inst.cell,
-            scope_path=scope_path + [inst.name],
-            formal_to_parent_hnet=pin_to_hnet,
-            occurrences=occurrences,
+    def __init__(self, subckts: Dict[str, Subckt], top: Inst) -> None:
+        self.subckts = subckts
+        self.root = OccNode(parent=None, inst=top)
+
+        # Cell -> subckts that instantiate it (the cell -> occurrences index,
+        # read upward).
+        self.used_in: Dict[str, List[str]] = {}
+        for sub in subckts.values():
+            for cell in sub.insts_by_cell:
+                self.used_in.setdefault(cell, []).append(sub.name)
+
+    def _unresolved_chain(self, node: OccNode, attr: str) -> List[OccNode]:
+        """
+        node and its ancestors up to (not including) the first one that
+        already has attr set, top-most first.
+        """
+        chain: List[OccNode] = []
+        while node is not None and getattr(node, attr) is None:
+            chain.append(node)
+            node = node.parent
+        chain.reverse()
+        return chain
+
+    def hier_inst(self, node: OccNode) -> str:
+        for n in self._unresolved_chain(node, "hier_inst"):
+            if n.parent is None:
+                n.hier_inst = n.inst.name
+            else:
+                n.hier_inst = hier_join([n.parent.hier_inst, n.inst.name])
+        return node.hier_inst
+
+    def pin_to_hnet(self, node: OccNode) -> Dict[str, str]:
+        for n in self._unresolved_chain(node, "pin_to_hnet"):
+            pins = self.subckts[n.inst.cell].pins
+
+            if n.parent is None:
+                # Top-level nets stay bare.
+                n.pin_to_hnet = dict(zip(pins, n.inst.nets))
+            else:
+                scope_path = [self.hier_inst(n.parent)]
+                formal_to_parent_hnet = n.parent.pin_to_hnet
+                n.pin_to_hnet = {
+                    pin: resolve_net(net, scope_path, formal_to_parent_hnet)
+                    for pin, net in zip(pins, n.inst.nets)
+                }
+        return node.pin_to_hnet
+
+    def pin_hnet(self, node: OccNode, pin: str) -> str:
+        """
+        Hierarchical net on one pin of node, without building the node's
+        whole pin map.
+        """
+        if node.pin_to_hnet is not None or node.parent is None:
+            return self.pin_to_hnet(node)[pin]
+
+        net = dict(zip(self.subckts[node.inst.cell].pins, node.inst.nets))[pin]
+        return resolve_net(net, [self.hier_inst(node.parent)], self.pin_to_hnet(node.parent))
+
+    def occurrence(self, node: OccNode) -> Occurrence:
+        return Occurrence(
+            hier_inst=self.hier_inst(node),
+            inst_name=node.inst.name,
+            cell=node.inst.cell,
+            pin_to_hnet=self.pin_to_hnet(node),
+            line_no=node.inst.line_no,
         )
 
+    def children(self, node: OccNode) -> Iterator[OccNode]:
+        for inst in self.subckts[node.inst.cell].insts:
+            yield OccNode(parent=node, inst=inst)
+
+    def ancestors(self, target: str) -> set:
+        """
+        Cells that have an instance of target somewhere below them.
+        """
+        seen: set = set()
+        stack = [target]
+        while stack:
+            for parent in self.used_in.get(stack.pop(), ()):
+                if parent not in seen:
+                    seen.add(parent)
+                    stack.append(parent)
+        return seen
+
+    def iter_nodes(self, node: Optional[OccNode] = None) -> Iterator[OccNode]:
+        """
+        Every occurrence at or below node (default: the top instance), in
+        depth-first pre-order. A recursive subckt is not re-entered.
+        """
+        if node is None:
+            node = self.root
+
+        yield node
+        walk = HierWalk(self.children, occ_self, key=occ_cell)
+        yield from walk.edges(node)
+
+    def iter_cell(self, target: str) -> Iterator[OccNode]:
+        """
+        Occurrences of cell target, in the same order as iter_nodes().
+
+        Only instances of target or of its ancestors are visited, found
+        through insts_by_cell, so the walk is proportional to the result
+        times the hierarchy depth rather than to the design size.
+        """
+        root = self.root
+        if root.inst.cell == target:
+            yield root
+
+        relevant = self.ancestors(target)
+        if root.inst.cell not in relevant:
+            return
+        relevant.add(target)
+
+        def relevant_children(node: OccNode) -> List[OccNode]:
+            sub = self.subckts[node.inst.cell]
+            indexes = sorted(
+                i
+                for cell, idx in sub.insts_by_cell.items() if cell in relevant
+                for i in idx
+            )
+            return [OccNode(parent=node, inst=sub.insts[i]) for i in indexes]
+
+        walk = HierWalk(relevant_children, occ_self, key=occ_cell)
+        for child in walk.edges(root):
+            if child.inst.cell == target:
+                yield child
+
+    def find_scopes(
+        self, node_name: str
+    ) -> Iterator[Tuple[Optional[OccNode], str, Tuple[int, ...]]]:
+        """
+        Yield every (scope, local_net, order_key) a hierarchical node name
+        can denote.
+
+        scope None means a bare top-level net. A net inside scope XTOP.X1 is
+        named XTOP.X1.<local>; since local names may themselves contain
+        periods, every instance-path prefix of node_name is tried. order_key
+        is the scope's child-index path, which sorts in pre-order.
+        """
+        yield None, node_name, ()
+
+        root = self.root
+        prefix = root.inst.name + "."
+        if not node_name.startswith(prefix):
+            return
+
+        stack = [(root, node_name[len(prefix):], ())]
+        while stack:
+            scope, rest, key = stack.pop()
+            yield scope, rest, key
+
+            sub = self.subckts[scope.inst.cell]
+            dot = rest.find(".")
+            while dot >= 0:
+                for i in sub.insts_by_name.get(rest[:dot], ()):
+                    child = OccNode(parent=scope, inst=sub.insts[i])
+                    stack.append((child, rest[dot + 1:], key + (i,)))
+                dot = rest.find(".", dot + 1)
+
+    def iter_net_pins(self, node_name: str) -> Iterator[Tuple[OccNode, str]]:
+        """
+        Yield (occurrence, pin) for every instance pin whose hierarchical net
+        is node_name, in the order a full pre-order walk would find them.
+
+        Only the scope owning the net and the instances it passes through
+        are expanded.
+        """
+        hits: List[Tuple[Tuple[int, ...], int, OccNode, str]] = []
+
+        for scope, local, key in self.find_scopes(node_name):
+            if scope is None:
+                if local in self.root.inst.nets:
+                    self._collect_net_pins(self.root, {local}, key, hits, top=True)
+                continue
 
-def build_design_occurrences(
-    subckts: Dict[str, Subckt],
-    top_insts: List[Inst],
-    topinst_name: str,
-) -> List[Occurrence]:
-    top = None
+            if local in self.subckts[scope.inst.cell].pins:
+                # A formal pin is named after the net it connects to above.
+                continue
+
+            self._collect_net_pins(scope, {local}, key, hits)
+
+        hits.sort(key=lambda h: (h[0], h[1]))
+        for _key, _pin_no, node, pin in hits:
+            yield node, pin
+
+    def _collect_net_pins(
+        self,
+        scope: OccNode,
+        local_nets: set,
+        key: Tuple[int, ...],
+        hits: List[Tuple[Tuple[int, ...], int, OccNode, str]],
+        top: bool = False,
+    ) -> None:
+        """
+        Record pins connected to local_nets (names local to scope), then
+        follow the connection into each instance through its formal pins.
+        With top, scope itself is the top instance and local_nets are bare
+        top-level nets on its pins.
+
+        Hits are sorted by key afterwards, so the explicit stack may visit
+        scopes in any order. A path longer than the number of subckts must
+        repeat a cell, so recursion is cut there.
+        """
+        if top:
+            pin_nets = dict(zip(self.subckts[scope.inst.cell].pins, scope.inst.nets))
+            formals = set()
+            for pin_no, (pin, net) in enumerate(pin_nets.items()):
+                if net in local_nets:
+                    hits.append((key, pin_no, scope, pin))
+                    formals.add(pin)
+            if not formals:
+                return
+            local_nets = formals
+
+        max_depth = len(self.subckts)
+        stack = [(scope, local_nets, key)]
+
+        while stack:
+            scope, local_nets, key = stack.pop()
+            sub = self.subckts[scope.inst.cell]
+            entries = sorted(
+                entry
+                for net in local_nets
+                for entry in sub.net_pins.get(net, ())
+            )
+
+            for i, group in groupby(entries, key=itemgetter(0)):
+                child = OccNode(parent=scope, inst=sub.insts[i])
+                child_key = key + (i,)
+                formals = set()
+
+                for _i, pin_no, pin in group:
+                    hits.append((child_key, pin_no, child, pin))
+                    formals.add(pin)
+
+                if len(child_key) < max_depth:
+                    stack.append((child, formals, child_key))
+
+
+def occ_self(node: OccNode) -> OccNode:
+    return node
+
+
+def occ_cell(node: OccNode) -> str:
+    return node.inst.cell
+
+
+def find_top_instance(top_insts: List[Inst], topinst_name: str) -> Inst:
     for inst in top_insts:
         if inst.name == topinst_name:
-            top = inst
-            break
+            return inst
+
+    candidates = ", ".join(i.name for i in top_insts) or "(none)"
+    raise SystemExit(
+        f"Error: --topinst {topinst_name!r} was not found as a top-level subckt instance.\n"
+        f"Top-level subckt instances found: {candidates}"
+    )
 
-    if top is None:
-        candidates = ", ".join(i.name for i in top_insts) or "(none)"
-        raise SystemExit(
-            f"Error: --topinst {topinst_name!r} was not found as a top-level subckt instance.\n"
-            f"Top-level subckt instances found: {candidates}"
-        )
 
+def build_design(
+    subckts: Dict[str, Subckt],
+    top_insts: List[Inst],
+    topinst_name: str,
+) -> Design:
+    top = find_top_instance(top_insts, topinst_name)
     top_sub = subckts[top.cell]
 
     if len(top.nets) != len(top_sub.pins):
@@ -311,87 +593,72 @@ def build_design_occurrences(
             f"Internal error: top instance {top.name} pin count mismatch at line {top.line_no}"
         )
 
-    # Top-level nets stay bare.
-    top_pin_to_hnet = dict(zip(top_sub.pins, top.nets))
-
-    occurrences: List[Occurrence] = []
+    return Design(subckts, top)
 
-    # Include the top instance itself as an occurrence too.
-    occurrences.append(
-        Occurrence(
-            hier_inst=top.name,
-            inst_name=top.name,
-            cell=top.cell,
-            pin_to_hnet=top_pin_to_hnet,
-            line_no=top.line_no,
-        )
-    )
 
-    walk_scope(
-        subckts=subckts,
-        cell=top.cell,
-        scope_path=[top.name],
-        formal_to_parent_hnet=top_pin_to_hnet,
-        occurrences=occurrences,
-    )
+def build_design_occurrences(
+    subckts: Dict[str, Subckt],
+    top_insts: List[Inst],
+    topinst_name: str,
+) -> List[Occurrence]:
+    """
+    Fully flattened occurrence list, top instance first.
 
-    return occurrences
+    Kept for callers that want every occurrence; the queries below use the
+    lazy Design directly and never build this list.
+    """
+    design = build_design(subckts, top_insts, topinst_name)
+    return [design.occurrence(node) for node in design.iter_nodes()]
 
 
-def query_cell_pin(occurrences: List[Occurrence], query: str) -> int:
+def query_cell_pin(design: Design, query: str) -> int:
     cell, pin = query.split(":", 1)
 
+    # Occurrences are streamed; only the first is needed to know whether
+    # there are any.
+    hits = design.iter_cell(cell)
+
     # New mode:
     #   cellname:*
     # Report every pin connection for every instance of cellname.
     if pin == "*":
-        hits = [
-            occ for occ in occurrences
-            if occ.cell == cell
-        ]
+        first = next(hits, None)
 
-        if not hits:
+        if first is None:
             print(f"No matches for {cell}:*")
             return 1
 
         print(f"{cell}:*")
         print("-" * len(f"{cell}:*"))
 
-        for occ in hits:
+        for node in chain([first], hits):
             print()
-            print(f"instance : {occ.hier_inst} of {cell}")
+            print(f"instance : {design.hier_inst(node)} of {cell}")
             print("Pin Name : Net Name")
-            for pin_name, net_name in occ.pin_to_hnet.items():
+            for pin_name, net_name in design.pin_to_hnet(node).items():
                 print(f"{pin_name} : {net_name}")
 
         return 0
 
     # Existing mode:
     #   cellname:pin_name
-    hits = [
-        occ for occ in occurrences
-        if occ.cell == cell and pin in occ.pin_to_hnet
-    ]
+    sub = design.subckts.get(cell)
+    first = next(hits, None) if sub is not None and pin in sub.pins else None
 
-    if not hits:
+    if first is None:
         print(f"No matches for {cell}:{pin}")
         return 1
 
     print(f"{cell}:{pin}")
     print("-" * len(f"{cell}:{pin}"))
 
-    for occ in hits:
-        print(f"{occ.hier_inst:<50} {cell}:{pin} -> {occ.pin_to_hnet[pin]}")
+    for node in chain([first], hits):
+        print(f"{design.hier_inst(node):<50} {cell}:{pin} -> {design.pin_hnet(node, pin)}")
 
     return 0
 
-def query_node(occurrences: List[Occurrence], node: str) -> int:
-    hits: List[Tuple[Occurrence, str]] = []
-
-    for occ in occurrences:
-        for pin, hnet in occ.pin_to_hnet.items():
-            if hnet == node:
-                hits.append((occ, pin))
+def query_node(design: Design, node: str) -> int:
+    hits = list(design.iter_net_pins(node))
 
     if not hits:
         print(f"No instance pins connect to node {node}")
@@ -401,7 +668,48 @@ def query_node(occurrences: List[Occurrence], node: str) -> int:
     print("-" * len(node))
 
     for occ, pin in hits:
-        print(f"{occ.hier_inst:<50} {occ.cell}:{pin} -> {node}")
+        print(f"{design.hier_inst(occ):<50} {occ.inst.cell}:{pin} -> {node}")
+
+    return 0
+
+
+def run_query(design: Design, query: str) -> int:
+    if ":" in query:
+        cell, pin = query.split(":", 1)
+        if not cell or not pin:
+            raise SystemExit("Error: cell pin query must be of form cellname:pin_name")
+        return query_cell_pin(design, query)
+
+    return query_node(design, query)
+
+
+def interactive(design: Design) -> int:
+    """
+    Answer queries read one per line from stdin against the loaded design.
+    Blank lines and # comments are skipped; quit or exit ends the session.
+    """
+    prompt = "> " if sys.stdin.isatty() else ""
+
+    while True:
+        if prompt:
+            sys.stdout.write(prompt)
+            sys.stdout.flush()
+
+        line = sys.stdin.readline()
+        if not line:
+            break
+
+        query = line.strip()
+        if not query or query.startswith("#"):
+            continue
+        if query in ("quit", "exit"):
+            break
+
+        try:
+            run_query(design, query)
+        except SystemExit as e:
+            print(e, file=sys.stderr)
+        sys.stdout.flush()
 
     return 0
 
@@ -427,32 +735,47 @@ def main() -> int:
 
     ap.add_argument(
         "query",
+        nargs="?",
         help=(
             "Either cellname:pin_name, or a hierarchical node name such as "
             "XTOP.X1.net. A node with no period is treated as a top-level node."
         ),
     )
 
+    ap.add_argument(
+        "-i", "--interactive",
+        action="store_true",
+        help=(
+            "Load the netlist once, then answer queries read one per line from "
+            "stdin (quit or exit to stop)"
+        ),
+    )
+
+    ap.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always re-parse the netlist; do not read or write its cached model (~/.cache/map_pin_net)",
+    )
+
     args = ap.parse_args()
 
-    lines = logical_lines(args.netlist)
-    subckts, top_lines = collect_subckts_and_top_lines(lines)
-    parse_instances_in_subckts(subckts)
-    top_insts = parse_top_instances(top_lines, subckts)
+    if args.query is None and not args.interactive:
+        ap.error("a query is required unless --interactive is given")
+
+    subckts, top_insts = load_model(args.netlist, use_cache=not args.no_cache)
 
-    occurrences = build_design_occurrences(
+    design = build_design(
         subckts=subckts,
         top_insts=top_insts,
         topinst_name=args.topinst,
     )
 
-    if ":" in args.query:
-        cell, pin = args.query.split(":", 1)
-        if not cell or not pin:
-            raise SystemExit("Error: cell pin query must be of form cellname:pin_name")
-        return query_cell_pin(occurrences, args.query)
+    if args.interactive:
+        if args.query is not None:
+            run_query(design, args.query)
+        return interactive(design)
 
-    return query_node(occurrences, args.query)
+    return run_query(design, args.query)
 
 
 if __name__ == "__main__":
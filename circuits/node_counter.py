@@ -1,7 +1,26 @@
 #!/usr/bin/env python3
+"""
+node_counter.py
 
-from __future__ import annotations
+Find node-count culprits in a Spectre `spectre.ic` file: count nodes under
+each hierarchical instance, level by level.
+
+This module is the engine for both command-line tools:
+
+    node_counter.py       instances are the leading 'x'/'X' segments
+    node_counter_3p6.py   all segments but the last are instances (Option B)
+
+The two differ only in their Dialect (how a line is parsed, which segments
+are instances, how a level is rendered). Files are scanned as newline-aligned
+byte ranges, optionally in a process pool (--jobs), and the per-level
+Counters are merged, so the report does not depend on the number of jobs.
+
+Python compatibility: 3.6+
+"""
 import argparse
+import heapq
+import multiprocessing
+import os
 import re
 import sys
 from collections import Counter
@@ -32,24 +51,46 @@ def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
                    help="Regex of node names to exclude")
     p.add_argument("--case-insensitive", action="store_true",
                    help="Case-insensitive matching for excludes")
+    add_scan_args(p)
     return p.parse_args(argv)
 
+def add_scan_args(p: argparse.ArgumentParser) -> None:
+    """Options shared by both entry points."""
+    p.add_argument("-j", "--jobs", type=int, default=1,
+                   help="Scan the file in N processes (default: 1; exact "
+                        "counts from a file only)")
+    p.add_argument("--approx", type=int, default=0, metavar="K",
+                   help="Approximate counts with K counters per level "
+                        "(space-saving) instead of exact counts; for very "
+                        "large files with many distinct instances (0 = exact)")
+
 # ---------- I/O ----------
 
 def load_lines(path: str) -> Iterable[str]:
     """Yield lines from file or stdin ('-')."""
     if path == "-":
         return sys.stdin
-    return Path(path).read_text(encoding="utf-8", errors="ignore").splitlines()
+    return iter_file_lines(Path(path))
+
+def iter_file_lines(path: Path) -> Iterator[str]:
+    """
+    Stream the lines of a file, split exactly as str.splitlines() would split
+    the whole text, without reading it into memory.
+    """
+    with path.open(encoding="utf-8", errors="ignore") as f:
+        for raw in f:
+            yield from raw.splitlines()
 
 # ---------- Filtering & Parsing ----------
 
 def make_node_filter(skip_globals: bool,
                      extra_globals_csv: str,
-                     regex_exclude: str,
-                     case_insensitive: bool) -> Callable[[str], bool]:
+                     regex_exclude: Optional[str],
+                     case_insensitive: bool,
+                     fold_globals: bool = False) -> Callable[[str], bool]:
     """
     Returns predicate(node_name) -> True if node should be kept.
+    With fold_globals, case_insensitive also applies to the globals.
     """
     globs = set(DEFAULT_GLOBALS) if skip_globals else set()
     if extra_globals_csv:
@@ -58,6 +99,18 @@ def make_node_filter(skip_globals: bool,
     flags = re.I if case_insensitive else 0
     rex = re.compile(regex_exclude, flags) if regex_exclude else None
 
+    if fold_globals and case_insensitive:
+        globs = {g.lower() for g in globs}
+
+        def keep(node: str) -> bool:
+            if node.lower() in globs:
+                return False
+            if rex and rex.search(node):
+                return False
+            return True
+
+        return keep
+
     def keep(node: str) -> bool:
         if node in globs:
             return False
@@ -91,15 +144,20 @@ def parse_node_from_ic_line(line: str) -> Optional[str]:
 
 # ---------- Instance path handling ----------
 
-def split_instance_segments(node: str) -> List[str]:
+def split_instance_segments(node: str, limit: Optional[int] = None) -> List[str]:
     """
     Return consecutive instance segments from the start of a hierarchical node.
     Instance segments are those starting with 'x'/'X'. Stops at first non-instance part.
+    With limit, at most that many segments are returned (the rest of the
+    name is not split).
     E.g.:
       'xtop2.xb4.net123' -> ['xtop2', 'xb4']
       'xtop1.xa2.M3:d'   -> ['xtop1', 'xa2']
     """
-    segs = node.split('.')
+    if limit is None:
+        segs = node.split('.')
+    else:
+        segs = node.split('.', limit)[:limit]
     insts: List[str] = []
     for seg in segs:
         core = seg.split(':', 1)[0]
@@ -116,37 +174,255 @@ def instance_prefixes(insts: Sequence[str], max_levels: int) -> List[str]:
         out.append('.'.join(insts[:i]))
     return out
 
+# ---------- Option B (node_counter_3p6.py) ----------
+
+_VTOKEN_OPTION_B = re.compile(r"^v\((.+?)\)(?:\s*=\s*|\s+|$)", re.IGNORECASE)
+_INUM_TOKEN = re.compile(r"^i\d+\(", re.IGNORECASE)
+
+def parse_node_option_b(line: str) -> Optional[str]:
+    """
+    Extract node name from a spectre.ic line.
+
+    Handles:
+      v(<node>)=1.1
+      v(<node>) 1.1
+      <node> 1.1
+      <node>=1.1
+
+    Skips:
+      @...
+      i(...)
+      iNUMBER(...)
+    """
+    s = line.strip()
+    if not s:
+        return None
+
+    if s.startswith("*") or s.startswith("//") or s.startswith("#"):
+        return None
+
+    first = s.split()[0]
+
+    if first.startswith("@"):
+        return None
+
+    low = first.lower()
+
+    # Skip branch currents like i(R1) and terminal currents like i1(...)
+    if low.startswith("i(") or _INUM_TOKEN.match(first):
+        return None
+
+    # v(<node>)=value or v(<node>) value
+    m = _VTOKEN_OPTION_B.match(s)
+    if m:
+        return m.group(1)
+
+    # Plain node=value
+    if "=" in first:
+        return first.split("=", 1)[0]
+
+    return first
+
+def split_instance_segments_option_b(node: str, limit: Optional[int] = None) -> List[str]:
+    """
+    Extract instance segments from a node name (Option B).
+
+    Rules:
+      - Split node on '.' into segments.
+      - If there is only one segment, return [] (no hierarchy).
+      - All segments except the last are treated as instance names.
+      - For each segment, strip any suffix after ':' (e.g. 'M3:d' -> 'M3').
+      - Empty segments after stripping are ignored.
+      - With limit, at most that many instances are returned.
+
+    Examples:
+      'top.u1.u2.net123'      -> ['top', 'u1', 'u2']
+      'soc.chip.xpll.vctrl'   -> ['soc', 'chip', 'xpll']
+      'net123'                -> []
+      'xtop.xa2.M3:d'         -> ['xtop', 'xa2', 'M3']
+    """
+    parts = node.split(".")
+    if len(parts) <= 1:
+        return []
+
+    insts: List[str] = []
+    # All but the last segment are considered instances
+    for seg in parts[:-1]:
+        core = seg.split(":", 1)[0]
+        if core:
+            insts.append(core)
+            if len(insts) == limit:
+                break
+    return insts
+
 # ---------- Aggregation ----------
 
+def iter_nodes(lines: Iterable[str],
+               keep: Callable[[str], bool],
+               parse_node: Callable[[str], Optional[str]] = parse_node_from_ic_line
+               ) -> Iterator[str]:
+    """Parse node names from spectre.ic lines and apply filter, lazily."""
+    for ln in lines:
+        node = parse_node(ln)
+        if node and keep(node):
+            yield node
+
 def collect_nodes(lines: Iterable[str],
                   keep: Callable[[str], bool]) -> List[str]:
     """Parse all node names from spectre.ic lines and apply filter."""
-    nodes: List[str] = []
-    for ln in lines:
-        node = parse_node_from_ic_line(ln)
-        if node and keep(node):
-            nodes.append(node)
-    return nodes
+    return list(iter_nodes(lines, keep))
 
-def aggregate_by_level(nodes: Sequence[str], max_levels: int) -> Tuple[int, List[Counter[str]]]:
+class PrefixTrie:
+    """
+    Node counts per instance prefix, kept as a trie of interned segments.
+
+    Trie node i holds the count of nodes under one instance prefix; its
+    children are keyed by the next segment. Memory grows with the number of
+    distinct prefixes, not with the number of nodes, and prefix strings are
+    only built once per trie node by level_counters().
+    """
+
+    def __init__(self) -> None:
+        self.children: List[dict] = [{}]   # trie node -> {segment: child}
+        self.counts: List[int] = [0]
+        self.parent: List[int] = [-1]
+        self.segment: List[str] = [""]
+
+    def add(self, insts: Sequence[str]) -> None:
+        """Count one node under each prefix of insts."""
+        children = self.children
+        counts = self.counts
+        cur = 0
+        for seg in insts:
+            kids = children[cur]
+            nxt = kids.get(seg)
+            if nxt is None:
+                nxt = len(counts)
+                seg = sys.intern(seg)
+                kids[seg] = nxt
+                children.append({})
+                counts.append(0)
+                self.parent.append(cur)
+                self.segment.append(seg)
+            counts[nxt] += 1
+            cur = nxt
+
+    def level_counters(self, max_levels: int) -> List[Counter]:
+        """Counter of '.'-joined prefix -> count for each level."""
+        levels: List[Counter] = [Counter() for _ in range(max_levels)]
+        names = [""] * len(self.counts)
+        frontier = [0]
+        for lvl in range(max_levels):
+            bucket = levels[lvl]
+            nxt_frontier: List[int] = []
+            for cur in frontier:
+                base = names[cur]
+                for seg, child in self.children[cur].items():
+                    name = base + "." + seg if lvl else seg
+                    names[child] = name
+                    bucket[name] = self.counts[child]
+                    nxt_frontier.append(child)
+            frontier = nxt_frontier
+        return levels
+
+def aggregate_stream(nodes: Iterable[str], max_levels: int,
+                     split_segments: Callable[..., List[str]] = split_instance_segments
+                     ) -> Tuple[int, List[Counter]]:
+    """
+    Single pass over nodes (any iterable, e.g. iter_nodes()); counts go into
+    a PrefixTrie. Returns (total_nodes, [Counter per level]) like
+    aggregate_by_level().
+    """
+    trie = PrefixTrie()
+    add = trie.add
+    total = 0
+    for node in nodes:
+        total += 1
+        insts = split_segments(node, max_levels)
+        if insts:
+            add(insts)
+    if total == 0:
+        return 0, []
+    return total, trie.level_counters(max_levels)
+
+def aggregate_by_level(nodes: Sequence[str], max_levels: int) -> Tuple[int, List[Counter]]:
     """
     For each node, compute its instance prefixes once,
     then aggregate counts per level (level 0=top instance, etc.).
     Returns (total_nodes, [Counter per level]).
     """
-    total = len(nodes)
-    if total == 0:
-        return 0, []
+    return aggregate_stream(nodes, max_levels)
 
-    level_counters: List[Counter[str]] = [Counter() for _ in range(max_levels)]
+class SpaceSaving:
+    """
+    Approximate heavy hitters of a stream with at most `capacity` counters
+    (Metwally et al., "space-saving").
+
+    When a new key arrives and all counters are taken, the key with the
+    smallest count m is evicted and the new key takes over its counter as
+    m + 1, remembering m as its error. For a stream of n items:
+      - a reported count c with error e means the true count is in [c - e, c]
+      - e <= n / capacity for every key, and every key whose true count
+        exceeds n / capacity is among the counters.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        if capacity < 1:
+            raise ValueError("capacity must be >= 1")
+        self.capacity = capacity
+        self.n = 0
+        self.counts: dict = {}
+        self.errors: dict = {}
+        # one (count, key) entry per key; a count may be stale (too low)
+        self._heap: List[Tuple[int, str]] = []
+
+    def add(self, key: str) -> None:
+        self.n += 1
+        counts = self.counts
+        if key in counts:
+            counts[key] += 1
+            return
+        if len(counts) < self.capacity:
+            counts[key] = 1
+            self.errors[key] = 0
+            heapq.heappush(self._heap, (1, key))
+            return
+
+        heap = self._heap
+        while True:
+            cnt, old = heap[0]
+            cur = counts[old]
+            if cur == cnt:
+                break
+            heapq.heapreplace(heap, (cur, old))
+        del counts[old]
+        del self.errors[old]
+        counts[key] = cnt + 1
+        self.errors[key] = cnt
+        heapq.heapreplace(heap, (cnt + 1, key))
+
+    def max_error(self, keys: Iterable[str]) -> int:
+        return max((self.errors[k] for k in keys), default=0)
+
+def aggregate_approx(nodes: Iterable[str], max_levels: int, capacity: int,
+                     split_segments: Callable[..., List[str]] = split_instance_segments
+                     ) -> Tuple[int, List[SpaceSaving]]:
+    """
+    Like aggregate_stream(), but each level keeps only `capacity` counters
+    (see SpaceSaving for the error bound). Memory is O(max_levels * capacity)
+    whatever the number of distinct instances.
+    """
+    levels = [SpaceSaving(capacity) for _ in range(max_levels)]
+    total = 0
     for node in nodes:
-        insts = split_instance_segments(node)
-        if not insts:
-            continue
-        prefs = instance_prefixes(insts, max_levels)
-        for lvl, pref in enumerate(prefs):
-            level_counters[lvl][pref] += 1
-    return total, level_counters
+        total += 1
+        pref = ""
+        for lvl, seg in enumerate(split_segments(node, max_levels)):
+            pref = pref + "." + seg if lvl else seg
+            levels[lvl].add(pref)
+    if total == 0:
+        return 0, []
+    return total, levels
 
 # ---------- Rendering ----------
 
@@ -157,13 +433,14 @@ def bar(count: int, total: int) -> str:
     return "#" * round((count / total) * 10)
 
 def render_level(level_idx: int,
-                 bucket: Counter[str],
+                 bucket: Counter,
                  total: int,
-                 top_n: int) -> str:
+                 top_n: int,
+                 note: str = "") -> str:
     if not bucket:
         return ""
     lines: List[str] = []
-    lines.append(f"level {level_idx}:")
+    lines.append(f"level {level_idx}:{note}")
     width = max(len(k) for k in bucket.keys())
     items = sorted(bucket.items(), key=lambda x: (-x[1], x[0]))
     if top_n > 0:
@@ -173,19 +450,233 @@ def render_level(level_idx: int,
     lines.append("")  # blank line after each level
     return "\n".join(lines)
 
+def bar_option_b(count: int, total: int) -> str:
+    """ASCII bar: each '#' is ~10% of total nodes (rounded)."""
+    if total <= 0:
+        return ""
+    width = int(round((float(count) / float(total)) * 10.0))
+    if count > 0:
+        return "#" * max(width, 1)
+    return ""
+
+def render_level_option_b(level_idx: int,
+                          bucket: Counter,
+                          total: int,
+                          top_n: int,
+                          note: str = "") -> str:
+    """Render one hierarchy level to a human-readable text block."""
+    if not bucket:
+        return ""
+
+    items = list(bucket.items())
+    items.sort(key=lambda kv: (-kv[1], kv[0]))  # by count desc, then name
+    if top_n > 0:
+        items = items[:top_n]
+
+    max_name = 0
+    for name, _cnt in items:
+        if len(name) > max_name:
+            max_name = len(name)
+
+    lines: List[str] = []
+    lines.append("Level {}:{}".format(level_idx, note))
+    for name, cnt in items:
+        lines.append(
+            "  {} : {:6d}  {}".format(name.ljust(max_name), cnt, bar_option_b(cnt, total))
+        )
+    lines.append("")  # trailing blank line per level
+    return "\n".join(lines)
+
 def render_report(total: int,
-                  level_counters: List[Counter[str]],
+                  level_counters: List[Counter],
                   top_n: int,
-                  max_print_levels: int) -> str:
+                  max_print_levels: int,
+                  render: Callable[..., str] = render_level) -> str:
     out: List[str] = [f"Total nodes: {total}", ""]
     for lvl, counter in enumerate(level_counters[:max_print_levels]):
-        section = render_level(lvl, counter, total, top_n)
+        section = render(lvl, counter, total, top_n)
         if section:
             out.append(section)
     return "\n".join(out).rstrip()  # tidy trailing newline
 
+def render_approx_report(total: int,
+                         summaries: List[SpaceSaving],
+                         top_n: int,
+                         max_print_levels: int,
+                         render: Callable[..., str] = render_level) -> str:
+    """
+    Same layout as render_report() for aggregate_approx() results. Each level
+    header carries the largest over-count among the entries shown.
+    """
+    capacity = summaries[0].capacity if summaries else 0
+    out: List[str] = [f"Total nodes: {total}",
+                      f"Approximate counts ({capacity} counters per level): "
+                      "a count may exceed the true count by the error shown", ""]
+    for lvl, summary in enumerate(summaries[:max_print_levels]):
+        bucket = Counter(summary.counts)
+        if top_n > 0:
+            bucket = Counter(dict(sorted(bucket.items(), key=lambda x: (-x[1], x[0]))[:top_n]))
+        note = f"  (error <= {summary.max_error(bucket)})"
+        section = render(lvl, bucket, total, top_n, note)
+        if section:
+            out.append(section)
+    return "\n".join(out).rstrip()
+
+# ---------- Dialects ----------
+
+class Dialect:
+    """How one entry point reads nodes, finds instances and renders a level."""
+
+    def __init__(self,
+                 name: str,
+                 parse_node: Callable[[str], Optional[str]],
+                 split_segments: Callable[..., List[str]],
+                 render_level: Callable[..., str],
+                 fold_globals: bool) -> None:
+        self.name = name
+        self.parse_node = parse_node
+        self.split_segments = split_segments
+        self.render_level = render_level
+        self.fold_globals = fold_globals
+
+X_PREFIX = Dialect("x-prefix", parse_node_from_ic_line, split_instance_segments,
+                   render_level, fold_globals=False)
+OPTION_B = Dialect("option-b", parse_node_option_b, split_instance_segments_option_b,
+                   render_level_option_b, fold_globals=True)
+
+DIALECTS = {d.name: d for d in (X_PREFIX, OPTION_B)}
+
+# ---------- Chunked scanning ----------
+
+READ_BLOCK = 1 << 20      # bytes read at a time from a range
+RANGES_PER_JOB = 4        # ranges per worker, for load balance
+
+def split_byte_ranges(path: str, parts: int) -> List[Tuple[int, int]]:
+    """
+    Cut the file into up to `parts` byte ranges [start, end) that each begin
+    at the start of a line.
+    """
+    size = os.path.getsize(path)
+    bounds = [0]
+    with open(path, "rb") as f:
+        for i in range(1, parts):
+            target = size * i // parts
+            if target <= bounds[-1]:
+                continue
+            f.seek(target - 1)
+            f.readline()              # finish the line that covers target
+            pos = f.tell()
+            if pos >= size:
+                break
+            if pos > bounds[-1]:
+                bounds.append(pos)
+    bounds.append(size)
+    return [(bounds[i], bounds[i + 1]) for i in range(len(bounds) - 1)
+            if bounds[i] < bounds[i + 1]]
+
+def iter_range_lines(path: str, start: int, end: int) -> Iterator[str]:
+    """
+    Lines of bytes [start, end) of a file, decoded and split exactly as
+    Path.read_text(errors="ignore").splitlines() splits the whole file.
+    Blocks are cut after a newline, so no character or line spans two.
+    """
+    with open(path, "rb") as f:
+        f.seek(start)
+        left = end - start
+        tail = b""
+        while left > 0:
+            block = f.read(min(READ_BLOCK, left))
+            if not block:
+                break
+            left -= len(block)
+            block = tail + block
+            cut = block.rfind(b"\n") + 1
+            if cut == 0 and left > 0:
+                tail = block
+                continue
+            if left <= 0:
+                cut = len(block)
+            tail = block[cut:]
+            yield from block[:cut].decode("utf-8", "ignore").splitlines()
+        if tail:
+            yield from tail.decode("utf-8", "ignore").splitlines()
+
+def count_range(job: Tuple) -> Tuple[int, List[Counter]]:
+    """
+    Worker: exact per-level counts for one byte range.
+    job = (path, start, end, dialect name, make_node_filter args, max_levels)
+    """
+    path, start, end, dialect_name, filter_args, max_levels = job
+    dialect = DIALECTS[dialect_name]
+    keep = make_node_filter(*filter_args, fold_globals=dialect.fold_globals)
+    nodes = iter_nodes(iter_range_lines(path, start, end), keep, dialect.parse_node)
+    total, counters = aggregate_stream(nodes, max_levels, dialect.split_segments)
+    return total, counters or [Counter() for _ in range(max_levels)]
+
+def scan_ic(path: str, dialect: Dialect, filter_args: Tuple, max_levels: int,
+            jobs: int = 1) -> Tuple[int, List[Counter]]:
+    """
+    Exact (total_nodes, [Counter per level]) for a spectre.ic file, scanning
+    newline-aligned byte ranges in `jobs` processes and summing the results.
+    """
+    parts = 1 if jobs <= 1 else jobs * RANGES_PER_JOB
+    work = [(path, start, end, dialect.name, filter_args, max_levels)
+            for start, end in split_byte_ranges(path, parts)]
+
+    if jobs <= 1 or len(work) <= 1:
+        results = map(count_range, work)
+        return merge_counts(results, max_levels)
+
+    with multiprocessing.Pool(min(jobs, len(work))) as pool:
+        return merge_counts(pool.imap_unordered(count_range, work), max_levels)
+
+def merge_counts(results: Iterable[Tuple[int, List[Counter]]],
+                 max_levels: int) -> Tuple[int, List[Counter]]:
+    total = 0
+    levels = [Counter() for _ in range(max_levels)]
+    for part_total, part_levels in results:
+        total += part_total
+        for merged, part in zip(levels, part_levels):
+            merged.update(part)
+    if total == 0:
+        return 0, []
+    return total, levels
+
 # ---------- Orchestration ----------
 
+def run_report(args: argparse.Namespace, max_levels: int, dialect: Dialect) -> None:
+    """Count and print the report for parsed command-line args."""
+    filter_args = (args.skip_globals, args.extra_globals,
+                   args.regex_exclude, args.case_insensitive)
+
+    if args.approx:
+        keep = make_node_filter(*filter_args, fold_globals=dialect.fold_globals)
+        nodes = iter_nodes(load_lines(args.ic), keep, dialect.parse_node)
+        total, summaries = aggregate_approx(nodes, max_levels, args.approx,
+                                            dialect.split_segments)
+        if total == 0:
+            print("No nodes found after filtering.")
+            return
+        print(render_approx_report(total, summaries, args.top, max_levels,
+                                   dialect.render_level))
+        return
+
+    if args.ic == "-":
+        keep = make_node_filter(*filter_args, fold_globals=dialect.fold_globals)
+        nodes = iter_nodes(sys.stdin, keep, dialect.parse_node)
+        total, level_counters = aggregate_stream(nodes, max_levels,
+                                                 dialect.split_segments)
+    else:
+        total, level_counters = scan_ic(args.ic, dialect, filter_args,
+                                        max_levels, args.jobs)
+    if total == 0:
+        print("No nodes found after filtering.")
+        return
+
+    report = render_report(total, level_counters, args.top, max_levels,
+                           dialect.render_level)
+    print(report)
+
 def main(argv: Optional[Sequence[str]] = None) -> None:
     args = parse_args(argv)
 
@@ -193,22 +684,15 @@ def main(argv: Optional[Sequence[str]] = None) -> None:
     if max_levels <= 0:
         print("Nothing to do: --levels/--depth must be >= 1", file=sys.stderr)
         sys.exit(2)
+    if args.approx < 0 or args.jobs < 1:
+        print("--approx must be >= 0 and --jobs >= 1", file=sys.stderr)
+        sys.exit(2)
+    if args.approx and args.jobs > 1:
+        print("--approx counts in one process; it cannot be combined with --jobs",
+              file=sys.stderr)
+        sys.exit(2)
 
-    keep = make_node_filter(
-        skip_globals=args.skip_globals,
-        extra_globals_csv=args.extra_globals,
-        regex_exclude=args.regex_exclude,
-        case_insensitive=args.case_insensitive,
-    )
-
-    nodes = collect_nodes(load_lines(args.ic), keep)
-    total, level_counters = aggregate_by_level(nodes, max_levels)
-    if total == 0:
-        print("No nodes found after filtering.")
-        return
-
-    report = render_report(total, level_counters, args.top, max_levels)
-    print(report)
+    run_report(args, max_levels, X_PREFIX)
 
 if __name__ == "__main__":
     main()
@@ -12,20 +12,30 @@ This version implements **Option B** hierarchy detection:
     - Any trailing `:something` in a segment (e.g. "M3:d") is stripped.
     - No requirement that instance names start with "x" / "X".
 
+Parsing, counting and rendering are shared with node_counter.py (the OPTION_B
+dialect there); this file keeps the 3.6 command line and function names.
+
 Python compatibility: 3.6+
 """
 import argparse
-import re
 import sys
 from collections import Counter
-from pathlib import Path
-from typing import Callable, Iterable, List, Optional, Sequence, Tuple, Set
-
-
-# Nets that are often global supply / ground nodes and not useful for culprits.
-DEFAULT_GLOBALS = set([
-    "0", "gnd!", "vss!", "vdd!", "avss!", "agnd!", "dgnd!", "dvss!", "dvdd!"
-])
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple
+
+import node_counter
+from node_counter import (  # noqa: F401  (re-exported)
+    DEFAULT_GLOBALS,
+    OPTION_B,
+    add_scan_args,
+    aggregate_stream,
+    instance_prefixes,
+    load_lines,
+    run_report,
+)
+from node_counter import bar_option_b as bar
+from node_counter import parse_node_option_b as parse_node_from_ic_line
+from node_counter import render_level_option_b as render_level
+from node_counter import split_instance_segments_option_b as split_instance_segments
 
 
 # ---------------------------------------------------------------------------
@@ -85,21 +95,14 @@ def parse_args(argv=None):
         action="store_true",
         help="Case-insensitive matching for globals and regex-exclude.",
     )
+    add_scan_args(p)
     return p.parse_args(argv)
 
 
 # ---------------------------------------------------------------------------
-# Input + filtering
+# Compatibility wrappers around the shared engine
 # ---------------------------------------------------------------------------
 
-def load_lines(path):
-    # type: (str) -> Iterable[str]
-    """Yield all lines from a file or stdin."""
-    if path == "-":
-        return sys.stdin
-    return Path(path).read_text(encoding="utf-8", errors="ignore").splitlines()
-
-
 def make_node_filter(skip_globals, extra_globals_csv, regex_exclude, case_insensitive):
     # type: (bool, str, Optional[str], bool) -> Callable[[str], bool]
     """
@@ -110,157 +113,15 @@ def make_node_filter(skip_globals, extra_globals_csv, regex_exclude, case_insens
     - If regex_exclude is provided, drop any node matching that regex.
     - If case_insensitive is True, matching is done in lower-case / with re.I.
     """
-    globals_set = set()  # type: Set[str]
-    if skip_globals:
-        globals_set.update(DEFAULT_GLOBALS)
-
-    if extra_globals_csv:
-        for raw in extra_globals_csv.split(","):
-            name = raw.strip()
-            if name:
-                globals_set.add(name)
-
-    if case_insensitive:
-        globals_set = set([g.lower() for g in globals_set])
-
-    regex = None
-    if regex_exclude:
-        flags = re.IGNORECASE if case_insensitive else 0
-        regex = re.compile(regex_exclude, flags)
-
-    def keep(node):
-        # type: (str) -> bool
-        chk = node.lower() if case_insensitive else node
-
-        if globals_set and chk in globals_set:
-            return False
-
-        if regex and regex.search(node):
-            return False
-
-        return True
-
-    return keep
-
-
-# Precompiled regex for v(<node>) syntax.
-# Precompiled regexes
-_VTOKEN = re.compile(r"^v\((.+?)\)(?:\s*=\s*|\s+|$)", re.IGNORECASE)
-_INUM_TOKEN = re.compile(r"^i\d+\(", re.IGNORECASE)
-
-
-def parse_node_from_ic_line(line):
-    # type: (str) -> Optional[str]
-    """
-    Extract node name from a spectre.ic line.
-
-    Handles:
-      v(<node>)=1.1
-      v(<node>) 1.1
-      <node> 1.1
-      <node>=1.1
-
-    Skips:
-      @...
-      i(...)
-      iNUMBER(...)
-    """
-    s = line.strip()
-    if not s:
-        return None
-
-    if s.startswith("*") or s.startswith("//") or s.startswith("#"):
-        return None
-
-    first = s.split()[0]
-
-    if first.startswith("@"):
-        return None
-
-    low = first.lower()
-
-    # Skip branch currents like i(R1) and terminal currents like i1(...)
-    if low.startswith("i(") or _INUM_TOKEN.match(first):
-        return None
-
-    # v(<node>)=value or v(<node>) value
-    m = _VTOKEN.match(s)
-    if m:
-        return m.group(1)
-
-    # Plain node=value
-    if "=" in first:
-        return first.split("=", 1)[0]
-
-    return first
-
-
-# ---------------------------------------------------------------------------
-# Hierarchy helpers  (Option B implementation)
-# ---------------------------------------------------------------------------
-
-def split_instance_segments(node):
-    # type: (str) -> List[str]
-    """
-    Extract instance segments from a node name (Option B).
-
-    Rules:
-      - Split node on '.' into segments.
-      - If there is only one segment, return [] (no hierarchy).
-      - All segments except the last are treated as instance names.
-      - For each segment, strip any suffix after ':' (e.g. 'M3:d' -> 'M3').
-      - Empty segments after stripping are ignored.
-
-    Examples:
-      'top.u1.u2.net123'      -> ['top', 'u1', 'u2']
-      'soc.chip.xpll.vctrl'   -> ['soc', 'chip', 'xpll']
-      'net123'                -> []
-      'xtop.xa2.M3:d'         -> ['xtop', 'xa2', 'M3']
-    """
-    parts = node.split(".")
-    if len(parts) <= 1:
-        return []
+    return node_counter.make_node_filter(skip_globals, extra_globals_csv,
+                                         regex_exclude, case_insensitive,
+                                         fold_globals=True)
 
-    insts = []  # type: List[str]
-    # All but the last segment are considered instances
-    for seg in parts[:-1]:
-        core = seg.split(":", 1)[0]
-        if core:
-            insts.append(core)
-    return insts
-
-
-def instance_prefixes(insts, max_levels):
-    # type: (Sequence[str], int) -> List[str]
-    """
-    Given a list of instance segments, return cumulative prefixes up to
-    `max_levels` (and at most len(insts)).
-
-    Example:
-        insts      = ['top', 'u1', 'u2']
-        max_levels = 3
-        -> ['top', 'top.u1', 'top.u1.u2']
-    """
-    out = []  # type: List[str]
-    limit = min(max_levels, len(insts))
-    for i in range(1, limit + 1):
-        out.append(".".join(insts[:i]))
-    return out
-
-
-# ---------------------------------------------------------------------------
-# Aggregation
-# ---------------------------------------------------------------------------
 
 def collect_nodes(lines, keep):
     # type: (Iterable[str], Callable[[str], bool]) -> List[str]
     """Parse all node names from spectre.ic lines and apply filter."""
-    nodes = []  # type: List[str]
-    for ln in lines:
-        node = parse_node_from_ic_line(ln)
-        if node and keep(node):
-            nodes.append(node)
-    return nodes
+    return list(node_counter.iter_nodes(lines, keep, parse_node_from_ic_line))
 
 
 def aggregate_by_level(nodes, max_levels):
@@ -271,70 +132,16 @@ def aggregate_by_level(nodes, max_levels):
 
     Returns (total_nodes, [Counter_for_level0, Counter_for_level1, ...]).
     """
-    total = len(nodes)
-    level_counters = [Counter() for _ in range(max_levels)]  # type: List[Counter]
-
-    for node in nodes:
-        insts = split_instance_segments(node)
-        if not insts:
-            continue
-        prefixes = instance_prefixes(insts, max_levels)
-        for lvl, pref in enumerate(prefixes):
-            level_counters[lvl][pref] += 1
-
-    return total, level_counters
-
-
-# ---------------------------------------------------------------------------
-# Rendering
-# ---------------------------------------------------------------------------
-
-def bar(count, total):
-    # type: (int, int) -> str
-    """ASCII bar: each '#' is ~10% of total nodes (rounded)."""
-    if total <= 0:
-        return ""
-    width = int(round((float(count) / float(total)) * 10.0))
-    if count > 0:
-        return "#" * max(width, 1)
-    return ""
-
-
-def render_level(level_idx, bucket, total, top_n):
-    # type: (int, Counter, int, int) -> str
-    """Render one hierarchy level to a human-readable text block."""
-    if not bucket:
-        return ""
-
-    items = list(bucket.items())
-    items.sort(key=lambda kv: (-kv[1], kv[0]))  # by count desc, then name
-    if top_n > 0:
-        items = items[:top_n]
-
-    max_name = 0
-    for name, _cnt in items:
-        if len(name) > max_name:
-            max_name = len(name)
-
-    lines = []  # type: List[str]
-    lines.append("Level {}:".format(level_idx))
-    for name, cnt in items:
-        lines.append(
-            "  {} : {:6d}  {}".format(name.ljust(max_name), cnt, bar(cnt, total))
-        )
-    lines.append("")  # trailing blank line per level
-    return "\n".join(lines)
+    total, level_counters = aggregate_stream(nodes, max_levels,
+                                             split_instance_segments)
+    return total, level_counters or [Counter() for _ in range(max_levels)]
 
 
 def render_report(total, level_counters, top_n, max_print_levels):
     # type: (int, Sequence[Counter], int, int) -> str
     """Assemble the full multi-level text report."""
-    out = ["Total nodes: {}".format(total), ""]  # type: List[str]
-    for lvl, counter in enumerate(level_counters[:max_print_levels]):
-        section = render_level(lvl, counter, total, top_n)
-        if section:
-            out.append(section)
-    return "\n".join(out).rstrip()
+    return node_counter.render_report(total, list(level_counters), top_n,
+                                      max_print_levels, render_level)
 
 
 # ---------------------------------------------------------------------------
@@ -349,24 +156,15 @@ def main(argv=None):
     if max_levels <= 0:
         print("ERROR: --depth/--levels must be positive.", file=sys.stderr)
         sys.exit(1)
+    if args.approx < 0 or args.jobs < 1:
+        print("ERROR: --approx must be >= 0 and --jobs >= 1.", file=sys.stderr)
+        sys.exit(1)
+    if args.approx and args.jobs > 1:
+        print("ERROR: --approx counts in one process; it cannot be combined "
+              "with --jobs.", file=sys.stderr)
+        sys.exit(1)
 
-    keep = make_node_filter(
-        skip_globals=args.skip_globals,
-        extra_globals_csv=args.extra_globals,
-        regex_exclude=args.regex_exclude,
-        case_insensitive=args.case_insensitive,
-    )
-
-    lines = load_lines(args.ic)
-    nodes = collect_nodes(lines, keep)
-    total, level_counters = aggregate_by_level(nodes, max_levels)
-
-    if total == 0:
-        print("No nodes found after filtering.")
-        return
-
-    report = render_report(total, level_counters, args.top, max_levels)
-    print(report)
+    run_report(args, max_levels, OPTION_B)
 
 
 if __name__ == "__main__":
@@ -1,115 +1,28 @@
 #!/usr/bin/env python3
-import re
 import sys
 import argparse
 from collections import Counter, defaultdict
+from operator import itemgetter
 
 import pdb
 
-SUBCKT_RE = re.compile(r'^\s*\.subckt\s+(\S+)\b', re.IGNORECASE)
-ENDS_RE   = re.compile(r'^\s*\.ends\b', re.IGNORECASE)
-XLINE_RE  = re.compile(r'^\s*x', re.IGNORECASE)
+from hier_walk import HierWalk
+from spice_netlist import TOP_LEVEL, TrigramIndex, load_hierarchy
 
 
-def strip_comment(line: str) -> str:
-    s = line.rstrip("\n")
+def parse_netlist(path, use_cache=True):
+    index = load_hierarchy(path, use_cache=use_cache)
+    names = index.names
 
-    if re.match(r'^\s*\*', s):
-        return ""
-
-    s = re.sub(r'//.*$', '', s)
-    return s.rstrip()
-
-
-def logical_lines(lines):
-    buf = ""
-    for raw in lines:
-        line = strip_comment(raw)
-        if not line.strip():
-            continue
-
-        if re.match(r'^\s*\+', line):
-            cont = re.sub(r'^\s*\+\s*', '', line)
-            if buf:
-                buf += " " + cont
-            else:
-                buf = cont
-        else:
-            if buf:
-                yield buf
-            buf = line.strip()
-
-    if buf:
-        yield buf
-
-
-def extract_instantiated_cell(tokens):
-    """
-    Return the instantiated subckt name from an X-instance line.
-
-    Strategy:
-    - token[0] is the instance name
-    - scan from the right
-    - skip trailing tokens that are clearly metadata / params / options
-    - first remaining token is the instantiated subckt name
-    """
-    if len(tokens) < 2:
-        return None
-
-    for i in range(len(tokens) - 1, 0, -1):
-        t = tokens[i]
-
-        # SPICE/S-edit style metadata tokens:
-        # $, $m, $x=..., $y=..., etc.
-        if t.startswith("$"):
-            continue
-
-        # ordinary parameter assignments
-        if "=" in t and not t.startswith("="):
-            continue
-
-        # pure punctuation separators, if any
-        if re.fullmatch(r'[^A-Za-z0-9_.<>/\[\]-]+', t):
-            continue
-
-        return t
-
-    return None
-
-
-def parse_netlist(path):
-    defined_subckts = set()
+    defined_subckts = index.defined_subckts()
     raw_children = defaultdict(list)
     top_level_x_instances = []
 
-    current_subckt = None
-
-    with open(path, "r", encoding="utf-8", errors="ignore") as f:
-        for line in logical_lines(f):
-            m = SUBCKT_RE.match(line)
-            if m:
-                current_subckt = m.group(1)
-                defined_subckts.add(current_subckt)
-                continue
-
-            if ENDS_RE.match(line):
-                current_subckt = None
-                continue
-
-            if XLINE_RE.match(line):
-                tokens = line.split()
-                if not tokens:
-                    continue
-
-                inst_name = tokens[0]
-                cell = extract_instantiated_cell(tokens)
-                if not cell:
-                    continue
-
-                if current_subckt is None:
-                    top_level_x_instances.append((inst_name, cell))
-                else:
-                    raw_children[current_subckt].append(cell)
+    for p, i, c in zip(index.edge_parent, index.edge_inst, index.edge_child):
+        if p == TOP_LEVEL:
+            top_level_x_instances.append((names[i], names[c]))
+        else:
+            raw_children[names[p]].append(names[c])
 
     subckt_children = {}
     for parent, kids in raw_children.items():
@@ -133,39 +46,39 @@ def format_label(name, count):
 
 
 def print_tree(subckt_children, top_cell, max_depth=None, out=sys.stdout):
-    visited_stack = set()
-
-    def rec(cell, prefix="", depth=0):
-        if max_depth is not None and depth >= max_depth:
-            return
+    def child_items(cell):
+        items = list(Counter(subckt_children.get(cell, [])).items())
+        last = len(items) - 1
+        return [(child, count, i == last) for i, (child, count) in enumerate(items)]
 
-        if cell in visited_stack:
-            print(prefix + r"\----- " + cell + " [recursive]", file=out)
-            return
+    walk = HierWalk(child_items, itemgetter(0), max_depth=max_depth)
 
-        visited_stack.add(cell)
+    # prefixes[d] is the indentation in front of a line at depth d + 1.
+    prefixes = [""]
 
-        counts = Counter(subckt_children.get(cell, []))
-        items = list(counts.items())
-
-        for i, (child, count) in enumerate(items):
-            is_last = (i == len(items) - 1)
-            branch = r"\----- " if is_last else r"|----- "
-            print(prefix + branch + format_label(child, count), file=out)
-
-            child_prefix = prefix + ("       " if is_last else "|      ")
-            rec(child, child_prefix, depth + 1)
+    print(top_cell, file=out)
+    for child, count, is_last in walk.edges(top_cell):
+        depth = walk.depth
+        prefix = prefixes[depth - 1]
+        branch = r"\----- " if is_last else r"|----- "
+        print(prefix + branch + format_label(child, count), file=out)
 
-        visited_stack.remove(cell)
+        child_prefix = prefix + ("       " if is_last else "|      ")
+        del prefixes[depth:]
+        prefixes.append(child_prefix)
 
-    print(top_cell, file=out)
-    rec(top_cell, depth=0)
+        if walk.is_active(child) and (max_depth is None or depth < max_depth):
+            print(child_prefix + r"\----- " + child + " [recursive]", file=out)
 
 
 def choose_top(subckt_children, defined_subckts, top_level_x_instances, explicit_top=None):
     if explicit_top:
         if explicit_top not in defined_subckts:
-            raise ValueError(f'top cell "{explicit_top}" is not defined in the netlist')
+            msg = f'top cell "{explicit_top}" is not defined in the netlist'
+            close = TrigramIndex(sorted(defined_subckts)).closest(explicit_top, limit=3)
+            if close:
+                msg += "\nClosest defined subckt(s):\n" + "\n".join(f"  {x}" for x in close)
+            raise ValueError(msg)
         return explicit_top
 
     valid_top_level = [(iname, cell) for (iname, cell) in top_level_x_instances if cell in defined_subckts]
@@ -209,9 +122,16 @@ def main():
         default=None,
         help="Maximum depth below the top to print (0=top only, 1=top plus children)"
     )
+    ap.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always re-parse the netlist; do not read or write its cached index (~/.cache/spice_netlist)"
+    )
     args = ap.parse_args()
 #    pdb.set_trace()
-    subckt_children, defined_subckts, top_level_x_instances = parse_netlist(args.netlist)
+    subckt_children, defined_subckts, top_level_x_instances = parse_netlist(
+        args.netlist, use_cache=not args.no_cache
+    )
 
     try:
         top_cell = choose_top(subckt_children, defined_subckts, top_level_x_instances, args.top)
@@ -1,83 +1,17 @@
 #!/usr/bin/env python3
-import re
+import csv
 import sys
+import json
 import argparse
-from collections import defaultdict
-from difflib import SequenceMatcher
+from collections import Counter
+from itertools import islice
 
-
-SUBCKT_RE = re.compile(r'^\s*\.subckt\s+(\S+)\b', re.IGNORECASE)
-ENDS_RE   = re.compile(r'^\s*\.ends\b', re.IGNORECASE)
-XLINE_RE  = re.compile(r'^\s*x', re.IGNORECASE)
-
-
-def strip_comment(line: str) -> str:
-    s = line.rstrip("\n")
-
-    if re.match(r'^\s*\*', s):
-        return ""
-
-    s = re.sub(r'//.*$', '', s)
-    return s.rstrip()
-
-
-def logical_lines(lines):
-    """
-    Join continuation lines starting with '+'.
-    """
-    buf = ""
-    for raw in lines:
-        line = strip_comment(raw)
-        if not line.strip():
-            continue
-
-        if re.match(r'^\s*\+', line):
-            cont = re.sub(r'^\s*\+\s*', '', line)
-            if buf:
-                buf += " " + cont
-            else:
-                buf = cont
-        else:
-            if buf:
-                yield buf
-            buf = line.strip()
-
-    if buf:
-        yield buf
-
-
-def extract_instantiated_cell(tokens):
-    """
-    Return the instantiated subckt name from an X-instance line.
-
-    Strategy:
-    - tokens[0] is the instance name
-    - scan from the right
-    - skip trailing metadata / params / options
-    - first remaining token is the instantiated subckt name
-    """
-    if len(tokens) < 2:
-        return None
-
-    for i in range(len(tokens) - 1, 0, -1):
-        t = tokens[i]
-
-        if t.startswith("$"):
-            continue
-
-        if "=" in t and not t.startswith("="):
-            continue
-
-        if re.fullmatch(r'[^A-Za-z0-9_.<>/\[\]-]+', t):
-            continue
-
-        return t
-
-    return None
+from hier_walk import HierWalk, fold_postorder
+from spice_netlist import TOP_LEVEL, TrigramIndex, load_hierarchy
 
 
 def maybe_drop_x(name, dropx):
-    if dropx and re.match(r'^[Xx]', name):
+    if dropx and name[:1] in ("X", "x"):
         return name[1:]
     return name
 
@@ -99,52 +33,40 @@ def instname_matches(inst_name, target_instname, dropx=False):
     return False
 
 
-
-
-def collect_instance_names(all_edges):
+def collect_instance_names(store):
     """
     Return all parsed X-instance names from the netlist.
 
     This intentionally ignores scope. It is used only for diagnostics when
     --instname produces no exact path matches.
     """
-    return dedupe_preserve_order(edge["inst_name"] for edge in all_edges)
+    names = store.names
+    return [names[i] for i in dict.fromkeys(store.edge_inst)]
 
 
-def closest_instance_names(target_instname, all_edges, dropx=False, limit=3):
+def closest_instance_names(target_instname, store, dropx=False, limit=3):
     """
     Return up to `limit` closest raw instance names for diagnostics.
 
     With --dropx, compare using the post-drop form, but print the raw name so
     the user can grep for the real netlist instance.
     """
-    candidates = collect_instance_names(all_edges)
-    if not candidates:
-        return []
-
-    # Rank all candidates instead of relying only on get_close_matches so we
-    # always get the best available suggestions, even for short instance names.
+    # TrigramIndex.closest() ranks by SequenceMatcher ratio: every name in a
+    # small design, a trigram shortlist of the nearest names in a large one.
     target_cmp = maybe_drop_x(target_instname, True) if dropx else target_instname
-    ranked = []
-
-    for cand in candidates:
-        cand_cmp = maybe_drop_x(cand, True) if dropx else cand
-        ratio = SequenceMatcher(None, target_cmp, cand_cmp).ratio()
-        ranked.append((ratio, cand))
+    return store.instance_name_index(dropx).closest(target_cmp, limit=limit)
 
-    ranked.sort(key=lambda item: (-item[0], item[1]))
-    return [cand for _ratio, cand in ranked[:limit]]
 
-def collect_top_level_instance_names(top_level_by_cell):
+def collect_top_level_instance_names(store):
     """
     Return top-level X-instance names that instantiate defined .subckt cells.
 
     These are the names accepted by --topinst for hierarchy traversal.
     """
     names = []
-    for edges in top_level_by_cell.values():
-        for edge in edges:
-            names.append(edge["inst_name"])
+    for edges in store.top_level_by_cell.values():
+        for e in edges:
+            names.append(store.inst_name(e))
     return dedupe_preserve_order(names)
 
 
@@ -155,23 +77,16 @@ def closest_names(target_name, candidates, limit=3):
     This diagnostic intentionally does raw string comparison only. It does not
     apply --dropx and does not change exact-match behavior.
     """
-    candidates = dedupe_preserve_order(candidates)
-    ranked = []
-    for cand in candidates:
-        ratio = SequenceMatcher(None, target_name, cand).ratio()
-        ranked.append((ratio, cand))
-
-    ranked.sort(key=lambda item: (-item[0], item[1]))
-    return [cand for _ratio, cand in ranked[:limit]]
+    return TrigramIndex(dedupe_preserve_order(candidates)).closest(target_name, limit=limit)
 
 
-def print_closest_topinst_diagnostic(target_topinst, top_level_by_cell, limit=3):
+def print_closest_topinst_diagnostic(target_topinst, store, limit=3):
     """
     Print closest --topinst suggestions after exact --topinst resolution fails.
     """
     close = closest_names(
         target_topinst,
-        collect_top_level_instance_names(top_level_by_cell),
+        collect_top_level_instance_names(store),
         limit=limit,
     )
     if close:
@@ -190,87 +105,178 @@ def dedupe_preserve_order(items):
     return out
 
 
-def parse_netlist(path):
+class EdgeStore(object):
     """
-    Parse the netlist into instance edges.
+    Instance edges held as interned ids in parallel integer arrays.
 
-    Each edge is:
-      {
-        "parent_cell": <enclosing subckt name or None for top-level>,
-        "inst_name":   <instance name>,
-        "child_cell":  <instantiated cell name>
-      }
+    This is a thin view over spice_netlist.HierarchyIndex:
 
-    Returns:
-      defined_subckts
-      all_edges
-      children_by_parent   : parent_cell -> [edge, ...]
-                             Includes primitive/non-subckt X-lines as leaves.
-      parents_by_child     : child_cell  -> [edge, ...]
-                             Only includes edges whose child_cell is a defined .subckt.
-      top_level_by_cell    : child_cell  -> [edge, ...]   (subset where parent_cell is None)
-                             Only includes edges whose child_cell is a defined .subckt.
-    """
-    defined_subckts = set()
-    raw_edges = []
+      names                       interned cell and instance names
+      edge_parent[e]              enclosing subckt id, TOP_LEVEL outside any .subckt
+      edge_inst[e]                instance name id
+      edge_child[e]               instantiated cell id
+      is_subckt[id]               1 if names[id] is a defined .subckt
 
-    current_subckt = None
+    Adjacency is CSR over name ids:
 
-    with open(path, "r", encoding="utf-8", errors="ignore") as f:
-        for line in logical_lines(f):
-            m = SUBCKT_RE.match(line)
-            if m:
-                current_subckt = m.group(1)
-                defined_subckts.add(current_subckt)
-                continue
+      children(cell_id)           edges inside that subckt, in file order.
+                                  Includes primitive/non-subckt X-lines as leaves.
+      parents(cell_id)            edges instantiating that cell.
+                                  Only kept for defined .subckt children.
+      top_level_by_cell           cell id -> [edge id, ...] for X-lines outside any
+                                  .subckt whose cell is a defined .subckt.
 
-            if ENDS_RE.match(line):
-                current_subckt = None
-                continue
+    instance_name_index(dropx) is the lazily built suggestion index used by
+    the no-match diagnostics.
 
-            if XLINE_RE.match(line):
-                tokens = line.split()
-                if len(tokens) < 2:
-                    continue
+    distinct_children(dropx) / distinct_parents(dropx) are children / parents
+    without repeated instance lines, for the memoized engine;
+    ambiguous_names(dropx) tells when that engine cannot be used.
+    """
 
-                inst_name = tokens[0]
-                child_cell = extract_instantiated_cell(tokens)
-                if not child_cell:
+    def __init__(self, index):
+        self.index = index
+        self.names = index.names
+        self.edge_parent = index.edge_parent
+        self.edge_inst = index.edge_inst
+        self.edge_child = index.edge_child
+        self.is_subckt = index.subckt_mask()
+        self.children = index.children
+        self.parents = index.parents
+
+        self.top_level_by_cell = {}
+        for e in index.top_level_edges():
+            child = self.edge_child[e]
+            if self.is_subckt[child]:
+                self.top_level_by_cell.setdefault(child, []).append(e)
+
+        self._name_indexes = {}
+        self._distinct_masks = {}
+
+    def name_id(self, name):
+        return self.index.name_id(name)
+
+    def is_defined(self, name):
+        i = self.name_id(name)
+        return i is not None and bool(self.is_subckt[i])
+
+    def inst_name(self, e):
+        return self.names[self.edge_inst[e]]
+
+    def child_name(self, e):
+        return self.names[self.edge_child[e]]
+
+    def top_level_edges(self, cell_name):
+        i = self.name_id(cell_name)
+        if i is None:
+            return []
+        return self.top_level_by_cell.get(i, [])
+
+    def instname_ids(self, target_instname, dropx=False):
+        """
+        Return the set of name ids accepted by instname_matches().
+        """
+        wanted = [target_instname]
+        if dropx:
+            wanted += ["X" + target_instname, "x" + target_instname]
+
+        ids = set()
+        for name in wanted:
+            i = self.name_id(name)
+            if i is not None and instname_matches(name, target_instname, dropx=dropx):
+                ids.add(i)
+        return ids
+
+    def instance_name_index(self, dropx=False):
+        """
+        TrigramIndex over all instance names, compared in post-drop form
+        with dropx. Built once and shared by every diagnostic in a run.
+        """
+        index = self._name_indexes.get(dropx)
+        if index is None:
+            key = (lambda name: maybe_drop_x(name, True)) if dropx else None
+            index = TrigramIndex(collect_instance_names(self), key=key)
+            self._name_indexes[dropx] = index
+        return index
+
+    def _scan_repeats(self, dropx):
+        """
+        Group edges by enclosing cell and reported instance name, i.e. by
+        the path segment they add. Returns (mask, ambiguous): mask is a
+        bytearray over edges that is 0 for every edge after the first of its
+        group (None if no group repeats); ambiguous is True if some group
+        holds edges that differ in raw instance name or cell.
+        """
+        if dropx not in self._distinct_masks:
+            names = self.names
+            shown = {}
+            first = {}
+            mask = bytearray(b"\x01") * len(self.edge_inst)
+            repeated = False
+            ambiguous = False
+            for e, (parent, inst_id, child) in enumerate(
+                zip(self.edge_parent, self.edge_inst, self.edge_child)
+            ):
+                shown_id = inst_id
+                if dropx:
+                    shown_id = shown.setdefault(maybe_drop_x(names[inst_id], True), inst_id)
+                key = (parent, shown_id)
+                seen = first.get(key)
+                if seen is None:
+                    first[key] = (inst_id, child)
                     continue
+                mask[e] = 0
+                repeated = True
+                if seen != (inst_id, child):
+                    ambiguous = True
+            self._distinct_masks[dropx] = (mask if repeated else None), ambiguous
+        return self._distinct_masks[dropx]
+
+    def distinct_edge_mask(self, dropx=False):
+        """
+        Return a bytearray over edges that is 0 for an edge repeating an
+        earlier one's enclosing cell and reported instance name (such as a
+        duplicated instance line), 1 otherwise; None if nothing repeats.
+
+        Unless ambiguous_names(dropx), a repeated edge is the same instance
+        line as the first one and reports exactly its paths, which the
+        listing drops as duplicates, so counts and pages skip it too.
+        """
+        return self._scan_repeats(dropx)[0]
+
+    def ambiguous_names(self, dropx=False):
+        """
+        True if some cell has two instances with the same reported name but
+        different cells (invalid SPICE) or raw names (XI3/xI3 with --dropx).
+        Paths then collide as text without being repeats (and a raw-name
+        --instname matches only some of them), so only the materialized
+        listing (list_paths) can de-duplicate them.
+        """
+        return self._scan_repeats(dropx)[1]
+
+    def distinct_children(self, dropx=False):
+        mask = self.distinct_edge_mask(dropx)
+        if mask is None:
+            return self.children
+        children = self.children
+        return lambda cell_id: [e for e in children(cell_id) if mask[e]]
+
+    def distinct_parents(self, dropx=False):
+        mask = self.distinct_edge_mask(dropx)
+        if mask is None:
+            return self.parents
+        parents = self.parents
+        return lambda cell_id: [e for e in parents(cell_id) if mask[e]]
+
+
+def parse_netlist(path, use_cache=True):
+    """
+    Parse the netlist into an EdgeStore.
 
-                raw_edges.append({
-                    "parent_cell": current_subckt,
-                    "inst_name": inst_name,
-                    "child_cell": child_cell,
-                })
-
-    children_by_parent = defaultdict(list)
-    parents_by_child = defaultdict(list)
-    top_level_by_cell = defaultdict(list)
-
-    for edge in raw_edges:
-        child_cell = edge["child_cell"]
-        parent_cell = edge["parent_cell"]
-        child_is_subckt = child_cell in defined_subckts
-
-        # Keep all X-lines inside subckts in children_by_parent so --instname
-        # can find primitive/PCell/model instances such as MOSFETs.
-        # Only defined-subckt children can be traversed further.
-        if parent_cell is not None:
-            children_by_parent[parent_cell].append(edge)
-        elif child_is_subckt:
-            top_level_by_cell[child_cell].append(edge)
-
-        # Upward hierarchy and top-level scoping require a defined child subckt.
-        if child_is_subckt:
-            parents_by_child[child_cell].append(edge)
-
-    for s in defined_subckts:
-        children_by_parent.setdefault(s, [])
-        parents_by_child.setdefault(s, [])
-        top_level_by_cell.setdefault(s, [])
-
-    return defined_subckts, raw_edges, children_by_parent, parents_by_child, top_level_by_cell
+    The netlist is read through spice_netlist.load_hierarchy, so an unchanged
+    netlist is loaded from its cached index instead of re-parsed.
+    """
+    return EdgeStore(load_hierarchy(path, use_cache=use_cache))
 
 
 def format_normal_path(root_cell, inst_names, dropx=False):
@@ -283,158 +289,151 @@ def format_inst_path(inst_names, dropx=False):
     return "/".join(parts)
 
 
-def find_cell_matches_under_top(children_by_parent, top_cell, target_cell):
+def find_matches_under_top(store, top_cell, is_match):
     """
-    Top-down from explicit top cell, finding instances whose child cell is target_cell.
+    Top-down from explicit top cell, reporting edges for which is_match(e) holds.
 
     Returns list of tuples:
       (root_cell_name, [inst1, inst2, ...])
     """
+    names = store.names
     results = []
 
-    def dfs(current_cell, inst_path, active_cells):
-        if current_cell in active_cells:
-            return
+    top_id = store.name_id(top_cell)
+    if top_id is None:
+        return results
 
-        active_cells.add(current_cell)
+    walk = HierWalk(store.children, store.edge_child.__getitem__, label=store.edge_inst.__getitem__)
+    for e in walk.edges(top_id):
+        if is_match(e):
+            results.append((top_cell, [names[i] for i in walk.path]))
 
-        for edge in children_by_parent.get(current_cell, []):
-            child_cell = edge["child_cell"]
-            inst_name = edge["inst_name"]
-            new_inst_path = inst_path + [inst_name]
+    return results
 
-            if child_cell == target_cell:
-                results.append((top_cell, new_inst_path))
 
-            dfs(child_cell, new_inst_path, active_cells)
+def find_cell_matches_under_top(store, top_cell, target_cell):
+    """
+    Top-down from explicit top cell, finding instances whose child cell is target_cell.
 
-        active_cells.remove(current_cell)
+    Returns list of tuples:
+      (root_cell_name, [inst1, inst2, ...])
+    """
+    target_id = store.name_id(target_cell)
+    if target_id is None:
+        return []
 
-    dfs(top_cell, [], set())
-    return results
+    edge_child = store.edge_child
+    return find_matches_under_top(store, top_cell, lambda e: edge_child[e] == target_id)
 
 
-def find_instname_matches_under_top(children_by_parent, top_cell, target_instname, dropx=False):
+def find_instname_matches_under_top(store, top_cell, target_instname, dropx=False):
     """
     Top-down from explicit top cell, finding instances whose name matches target_instname.
 
     Returns list of tuples:
       (root_cell_name, [inst1, inst2, ..., matched_inst])
     """
-    results = []
-
-    def dfs(current_cell, inst_path, active_cells):
-        if current_cell in active_cells:
-            return
-
-        active_cells.add(current_cell)
-
-        for edge in children_by_parent.get(current_cell, []):
-            child_cell = edge["child_cell"]
-            inst_name = edge["inst_name"]
-            new_inst_path = inst_path + [inst_name]
-
-            if instname_matches(inst_name, target_instname, dropx=dropx):
-                results.append((top_cell, new_inst_path))
-
-            dfs(child_cell, new_inst_path, active_cells)
-
-        active_cells.remove(current_cell)
+    match_ids = store.instname_ids(target_instname, dropx=dropx)
+    if not match_ids:
+        return []
 
-    dfs(top_cell, [], set())
-    return results
+    edge_inst = store.edge_inst
+    return find_matches_under_top(store, top_cell, lambda e: edge_inst[e] in match_ids)
 
 
-def build_upward_cell_and_inst_prefixes(parents_by_child, start_cell):
+def build_upward_cell_and_inst_prefixes(store, start_cell_id):
     """
-    Build all maximal upward prefixes ending at start_cell.
+    Build all maximal upward prefixes ending at start_cell_id.
 
     Returns a list of tuples:
       (root_cell_name, [inst1, inst2, ..., inst_into_start_cell])
     """
-    results = []
+    names = store.names
+    edge_parent = store.edge_parent
 
-    def rec(current_cell, suffix_inst_names, active_cells):
-        if current_cell in active_cells:
-            return
+    def internal_parents(cell_id):
+        return [e for e in store.parents(cell_id) if edge_parent[e] != TOP_LEVEL]
 
-        active_cells.add(current_cell)
+    if not internal_parents(start_cell_id):
+        return [(names[start_cell_id], [])]
 
-        parent_edges = parents_by_child.get(current_cell, [])
-        internal_parents = [e for e in parent_edges if e["parent_cell"] is not None]
+    results = []
+    walk = HierWalk(internal_parents, edge_parent.__getitem__, label=store.edge_inst.__getitem__)
 
-        if internal_parents:
-            for edge in internal_parents:
-                rec(
-                    edge["parent_cell"],
-                    suffix_inst_names + [edge["inst_name"]],
-                    active_cells,
-                )
-        else:
-            results.append((current_cell, list(reversed(suffix_inst_names))))
+    for e in walk.edges(start_cell_id):
+        root = edge_parent[e]
+        if walk.is_active(root):
+            continue
 
-        active_cells.remove(current_cell)
+        if not internal_parents(root):
+            results.append((names[root], [names[i] for i in reversed(walk.path)]))
+            walk.prune()
 
-    rec(start_cell, [], set())
     return results
 
 
-def find_cell_matches_without_top(parents_by_child, target_cell):
+def paths_through_edge(store, e):
+    """
+    Return all maximal (root_cell_name, [inst, ..., inst_of_e]) paths ending at edge e.
+    """
+    parent_cell = store.edge_parent[e]
+    match_inst = store.inst_name(e)
+
+    if parent_cell == TOP_LEVEL:
+        return [(store.child_name(e), [match_inst])]
+
+    return [
+        (root_cell, inst_names + [match_inst])
+        for root_cell, inst_names in build_upward_cell_and_inst_prefixes(store, parent_cell)
+    ]
+
+
+def find_cell_matches_without_top(store, target_cell):
     """
     Without explicit --top, report all maximal paths to instances of target_cell.
 
     Returns list of tuples:
       (root_cell_name, [inst1, inst2, ..., inst_target])
     """
-    results = []
-
-    for match_edge in parents_by_child.get(target_cell, []):
-        parent_cell = match_edge["parent_cell"]
-        match_inst = match_edge["inst_name"]
-
-        if parent_cell is None:
-            results.append((target_cell, [match_inst]))
-            continue
-
-        prefixes = build_upward_cell_and_inst_prefixes(parents_by_child, parent_cell)
-        for root_cell, inst_names in prefixes:
-            results.append((root_cell, inst_names + [match_inst]))
+    target_id = store.name_id(target_cell)
+    if target_id is None:
+        return []
 
+    results = []
+    for e in store.parents(target_id):
+        results.extend(paths_through_edge(store, e))
     return results
 
 
-def find_instname_matches_without_top(all_edges, parents_by_child, target_instname, dropx=False):
+def find_instname_matches_without_top(store, target_instname, dropx=False):
     """
     Without explicit --top, report all maximal paths to instances named target_instname.
 
     Returns list of tuples:
       (root_cell_name, [inst1, inst2, ..., matched_inst])
     """
-    results = []
+    match_ids = store.instname_ids(target_instname, dropx=dropx)
+    if not match_ids:
+        return []
 
-    for match_edge in all_edges:
-        # Ignore primitive/non-subckt instances, matching the rest of this script's hierarchy model.
-        if match_edge["child_cell"] not in parents_by_child:
-            continue
+    is_subckt = store.is_subckt
+    edge_child = store.edge_child
+    results = []
 
-        if not instname_matches(match_edge["inst_name"], target_instname, dropx=dropx):
+    for e, inst_id in enumerate(store.edge_inst):
+        if inst_id not in match_ids:
             continue
 
-        parent_cell = match_edge["parent_cell"]
-        match_inst = match_edge["inst_name"]
-
-        if parent_cell is None:
-            results.append((match_edge["child_cell"], [match_inst]))
+        # Ignore primitive/non-subckt instances, matching the rest of this script's hierarchy model.
+        if not is_subckt[edge_child[e]]:
             continue
 
-        prefixes = build_upward_cell_and_inst_prefixes(parents_by_child, parent_cell)
-        for root_cell, inst_names in prefixes:
-            results.append((root_cell, inst_names + [match_inst]))
+        results.extend(paths_through_edge(store, e))
 
     return results
 
 
-def expand_to_inst_paths(path_records, top_level_by_cell):
+def expand_to_inst_paths(path_records, store):
     """
     Convert logical paths:
       (root_cell, [inst1, inst2, ...])
@@ -444,25 +443,26 @@ def expand_to_inst_paths(path_records, top_level_by_cell):
     out = []
 
     for root_cell, tail_inst_names in path_records:
-        root_edges = top_level_by_cell.get(root_cell, [])
-        for edge in root_edges:
-            out.append([edge["inst_name"]] + tail_inst_names)
+        for e in store.top_level_edges(root_cell):
+            out.append([store.inst_name(e)] + tail_inst_names)
 
     return out
 
 
-def find_top_level_instance_edges(top_level_by_cell, target_topinst, dropx=False):
+def find_top_level_instance_edges(store, target_topinst, dropx=False):
     """
     Find top-level X-instances whose instance name matches target_topinst.
 
     With --dropx, also allow the user to provide the post-drop form.
     Example: --topinst top --dropx matches a top-level instance named Xtop.
+
+    Returns edge ids.
     """
     matches = []
-    for edges in top_level_by_cell.values():
-        for edge in edges:
-            if instname_matches(edge["inst_name"], target_topinst, dropx=dropx):
-                matches.append(edge)
+    for edges in store.top_level_by_cell.values():
+        for e in edges:
+            if instname_matches(store.inst_name(e), target_topinst, dropx=dropx):
+                matches.append(e)
     return matches
 
 
@@ -473,6 +473,716 @@ def filter_inst_paths_by_allowed_roots(inst_paths, allowed_root_insts):
     return [p for p in inst_paths if p and p[0] in allowed_root_insts]
 
 
+class SubtreeCounts(object):
+    """
+    Memoized top-down search for edges accepted by is_match(e).
+
+    count(cell_id) is the number of instance paths below cell_id that end at
+    a matching edge. It is computed once per cell and shared by every
+    instance of that cell, so a slice replicated a thousand times costs the
+    same as one copy; counting is proportional to the number of cells and
+    edges, not the number of paths.
+
+    iter_paths() enumerates matching paths lazily in the same order as
+    find_matches_under_top(), descending only into subtrees with a nonzero
+    count, and can skip whole subtrees to start at a given path index.
+
+    Repeated instance lines are skipped (EdgeStore.distinct_children), so
+    counts match the de-duplicated listing.
+
+    A recursive (cyclic) hierarchy is cut at the recursion, as the DFS does;
+    `cyclic` is set when that happens because counts then depend on the
+    entry point.
+    """
+
+    def __init__(self, store, is_match, dropx=False):
+        self.store = store
+        self.is_match = is_match
+        self.children = store.distinct_children(dropx)
+        self.memo = {}
+        self.cyclic = False
+
+    def _subtree_total(self, cell_id, edges):
+        memo = self.memo
+        is_match = self.is_match
+        edge_child = self.store.edge_child
+        total = 0
+        for e in edges:
+            if is_match(e):
+                total += 1
+            total += memo.get(edge_child[e], 0)
+        return total
+
+    def count(self, cell_id):
+        memo = self.memo
+        if cell_id not in memo:
+            store = self.store
+            if fold_postorder(cell_id, self.children, store.edge_child.__getitem__,
+                              self._subtree_total, memo):
+                self.cyclic = True
+        return memo[cell_id]
+
+    def iter_paths(self, cell_id, skip=0):
+        """
+        Yield matching paths below cell_id as tuples of instance-name ids,
+        starting at path number `skip`.
+        """
+        store = self.store
+        edge_child = store.edge_child
+        is_match = self.is_match
+        walk = HierWalk(self.children, edge_child.__getitem__, label=store.edge_inst.__getitem__)
+
+        for e in walk.edges(cell_id):
+            child = edge_child[e]
+            matched = is_match(e)
+            below = 0 if walk.is_active(child) else self.count(child)
+
+            if skip >= matched + below:
+                skip -= matched + below
+                walk.prune()
+                continue
+
+            if matched:
+                if skip:
+                    skip -= 1
+                else:
+                    yield tuple(walk.path)
+
+            if not below:
+                walk.prune()
+
+
+class UpwardCounts(object):
+    """
+    Memoized maximal upward prefixes, for searches without --topcell/--topinst.
+
+    A root cell (one with no parent inside a .subckt) contributes
+    len(leaf_items(root_id)) units: 1 for root-cell output, or one per
+    top-level instance of the root for --instpath. count(cell_id) sums the
+    units of every maximal upward prefix ending at cell_id, memoized per cell.
+    Repeated instance lines are skipped, as in SubtreeCounts.
+    """
+
+    def __init__(self, store, leaf_items, dropx=False):
+        self.store = store
+        self.leaf_items = leaf_items
+        self.parents = store.distinct_parents(dropx)
+        self.memo = {}
+        self.cyclic = False
+
+    def internal_parents(self, cell_id):
+        edge_parent = self.store.edge_parent
+        return [e for e in self.parents(cell_id) if edge_parent[e] != TOP_LEVEL]
+
+    def _prefix_total(self, cell_id, edges):
+        if not edges:
+            return len(self.leaf_items(cell_id))
+
+        memo = self.memo
+        edge_parent = self.store.edge_parent
+        return sum(memo.get(edge_parent[e], 0) for e in edges)
+
+    def count(self, cell_id):
+        memo = self.memo
+        if cell_id not in memo:
+            if fold_postorder(cell_id, self.internal_parents, self.store.edge_parent.__getitem__,
+                              self._prefix_total, memo):
+                self.cyclic = True
+        return memo[cell_id]
+
+    def iter_prefixes(self, cell_id, skip=0):
+        """
+        Yield (root_id, inst_ids, item_skip) for every maximal upward prefix
+        ending at cell_id, starting at unit number `skip`. inst_ids is
+        top-down; item_skip is how many of the root's leaf items to skip
+        (nonzero only for the first record).
+        """
+        internal_parents = self.internal_parents
+        if not internal_parents(cell_id):
+            yield cell_id, (), skip
+            return
+
+        edge_parent = self.store.edge_parent
+        walk = HierWalk(internal_parents, edge_parent.__getitem__, label=self.store.edge_inst.__getitem__)
+
+        for e in walk.edges(cell_id):
+            parent = edge_parent[e]
+            if walk.is_active(parent):
+                skip = 0
+                continue
+
+            weight = self.count(parent)
+            if skip >= weight:
+                skip -= weight
+                walk.prune()
+                continue
+
+            if not internal_parents(parent):
+                yield parent, tuple(reversed(walk.path)), skip
+                skip = 0
+                walk.prune()
+
+
+class PathSegment(object):
+    """
+    A block of output lines with a known size, produced lazily on demand.
+
+    lines(skip) yields the block's lines starting at line number `skip`.
+    """
+
+    def __init__(self, size, lines):
+        self.size = size
+        self.lines = lines
+
+
+def downward_segment(counts, cell_id, heads, dropx=False):
+    """
+    Lines head/inst1/.../match for every matching path below cell_id and
+    every head, path-major (the order expand_to_inst_paths produces).
+    """
+    names = counts.store.names
+    n_heads = len(heads)
+
+    def lines(skip):
+        head_skip = skip % n_heads
+        for path in counts.iter_paths(cell_id, skip // n_heads):
+            tail = "/".join(maybe_drop_x(names[i], dropx) for i in path)
+            for head in heads[head_skip:]:
+                yield head + "/" + tail
+            head_skip = 0
+
+    size = counts.count(cell_id) * n_heads if n_heads else 0
+    return PathSegment(size, lines)
+
+
+def upward_leaf_items(store, instpath=False, dropx=False):
+    """
+    Return leaf_items(root_id) for UpwardCounts: the root cell name, or the
+    root's top-level instance names for --instpath.
+    """
+    if instpath:
+        def leaf_items(root_id):
+            return dedupe_preserve_order(
+                maybe_drop_x(store.inst_name(t), dropx)
+                for t in store.top_level_by_cell.get(root_id, [])
+            )
+    else:
+        names = store.names
+
+        def leaf_items(root_id):
+            return [names[root_id]]
+
+    return leaf_items
+
+
+def upward_segments(store, match_edges, instpath=False, dropx=False, up=None):
+    """
+    Segments reporting every maximal path to each of match_edges, in the
+    order find_cell_matches_without_top() reports them.
+
+    Prefix counts do not depend on the target, so batch queries pass one
+    shared UpwardCounts as `up`.
+    """
+    names = store.names
+    edge_parent = store.edge_parent
+
+    if up is None:
+        up = UpwardCounts(store, upward_leaf_items(store, instpath, dropx), dropx)
+    leaf_items = up.leaf_items
+
+    def record_lines(root_id, inst_ids, item_skip):
+        tail = "/".join(maybe_drop_x(names[i], dropx) for i in inst_ids)
+        for head in leaf_items(root_id)[item_skip:]:
+            yield head + "/" + tail
+
+    segments = []
+    for e in match_edges:
+        if edge_parent[e] == TOP_LEVEL:
+            root_id = store.edge_child[e]
+            size = len(leaf_items(root_id))
+
+            def lines(skip, root_id=root_id, e=e):
+                yield from record_lines(root_id, (store.edge_inst[e],), skip)
+        else:
+            size = up.count(edge_parent[e])
+
+            def lines(skip, e=e):
+                for root_id, inst_ids, item_skip in up.iter_prefixes(edge_parent[e], skip):
+                    yield from record_lines(root_id, inst_ids + (store.edge_inst[e],), item_skip)
+
+        segments.append(PathSegment(size, lines))
+
+    return segments, up
+
+
+def paginate_segments(segments, offset=0, limit=None):
+    """
+    Yield at most `limit` lines starting at line number `offset`, skipping
+    whole segments by size without generating them.
+    """
+    remaining = limit
+
+    for seg in segments:
+        if offset >= seg.size:
+            offset -= seg.size
+            continue
+
+        for line in seg.lines(offset):
+            if remaining is not None:
+                if remaining <= 0:
+                    return
+                remaining -= 1
+            yield line
+
+        offset = 0
+
+
+def match_predicate(store, kind, target, dropx=False):
+    """
+    Return is_match(e) for a "cell" or "instname" query.
+    """
+    if kind == "cell":
+        target_id = store.name_id(target)
+        edge_child = store.edge_child
+
+        def is_match(e):
+            return edge_child[e] == target_id
+    else:
+        match_ids = store.instname_ids(target, dropx=dropx)
+        edge_inst = store.edge_inst
+
+        def is_match(e):
+            return edge_inst[e] in match_ids
+
+    return is_match
+
+
+def match_edges_without_top(store, kind, target, dropx=False):
+    """
+    Edges that end an unscoped path: instances of the target cell, or
+    subckt instances with a matching instance name.
+    """
+    if kind == "cell":
+        target_id = store.name_id(target)
+        return store.distinct_parents(dropx)(target_id) if target_id is not None else []
+
+    match_ids = store.instname_ids(target, dropx=dropx)
+    is_subckt = store.is_subckt
+    edge_child = store.edge_child
+    mask = store.distinct_edge_mask(dropx)
+    return [
+        e for e, inst_id in enumerate(store.edge_inst)
+        if inst_id in match_ids and is_subckt[edge_child[e]] and (mask is None or mask[e])
+    ]
+
+
+def scoped_segments(store, args, selected_topinst_edges, counts):
+    """
+    Segments for a --topcell/--topinst query, using `counts` (a SubtreeCounts)
+    for matching. Top-level instances that would repeat an earlier head and
+    cell are skipped, since their lines are all duplicates.
+    """
+    segments = []
+
+    if args.topcell:
+        if args.instpath:
+            heads = dedupe_preserve_order(
+                maybe_drop_x(store.inst_name(e), args.dropx)
+                for e in store.top_level_edges(args.topcell)
+            )
+        else:
+            heads = [args.topcell]
+        segments.append(downward_segment(counts, store.name_id(args.topcell), heads, args.dropx))
+    else:
+        seen_tops = set()
+        for top_edge in selected_topinst_edges:
+            if args.instpath:
+                head = maybe_drop_x(store.inst_name(top_edge), args.dropx)
+            else:
+                head = store.child_name(top_edge)
+            top = (head, store.edge_child[top_edge])
+            if top in seen_tops:
+                continue
+            seen_tops.add(top)
+            segments.append(
+                downward_segment(counts, store.edge_child[top_edge], [head], args.dropx)
+            )
+
+    return segments
+
+
+def memoized_segments(store, args, selected_topinst_edges):
+    """
+    Build the output segments for one --cell/--instname query.
+
+    Returns (segments, counters); counters are checked for recursion.
+    """
+    kind, target = ("cell", args.cell) if args.cell else ("instname", args.instname)
+
+    if store.ambiguous_names(args.dropx):
+        return listed_segments(store, args, kind, target, selected_topinst_edges), []
+
+    if args.topcell or args.topinst:
+        counts = SubtreeCounts(store, match_predicate(store, kind, target, args.dropx), args.dropx)
+        return scoped_segments(store, args, selected_topinst_edges, counts), [counts]
+
+    match_edges = match_edges_without_top(store, kind, target, dropx=args.dropx)
+    segments, up = upward_segments(store, match_edges, instpath=args.instpath, dropx=args.dropx)
+    return segments, [up]
+
+
+def listed_segments(store, args, kind, target, selected_topinst_edges):
+    """
+    One segment holding the materialized listing, for netlists where
+    distinct instances can render the same path (EdgeStore.ambiguous_names).
+    """
+    lines = list_paths(store, args, kind, target, selected_topinst_edges)
+    return [PathSegment(len(lines), lambda skip: islice(lines, skip, None))]
+
+
+def report_no_matches(store, args):
+    """
+    Print the no-match diagnostic (with instance-name suggestions) and exit 2.
+    """
+    scope_desc = (
+        f'under top-level instance "{args.topinst}"' if args.topinst else
+        f'under top cell "{args.topcell}"' if args.topcell else
+        'in the netlist'
+    )
+    target_desc = (
+        f'instance name "{args.instname}"' if args.instname else
+        f'cell "{args.cell}"'
+    )
+    sys.stderr.write(f'No matching paths found for {target_desc} {scope_desc}.\n')
+
+    if args.instname:
+        close = closest_instance_names(
+            args.instname,
+            store,
+            dropx=args.dropx,
+            limit=3,
+        )
+        if close:
+            sys.stderr.write('Closest instance name(s) anywhere in the parsed netlist:\n')
+            for name in close:
+                shown = maybe_drop_x(name, args.dropx)
+                if shown == name:
+                    sys.stderr.write(f'  {name}\n')
+                else:
+                    sys.stderr.write(f'  {shown}  (raw: {name})\n')
+
+    sys.exit(2)
+
+
+def run_memoized(store, args, selected_topinst_edges):
+    """
+    Answer the query with the memoized engine: --count-only prints the number
+    of matching paths, otherwise the --offset/--limit page is streamed.
+    """
+    segments, counters = memoized_segments(store, args, selected_topinst_edges)
+    total = sum(seg.size for seg in segments)
+
+    if any(c.cyclic for c in counters):
+        sys.stderr.write(
+            "Warning: recursive subckt hierarchy detected; "
+            "paths are cut at the recursion\n"
+        )
+
+    if total == 0:
+        if args.count_only:
+            print(0)
+        report_no_matches(store, args)
+
+    if args.count_only:
+        print(total)
+        return
+
+    if not args.instpath:
+        sys.stderr.write("Note: use --instpath to report pure instance-name paths.\n")
+
+    for line in paginate_segments(segments, args.offset, args.limit):
+        print(line)
+
+
+def list_paths(store, args, kind, target, selected_topinst_edges):
+    """
+    Every matching path for one query, materialized by the direct search
+    and de-duplicated in first-seen order. This is the default listing.
+    """
+    selected_topinst_inst_paths = []
+
+    if args.topcell:
+        if kind == "cell":
+            logical_paths = find_cell_matches_under_top(store, args.topcell, target)
+        else:
+            logical_paths = find_instname_matches_under_top(
+                store,
+                args.topcell,
+                target,
+                dropx=args.dropx,
+            )
+
+        logical_paths = [(root, tail) for (root, tail) in logical_paths if root == args.topcell]
+
+    elif args.topinst:
+        logical_paths = []
+
+        for top_edge in selected_topinst_edges:
+            top_cell = store.child_name(top_edge)
+
+            if kind == "cell":
+                edge_paths = find_cell_matches_under_top(store, top_cell, target)
+            else:
+                edge_paths = find_instname_matches_under_top(
+                    store,
+                    top_cell,
+                    target,
+                    dropx=args.dropx,
+                )
+
+            edge_paths = [(root, tail) for (root, tail) in edge_paths if root == top_cell]
+            logical_paths.extend(edge_paths)
+
+            for _root, tail_inst_names in edge_paths:
+                selected_topinst_inst_paths.append([store.inst_name(top_edge)] + tail_inst_names)
+
+    else:
+        if kind == "cell":
+            logical_paths = find_cell_matches_without_top(store, target)
+        else:
+            logical_paths = find_instname_matches_without_top(
+                store,
+                target,
+                dropx=args.dropx,
+            )
+
+    if args.instpath:
+        if args.topinst:
+            inst_paths = selected_topinst_inst_paths
+        else:
+            inst_paths = expand_to_inst_paths(logical_paths, store)
+
+            if args.topcell:
+                allowed_root_insts = {store.inst_name(e) for e in store.top_level_edges(args.topcell)}
+                inst_paths = filter_inst_paths_by_allowed_roots(inst_paths, allowed_root_insts)
+
+        output_lines = [format_inst_path(p, dropx=args.dropx) for p in inst_paths]
+    else:
+        output_lines = [
+            format_normal_path(root, insts, dropx=args.dropx)
+            for (root, insts) in logical_paths
+        ]
+
+    return dedupe_preserve_order(output_lines)
+
+
+QUERY_KINDS = ("cell", "instname")
+
+
+def read_queries(path):
+    """
+    Read a --queries file: one query per line, either "cell NAME" or
+    "instname NAME". A bare NAME is a cell query. Blank lines and lines
+    starting with # are ignored.
+
+    Returns a list of (kind, name) in file order.
+    """
+    queries = []
+    with open(path, "r", encoding="utf-8", errors="replace") as fh:
+        for line_no, line in enumerate(fh, 1):
+            tokens = line.split()
+            if not tokens or tokens[0].startswith("#"):
+                continue
+
+            if len(tokens) == 1:
+                queries.append(("cell", tokens[0]))
+            elif len(tokens) == 2 and tokens[0].lower() in QUERY_KINDS:
+                queries.append((tokens[0].lower(), tokens[1]))
+            else:
+                raise ValueError(
+                    f'{path}:{line_no}: expected "cell NAME", "instname NAME" or NAME, '
+                    f'got "{line.strip()}"'
+                )
+
+    return queries
+
+
+class BatchSubtreeCounts(object):
+    """
+    SubtreeCounts for many queries in one traversal.
+
+    edge_queries(e) returns the query numbers that edge e matches. count(cell_id)
+    returns a Counter {query: paths below cell_id}, memoized per cell, so the
+    hierarchy is walked once no matter how many queries there are.
+    """
+
+    def __init__(self, store, edge_queries, dropx=False):
+        self.store = store
+        self.edge_queries = edge_queries
+        self.children = store.distinct_children(dropx)
+        self.memo = {}
+        self.cyclic = False
+
+    def _subtree_total(self, cell_id, edges):
+        memo = self.memo
+        edge_child = self.store.edge_child
+        total = Counter()
+        for e in edges:
+            total.update(self.edge_queries(e))
+            below = memo.get(edge_child[e])
+            if below:
+                total.update(below)
+        return total
+
+    def count(self, cell_id):
+        memo = self.memo
+        if cell_id not in memo:
+            store = self.store
+            if fold_postorder(cell_id, self.children, store.edge_child.__getitem__,
+                              self._subtree_total, memo):
+                self.cyclic = True
+        return memo[cell_id]
+
+
+class QuerySubtreeCounts(SubtreeCounts):
+    """
+    One query's view of a BatchSubtreeCounts, for path enumeration.
+    """
+
+    def __init__(self, batch, query, is_match, dropx=False):
+        SubtreeCounts.__init__(self, batch.store, is_match, dropx)
+        self.batch = batch
+        self.query = query
+
+    def count(self, cell_id):
+        return self.batch.count(cell_id).get(self.query, 0)
+
+
+def run_batch(store, args, selected_topinst_edges):
+    """
+    Answer every query in --queries FILE against the already-parsed netlist
+    and write one JSONL record (or CSV rows) per query, keyed by query.
+
+    Scoped searches share one BatchSubtreeCounts traversal; unscoped searches
+    share one UpwardCounts, since upward prefixes do not depend on the target.
+    --count-only, --offset and --limit apply to each query.
+    """
+    try:
+        queries = read_queries(args.queries)
+    except (OSError, ValueError) as exc:
+        sys.stderr.write(f"Error: {exc}\n")
+        sys.exit(1)
+
+    unique = dedupe_preserve_order(queries)
+    query_no = {q: i for i, q in enumerate(unique)}
+
+    counters = []
+    if store.ambiguous_names(args.dropx):
+        def query_segments(kind, name):
+            return listed_segments(store, args, kind, name, selected_topinst_edges)
+    elif args.topcell or args.topinst:
+        by_cell = {}
+        by_inst = {}
+        for i, (kind, name) in enumerate(unique):
+            if kind == "cell":
+                cell_id = store.name_id(name)
+                if cell_id is not None:
+                    by_cell.setdefault(cell_id, []).append(i)
+            else:
+                for inst_id in store.instname_ids(name, dropx=args.dropx):
+                    by_inst.setdefault(inst_id, []).append(i)
+
+        edge_child = store.edge_child
+        edge_inst = store.edge_inst
+        no_queries = []
+
+        def edge_queries(e):
+            return by_cell.get(edge_child[e], no_queries) + by_inst.get(edge_inst[e], no_queries)
+
+        batch = BatchSubtreeCounts(store, edge_queries, args.dropx)
+        counters.append(batch)
+
+        def query_segments(kind, name):
+            counts = QuerySubtreeCounts(
+                batch, query_no[(kind, name)], match_predicate(store, kind, name, args.dropx),
+                args.dropx,
+            )
+            return scoped_segments(store, args, selected_topinst_edges, counts)
+    else:
+        up = UpwardCounts(store, upward_leaf_items(store, args.instpath, args.dropx), args.dropx)
+        counters.append(up)
+
+        wanted = {}
+        for kind, name in unique:
+            if kind == "instname":
+                for inst_id in store.instname_ids(name, dropx=args.dropx):
+                    wanted[inst_id] = []
+
+        if wanted:
+            is_subckt = store.is_subckt
+            edge_child = store.edge_child
+            mask = store.distinct_edge_mask(args.dropx)
+            for e, inst_id in enumerate(store.edge_inst):
+                if inst_id in wanted and is_subckt[edge_child[e]] and (mask is None or mask[e]):
+                    wanted[inst_id].append(e)
+
+        def query_segments(kind, name):
+            if kind == "cell":
+                match_edges = match_edges_without_top(store, kind, name, dropx=args.dropx)
+            else:
+                match_edges = sorted(
+                    e
+                    for inst_id in store.instname_ids(name, dropx=args.dropx)
+                    for e in wanted[inst_id]
+                )
+            segments, _up = upward_segments(
+                store, match_edges, instpath=args.instpath, dropx=args.dropx, up=up
+            )
+            return segments
+
+    if args.format == "csv":
+        writer = csv.writer(sys.stdout, lineterminator="\n")
+        writer.writerow(["query", "type", "count"] if args.count_only else ["query", "type", "path"])
+
+    for kind, name in queries:
+        segments = query_segments(kind, name)
+        total = sum(seg.size for seg in segments)
+
+        paths = []
+        if not args.count_only:
+            paths = list(paginate_segments(segments, args.offset, args.limit))
+
+        if args.format == "csv":
+            if args.count_only:
+                writer.writerow([name, kind, total])
+            else:
+                for path in paths or [""]:
+                    writer.writerow([name, kind, path])
+            continue
+
+        record = {"query": name, "type": kind, "count": total}
+        if not args.count_only:
+            record["paths"] = paths
+        if kind == "cell" and not store.is_defined(name):
+            record["defined"] = False
+        if total == 0 and kind == "instname":
+            record["closest"] = closest_instance_names(name, store, dropx=args.dropx, limit=3)
+        print(json.dumps(record))
+
+    if any(c.cyclic for c in counters):
+        sys.stderr.write(
+            "Warning: recursive subckt hierarchy detected; "
+            "paths are cut at the recursion\n"
+        )
+
+
+def nonnegative_int(value):
+    ivalue = int(value)
+    if ivalue < 0:
+        raise argparse.ArgumentTypeError(f"must be >= 0, got {value}")
+    return ivalue
+
+
 def main():
     ap = argparse.ArgumentParser(
         description=(
@@ -501,6 +1211,14 @@ def main():
     target = ap.add_mutually_exclusive_group(required=True)
     target.add_argument("--cell", help="Target instantiated cell / subckt name")
     target.add_argument("--instname", help="Target instance name")
+    target.add_argument(
+        "--queries",
+        metavar="FILE",
+        help=(
+            'Batch mode: answer every query in FILE ("cell NAME", "instname NAME" '
+            "or a bare cell NAME per line) from one netlist load, one record per query"
+        )
+    )
 
     ap.add_argument(
         "--dropx",
@@ -519,44 +1237,64 @@ def main():
             "With --topinst, prepend that selected top-level instance."
         )
     )
+    ap.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always re-parse the netlist; do not read or write its cached index (~/.cache/spice_netlist)"
+    )
+    ap.add_argument(
+        "--count-only",
+        action="store_true",
+        help=(
+            "Print only the number of matching paths. Counts are memoized per cell, "
+            "so this costs time proportional to the number of cells, not paths."
+        )
+    )
+    ap.add_argument(
+        "--offset",
+        type=nonnegative_int,
+        default=0,
+        help="Skip the first N matching paths (memoized engine)"
+    )
+    ap.add_argument(
+        "--limit",
+        type=nonnegative_int,
+        default=None,
+        help="Print at most N matching paths (memoized engine)"
+    )
+    ap.add_argument(
+        "--memo",
+        action="store_true",
+        help=(
+            "Use the memoized subtree-count engine: descend only into subtrees that "
+            "contain matches and stream paths lazily. Implied by --count-only, "
+            "--offset and --limit."
+        )
+    )
+    ap.add_argument(
+        "--format",
+        choices=("jsonl", "csv"),
+        default="jsonl",
+        help="Output format for --queries (default: jsonl)"
+    )
     args = ap.parse_args()
 
-    (
-        defined_subckts,
-        all_edges,
-        children_by_parent,
-        parents_by_child,
-        top_level_by_cell,
-    ) = parse_netlist(args.netlist)
+    store = parse_netlist(args.netlist, use_cache=not args.no_cache)
 
-    if args.cell and args.cell not in defined_subckts:
+    if args.cell and not store.is_defined(args.cell):
         sys.stderr.write(
             f'Warning: target cell "{args.cell}" is not defined as a .subckt in the netlist\n'
         )
 
     selected_topinst_edges = []
-    selected_topinst_inst_paths = []
-
-    if args.topcell:
-        if args.topcell not in defined_subckts:
-            sys.stderr.write(f'Error: top cell "{args.topcell}" is not defined in the netlist\n')
-            sys.exit(1)
 
-        if args.cell:
-            logical_paths = find_cell_matches_under_top(children_by_parent, args.topcell, args.cell)
-        else:
-            logical_paths = find_instname_matches_under_top(
-                children_by_parent,
-                args.topcell,
-                args.instname,
-                dropx=args.dropx,
-            )
+    if args.topcell and not store.is_defined(args.topcell):
+        sys.stderr.write(f'Error: top cell "{args.topcell}" is not defined in the netlist\n')
+        sys.exit(1)
 
-        logical_paths = [(root, tail) for (root, tail) in logical_paths if root == args.topcell]
-
-    elif args.topinst:
+    if args.topinst:
         selected_topinst_edges = find_top_level_instance_edges(
-            top_level_by_cell,
+            store,
             args.topinst,
             dropx=args.dropx,
         )
@@ -565,7 +1303,7 @@ def main():
             sys.stderr.write(
                 f'Error: top-level instance "{args.topinst}" was not found in the netlist\n'
             )
-            print_closest_topinst_diagnostic(args.topinst, top_level_by_cell, limit=3)
+            print_closest_topinst_diagnostic(args.topinst, store, limit=3)
             sys.exit(1)
 
         if len(selected_topinst_edges) > 1:
@@ -574,97 +1312,30 @@ def main():
                 f'all corresponding instance-rooted paths will be reported\n'
             )
 
-        logical_paths = []
-        selected_topinst_inst_paths = []
-
-        for top_edge in selected_topinst_edges:
-            top_cell = top_edge["child_cell"]
-
-            if args.cell:
-                edge_paths = find_cell_matches_under_top(children_by_parent, top_cell, args.cell)
-            else:
-                edge_paths = find_instname_matches_under_top(
-                    children_by_parent,
-                    top_cell,
-                    args.instname,
-                    dropx=args.dropx,
-                )
-
-            edge_paths = [(root, tail) for (root, tail) in edge_paths if root == top_cell]
-            logical_paths.extend(edge_paths)
-
-            for _root, tail_inst_names in edge_paths:
-                selected_topinst_inst_paths.append([top_edge["inst_name"]] + tail_inst_names)
-
-    else:
-        if args.cell:
-            logical_paths = find_cell_matches_without_top(parents_by_child, args.cell)
-        else:
-            logical_paths = find_instname_matches_without_top(
-                all_edges,
-                parents_by_child,
-                args.instname,
-                dropx=args.dropx,
+    if args.instpath and args.topcell:
+        top_instances = store.top_level_edges(args.topcell)
+        if len(top_instances) > 1:
+            sys.stderr.write(
+                f'Warning: multiple top-level instances of top cell "{args.topcell}" found; '
+                f'all corresponding instance-rooted paths will be reported\n'
             )
 
-    if args.instpath:
-        if args.topcell:
-            top_instances = top_level_by_cell.get(args.topcell, [])
-            if len(top_instances) > 1:
-                sys.stderr.write(
-                    f'Warning: multiple top-level instances of top cell "{args.topcell}" found; '
-                    f'all corresponding instance-rooted paths will be reported\n'
-                )
-
-        if args.topinst:
-            inst_paths = selected_topinst_inst_paths
-        else:
-            inst_paths = expand_to_inst_paths(logical_paths, top_level_by_cell)
+    if args.queries:
+        run_batch(store, args, selected_topinst_edges)
+        return
 
-            if args.topcell:
-                allowed_root_insts = {edge["inst_name"] for edge in top_level_by_cell.get(args.topcell, [])}
-                inst_paths = filter_inst_paths_by_allowed_roots(inst_paths, allowed_root_insts)
+    if args.memo or args.count_only or args.offset or args.limit is not None:
+        run_memoized(store, args, selected_topinst_edges)
+        return
 
-        output_lines = [format_inst_path(p, dropx=args.dropx) for p in inst_paths]
-    else:
-        output_lines = [
-            format_normal_path(root, insts, dropx=args.dropx)
-            for (root, insts) in logical_paths
-        ]
-        if output_lines:
-            sys.stderr.write("Note: use --instpath to report pure instance-name paths.\n")
+    kind, target = ("cell", args.cell) if args.cell else ("instname", args.instname)
 
-    output_lines = dedupe_preserve_order(output_lines)
+    output_lines = list_paths(store, args, kind, target, selected_topinst_edges)
+    if output_lines and not args.instpath:
+        sys.stderr.write("Note: use --instpath to report pure instance-name paths.\n")
 
     if not output_lines:
-        scope_desc = (
-            f'under top-level instance "{args.topinst}"' if args.topinst else
-            f'under top cell "{args.topcell}"' if args.topcell else
-            'in the netlist'
-        )
-        target_desc = (
-            f'instance name "{args.instname}"' if args.instname else
-            f'cell "{args.cell}"'
-        )
-        sys.stderr.write(f'No matching paths found for {target_desc} {scope_desc}.\n')
-
-        if args.instname:
-            close = closest_instance_names(
-                args.instname,
-                all_edges,
-                dropx=args.dropx,
-                limit=3,
-            )
-            if close:
-                sys.stderr.write('Closest instance name(s) anywhere in the parsed netlist:\n')
-                for name in close:
-                    shown = maybe_drop_x(name, args.dropx)
-                    if shown == name:
-                        sys.stderr.write(f'  {name}\n')
-                    else:
-                        sys.stderr.write(f'  {shown}  (raw: {name})\n')
-
-        sys.exit(2)
+        report_no_matches(store, args)
 
     for line in output_lines:
         print(line)
@@ -0,0 +1,138 @@
+import os
+import subprocess
+import sys
+import tempfile
+
+import unittest
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rpt_inst_path.py")
+
+# mid holds a duplicated instance line; top has two top-level instances.
+NETLIST = """\
+.subckt leaf a
+.ends
+.subckt mid a
+XL1 a leaf
+XL1 a leaf
+XL2 a leaf
+.ends
+.subckt top a
+XM a mid
+.ends
+XTOP a top
+XTOP a top
+"""
+
+
+def run(*args):
+    out = subprocess.run(
+        [sys.executable, SCRIPT] + list(args) + ["--no-cache"],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True,
+    )
+    return out.stdout.splitlines()
+
+
+class Test_duplicate_instances( unittest.TestCase ) :
+
+    def setUp(self) :
+        fd, self.netlist = tempfile.mkstemp(suffix=".sp")
+        with os.fdopen(fd, "w") as f:
+            f.write(NETLIST)
+
+    def tearDown(self) :
+        os.remove(self.netlist)
+
+    def test_count_matches_listing(self) :
+        for scope in ([], ["--topcell", "top"], ["--topcell", "top", "--instpath"]) :
+            listing = run(self.netlist, "--cell", "leaf", *scope)
+            count = run(self.netlist, "--cell", "leaf", "--count-only", *scope)
+            self.assertEqual( len(listing), 2 )
+            self.assertEqual( count, [str(len(listing))] )
+
+    def test_pages_follow_listing(self) :
+        listing = run(self.netlist, "--cell", "leaf", "--topcell", "top", "--dropx")
+        self.assertEqual( listing, ["top/M/L1", "top/M/L2"] )
+        pages = [
+            run(self.netlist, "--cell", "leaf", "--topcell", "top", "--dropx",
+                "--limit", "1", "--offset", str(i))
+            for i in range(3)
+        ]
+        self.assertEqual( pages, [["top/M/L1"], ["top/M/L2"], []] )
+
+    def test_dropx_instname(self) :
+        self.assertEqual(
+            run(self.netlist, "--instname", "L1", "--dropx", "--topcell", "top", "--count-only"),
+            ["1"],
+        )
+
+    def test_batch_counts(self) :
+        fd, queries = tempfile.mkstemp(suffix=".txt")
+        with os.fdopen(fd, "w") as f:
+            f.write("cell leaf\n")
+        try:
+            rows = run(self.netlist, "--queries", queries, "--topcell", "top", "--format", "csv")
+        finally:
+            os.remove(queries)
+        self.assertEqual( rows, ["query,type,path", "leaf,cell,top/XM/XL1", "leaf,cell,top/XM/XL2"] )
+
+
+# c0 has instances that share a reported name but instantiate different
+# cells, so distinct instances render the same path text.
+AMBIGUOUS_NETLIST = """\
+.subckt nch d g s b
+.ends
+.subckt c6 a b c
+XI0 a b nch
+.ends
+.subckt c0 a b c
+xI0 a b c c6
+xI0 a b nch
+XI3 a b c c6
+xI3 a b c nch
+.ends
+"""
+
+
+class Test_ambiguous_instance_names( unittest.TestCase ) :
+
+    def setUp(self) :
+        fd, self.netlist = tempfile.mkstemp(suffix=".sp")
+        with os.fdopen(fd, "w") as f:
+            f.write(AMBIGUOUS_NETLIST)
+
+    def tearDown(self) :
+        os.remove(self.netlist)
+
+    def check(self, *query) :
+        listing = run(self.netlist, *query)
+        self.assertEqual( run(self.netlist, *query, "--count-only"), [str(len(listing))] )
+        self.assertEqual( run(self.netlist, *query, "--limit", "10"), listing )
+        pages = []
+        for i in range(len(listing) + 1) :
+            pages += run(self.netlist, *query, "--limit", "1", "--offset", str(i))
+        self.assertEqual( pages, listing )
+        return listing
+
+    def test_same_name_different_cells(self) :
+        self.assertEqual(
+            self.check("--instname", "XI0", "--topcell", "c0"),
+            ["c0/xI0/XI0", "c0/XI3/XI0"],
+        )
+
+    def test_dropx_collision(self) :
+        self.assertEqual( self.check("--instname", "I3", "--dropx", "--topcell", "c0"), ["c0/I3"] )
+
+    def test_batch_counts(self) :
+        fd, queries = tempfile.mkstemp(suffix=".txt")
+        with os.fdopen(fd, "w") as f:
+            f.write("instname XI0\n")
+        try:
+            rows = run(self.netlist, "--queries", queries, "--topcell", "c0",
+                       "--count-only", "--format", "csv")
+        finally:
+            os.remove(queries)
+        self.assertEqual( rows, ["query,type,count", "XI0,instname,2"] )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -23,15 +23,24 @@ Examples:
     arealvs=0.2   --scale 10n  -> arealvs=20a
 
 The input file is not overwritten unless --in-place is specified.
+
+The netlist is streamed in chunks of whole lines, so memory does not grow
+with the file size. --jobs N transforms the chunks in N worker processes;
+the output is identical to a single-process run.
 """
 
 from __future__ import annotations
 
 import argparse
+import multiprocessing
+import os
 import re
 import sys
-from decimal import Decimal, InvalidOperation, localcontext
+import tempfile
+from collections import deque
+from decimal import Decimal, InvalidOperation, getcontext, localcontext
 from pathlib import Path
+from typing import Iterator, TextIO
 
 
 # Engineering suffixes accepted for --scale.
@@ -81,6 +90,33 @@ ASSIGNMENT_RE = re.compile(
     re.IGNORECASE | re.VERBOSE,
 )
 
+# Same match as ASSIGNMENT_RE, restricted to names classify_parameter() can
+# accept. Extracted netlists carry many other assignments (m=, nf=, ...);
+# skipping them in the regex avoids a Python callback per assignment.
+GEOMETRY_ASSIGNMENT_RE = re.compile(
+    rf"""
+    (?<![\w$])
+    (?P<name>a[ds]|p[ds]|(?:area|lg|wg|peri)[A-Za-z0-9_]*)
+    (?P<eq>\s*=\s*)
+    (?P<number>{NUMBER_RE})
+    (?P<suffix>meg|[afpnuµmkgt])?
+    (?=$|\s)
+    """,
+    re.IGNORECASE | re.VERBOSE,
+)
+
+# Outcomes counted per matched assignment.
+CHANGED = 0
+SKIPPED = 1
+
+# Distinct assignment texts remembered by GeometryScaler.
+CACHE_SIZE = 1 << 16
+
+# Characters read per streamed chunk (extended to the next line boundary).
+CHUNK_SIZE = 1 << 22
+
+DECIMAL_PRECISION = 50
+
 SCALE_RE = re.compile(
     rf"^\s*(?P<number>{NUMBER_RE})\s*(?P<suffix>meg|[afpnuµmkgt])?\s*$",
     re.IGNORECASE,
@@ -176,52 +212,166 @@ def engineering_exponent(value: Decimal) -> int:
     return (adjusted // 3) * 3
 
 
-def transform_text(text: str, scale: Decimal) -> tuple[str, int, int]:
+class GeometryScaler:
     """
-    Return transformed text, number changed, and number skipped because an
-    engineering suffix was already present.
+    Scale recognized assignments in netlist text, one chunk of whole lines at
+    a time.
+
+    Extracted netlists repeat the same few W/L/AS/AD literals millions of
+    times, so the rendered replacement for each matched assignment text is
+    cached (up to cache_size entries) instead of going through Decimal and
+    to_engineering() again. Decimal results depend on the active context;
+    use the scaler inside the same context it was created in.
     """
-    length_exp = engineering_exponent(scale)
-    area_scale = scale * scale
-    area_exp = length_exp * 2
-
-    changed = 0
-    skipped_existing_units = 0
-
-    def replace(match: re.Match[str]) -> str:
-        nonlocal changed, skipped_existing_units
 
+    def __init__(self, scale: Decimal, cache_size: int = CACHE_SIZE) -> None:
+        self.scale = scale
+        self.length_exp = engineering_exponent(scale)
+        self.area_scale = scale * scale
+        self.area_exp = self.length_exp * 2
+        self.cache_size = cache_size
+        self.changed = 0
+        self.skipped_existing_units = 0
+        # matched text -> (replacement, CHANGED / SKIPPED / None)
+        self._cache: dict[str, tuple[str, int | None]] = {}
+        self._counts = [0, 0]
+
+    def render(self, match: re.Match[str]) -> tuple[str, int | None]:
         name = match.group("name")
         kind = classify_parameter(name)
         if kind is None:
-            return match.group(0)
+            return match.group(0), None
 
         # Avoid silently scaling a file twice.
         if match.group("suffix"):
-            skipped_existing_units += 1
-            return match.group(0)
+            return match.group(0), SKIPPED
 
         original_number = Decimal(match.group("number"))
 
         if kind == "length":
-            scaled = original_number * scale
-            rendered = to_engineering(scaled, preferred_exp=length_exp)
+            scaled = original_number * self.scale
+            rendered = to_engineering(scaled, preferred_exp=self.length_exp)
         else:
-            scaled = original_number * area_scale
-            rendered = to_engineering(scaled, preferred_exp=area_exp)
+            scaled = original_number * self.area_scale
+            rendered = to_engineering(scaled, preferred_exp=self.area_exp)
+
+        return f"{name}{match.group('eq')}{rendered}", CHANGED
+
+    def _replace(self, match: re.Match[str]) -> str:
+        key = match.group(0)
+        hit = self._cache.get(key)
+        if hit is None:
+            hit = self.render(match)
+            if len(self._cache) >= self.cache_size:
+                self._cache.clear()
+            self._cache[key] = hit
+        text, outcome = hit
+        if outcome is not None:
+            self._counts[outcome] += 1
+        return text
+
+    def transform(self, text: str) -> str:
+        """Return text with recognized assignments scaled, updating counts."""
+        sub = GEOMETRY_ASSIGNMENT_RE.sub
+        replace = self._replace
+        output_lines: list[str] = []
+        append = output_lines.append
+
+        for line in text.splitlines(keepends=True):
+            # Full-line SPICE comments are left untouched.
+            if "=" not in line or line.lstrip().startswith("*"):
+                append(line)
+            else:
+                append(sub(replace, line))
+
+        self.changed = self._counts[CHANGED]
+        self.skipped_existing_units = self._counts[SKIPPED]
+        return "".join(output_lines)
 
-        changed += 1
-        return f"{name}{match.group('eq')}{rendered}"
 
-    output_lines: list[str] = []
-    for line in text.splitlines(keepends=True):
-        # Full-line SPICE comments are left untouched.
-        if line.lstrip().startswith("*"):
-            output_lines.append(line)
-        else:
-            output_lines.append(ASSIGNMENT_RE.sub(replace, line))
+def transform_text(text: str, scale: Decimal) -> tuple[str, int, int]:
+    """
+    Return transformed text, number changed, and number skipped because an
+    engineering suffix was already present.
+    """
+    scaler = GeometryScaler(scale)
+    transformed = scaler.transform(text)
+    return transformed, scaler.changed, scaler.skipped_existing_units
 
-    return "".join(output_lines), changed, skipped_existing_units
+
+def iter_chunks(stream: TextIO, chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    """
+    Yield text from stream in pieces of about chunk_size characters that end
+    on a line boundary, so each piece can be transformed independently.
+    """
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            return
+        if not chunk.endswith("\n"):
+            chunk += stream.readline()
+        yield chunk
+
+
+_worker_scaler: GeometryScaler | None = None
+
+
+def _init_worker(scale: Decimal) -> None:
+    global _worker_scaler
+    getcontext().prec = DECIMAL_PRECISION
+    _worker_scaler = GeometryScaler(scale)
+
+
+def _transform_chunk(chunk: str) -> tuple[str, int, int]:
+    scaler = _worker_scaler
+    before = scaler.changed, scaler.skipped_existing_units
+    transformed = scaler.transform(chunk)
+    return (
+        transformed,
+        scaler.changed - before[0],
+        scaler.skipped_existing_units - before[1],
+    )
+
+
+def transform_stream(
+    source: TextIO,
+    sink: TextIO,
+    scale: Decimal,
+    jobs: int = 1,
+    chunk_size: int = CHUNK_SIZE,
+) -> tuple[int, int]:
+    """
+    Stream source to sink chunk by chunk and return (changed, skipped).
+
+    With jobs > 1 the chunks are transformed in a process pool. At most
+    2 * jobs chunks are in flight and results are written in input order,
+    so memory stays bounded and the output matches the serial run.
+    """
+    chunks = iter_chunks(source, chunk_size)
+
+    if jobs <= 1:
+        scaler = GeometryScaler(scale)
+        for chunk in chunks:
+            sink.write(scaler.transform(chunk))
+        return scaler.changed, scaler.skipped_existing_units
+
+    changed = skipped = 0
+    pending: deque = deque()
+    with multiprocessing.Pool(jobs, _init_worker, (scale,)) as pool:
+        for chunk in chunks:
+            pending.append(pool.apply_async(_transform_chunk, (chunk,)))
+            if len(pending) < 2 * jobs:
+                continue
+            text, n_changed, n_skipped = pending.popleft().get()
+            sink.write(text)
+            changed += n_changed
+            skipped += n_skipped
+        while pending:
+            text, n_changed, n_skipped = pending.popleft().get()
+            sink.write(text)
+            changed += n_changed
+            skipped += n_skipped
+    return changed, skipped
 
 
 def default_output_path(input_path: Path) -> Path:
@@ -267,12 +417,50 @@ def build_parser() -> argparse.ArgumentParser:
         action="store_true",
         help="write transformed netlist to standard output",
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="transform chunks in N processes (default: 1)",
+    )
 
     return parser
 
 
+def write_scaled(
+    input_path: Path, output_path: Path, scale: Decimal, jobs: int
+) -> tuple[int, int]:
+    """
+    Stream input_path into output_path through a temporary file in the
+    output directory, replacing output_path only once the whole netlist was
+    written. Works when output_path is input_path.
+    """
+    fd, tmp_name = tempfile.mkstemp(
+        prefix=output_path.name + ".", suffix=".tmp", dir=output_path.parent
+    )
+    try:
+        with open(input_path, encoding="utf-8") as source, open(
+            fd, "w", encoding="utf-8"
+        ) as sink:
+            counts = transform_stream(source, sink, scale, jobs)
+        if output_path.exists():
+            os.chmod(tmp_name, output_path.stat().st_mode & 0o7777)
+        os.replace(tmp_name, output_path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+    return counts
+
+
 def main() -> int:
-    args = build_parser().parse_args()
+    parser = build_parser()
+    args = parser.parse_args()
+    if args.jobs < 1:
+        parser.error("--jobs must be >= 1")
 
     try:
         scale = parse_scale(args.scale)
@@ -285,36 +473,50 @@ def main() -> int:
         print(f"ERROR: input file does not exist: {input_path}", file=sys.stderr)
         return 2
 
-    try:
-        original = input_path.read_text(encoding="utf-8")
-    except (OSError, UnicodeError) as exc:
-        print(f"ERROR: cannot read {input_path}: {exc}", file=sys.stderr)
-        return 2
-
     with localcontext() as ctx:
-        ctx.prec = 50
-        transformed, changed, skipped = transform_text(original, scale)
-
-    if args.stdout:
-        sys.stdout.write(transformed)
-    elif args.in_place:
-        backup_path = input_path.with_name(input_path.name + ".bak")
-        try:
-            backup_path.write_text(original, encoding="utf-8")
-            input_path.write_text(transformed, encoding="utf-8")
-        except OSError as exc:
-            print(f"ERROR: cannot write output: {exc}", file=sys.stderr)
-            return 2
-        print(f"Wrote:  {input_path}", file=sys.stderr)
-        print(f"Backup: {backup_path}", file=sys.stderr)
-    else:
-        output_path = args.output or default_output_path(input_path)
-        try:
-            output_path.write_text(transformed, encoding="utf-8")
-        except OSError as exc:
-            print(f"ERROR: cannot write {output_path}: {exc}", file=sys.stderr)
-            return 2
-        print(f"Wrote: {output_path}", file=sys.stderr)
+        ctx.prec = DECIMAL_PRECISION
+
+        if args.stdout:
+            try:
+                with open(input_path, encoding="utf-8") as source:
+                    changed, skipped = transform_stream(
+                        source, sys.stdout, scale, args.jobs
+                    )
+            except (OSError, UnicodeError) as exc:
+                print(f"ERROR: cannot read {input_path}: {exc}", file=sys.stderr)
+                return 2
+        elif args.in_place:
+            backup_path = input_path.with_name(input_path.name + ".bak")
+            try:
+                with open(input_path, encoding="utf-8") as source, open(
+                    backup_path, "w", encoding="utf-8"
+                ) as backup:
+                    for chunk in iter_chunks(source):
+                        backup.write(chunk)
+                changed, skipped = write_scaled(
+                    backup_path, input_path, scale, args.jobs
+                )
+            except UnicodeError as exc:
+                print(f"ERROR: cannot read {input_path}: {exc}", file=sys.stderr)
+                return 2
+            except OSError as exc:
+                print(f"ERROR: cannot write output: {exc}", file=sys.stderr)
+                return 2
+            print(f"Wrote:  {input_path}", file=sys.stderr)
+            print(f"Backup: {backup_path}", file=sys.stderr)
+        else:
+            output_path = args.output or default_output_path(input_path)
+            try:
+                changed, skipped = write_scaled(
+                    input_path, output_path, scale, args.jobs
+                )
+            except UnicodeError as exc:
+                print(f"ERROR: cannot read {input_path}: {exc}", file=sys.stderr)
+                return 2
+            except OSError as exc:
+                print(f"ERROR: cannot write {output_path}: {exc}", file=sys.stderr)
+                return 2
+            print(f"Wrote: {output_path}", file=sys.stderr)
 
     print(f"Scaled parameter assignments: {changed}", file=sys.stderr)
     if skipped:
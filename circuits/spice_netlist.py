@@ -0,0 +1,673 @@
+#!/usr/bin/env python3
+"""
+Shared SPICE netlist reader for the circuits/ hierarchy tools.
+
+rpt_inst_path.py, report_hierarchy.py, map_pin_net.py and
+extr_subckt_spice.py all need the same things from a netlist:
+
+  * '+' continuation joining with '*' full-line comments removed
+  * .subckt / .ends scoping
+  * the instantiated cell name of every X-line
+
+This module does that in one streaming pass and can persist the result as a
+compact binary index in the user cache directory:
+
+    $XDG_CACHE_HOME/spice_netlist/<netlist>.<path digest>.hidx
+
+(~/.cache when XDG_CACHE_HOME is unset). Nothing is written next to the
+netlist, so shared and run directories are left untouched. The index holds
+the subckt table (name, byte offset of the .subckt line, byte offset just
+past the matching .ends line), the X-instance edge list as parallel integer
+arrays over one interned name table, and CSR children/parents adjacency
+over those arrays. It is keyed by the netlist's resolved path, size and
+mtime, so repeat queries against an unchanged netlist load the index
+instead of re-parsing the file. A stale, unreadable or unwritable cache is
+never an error; the netlist is simply parsed again.
+
+TrigramIndex gives the tools fast "did you mean" suggestions over interned
+names when a lookup misses.
+"""
+
+import hashlib
+import os
+import pickle
+import re
+import struct
+import sys
+from array import array
+from collections import Counter
+from difflib import SequenceMatcher
+from itertools import accumulate, compress, repeat
+
+
+SUBCKT_RE = re.compile(r'^\s*\.subckt\s+(\S+)\b', re.IGNORECASE)
+ENDS_RE   = re.compile(r'^\s*\.ends\b', re.IGNORECASE)
+XLINE_RE  = re.compile(r'^\s*x', re.IGNORECASE)
+
+PUNCT_TOKEN_RE = re.compile(r'[^A-Za-z0-9_.<>/\[\]-]+')
+
+CACHE_SUFFIX = ".hidx"
+CACHE_MAGIC = b"SPHIDX\x00\x02"
+
+# Parent id used for X-lines outside any .subckt.
+TOP_LEVEL = -1
+
+
+def strip_comment(line: str) -> str:
+    """
+    Remove '*' full-line comments and inline '//' comments.
+    """
+    s = line.rstrip("\n")
+
+    if s.lstrip().startswith("*"):
+        return ""
+
+    cut = s.find("//")
+    if cut >= 0:
+        s = s[:cut]
+    return s.rstrip()
+
+
+def strip_dollar_comment(line: str) -> str:
+    """
+    Remove '*' full-line comments and inline '$' comments (HSPICE style).
+    """
+    s = line.rstrip("\n")
+
+    if s.lstrip().startswith("*"):
+        return ""
+
+    if "$" in s:
+        s = s.split("$", 1)[0]
+    return s.rstrip()
+
+
+def iter_logical_lines(raw_lines, strip=strip_comment, errors="ignore"):
+    """
+    Join continuation lines starting with '+'.
+
+    raw_lines may yield str or bytes. Yields tuples:
+
+        (line_no, start, end, text)
+
+    line_no is the 1-based physical line number of the first line, and
+    start/end delimit the physical lines that make up the logical line
+    (byte offsets for bytes input, character offsets for str input).
+    Blank and comment-only lines are skipped.
+    """
+    buf = ""
+    buf_no = buf_start = buf_end = 0
+    offset = 0
+
+    for line_no, raw in enumerate(raw_lines, 1):
+        start = offset
+        offset += len(raw)
+
+        if isinstance(raw, bytes):
+            raw = raw.decode("utf-8", errors)
+
+        line = strip(raw)
+        stripped = line.lstrip()
+        if not stripped:
+            continue
+
+        if stripped.startswith("+"):
+            cont = stripped[1:].strip()
+            if buf:
+                buf += " " + cont
+            else:
+                # Continuation without a previous line; keep it as its own line.
+                buf = cont
+                buf_no = line_no
+                buf_start = start
+            buf_end = offset
+            continue
+
+        if buf:
+            yield buf_no, buf_start, buf_end, buf.strip()
+
+        buf = stripped.strip()
+        buf_no = line_no
+        buf_start = start
+        buf_end = offset
+
+    if buf:
+        yield buf_no, buf_start, buf_end, buf.strip()
+
+
+def logical_lines(lines, strip=strip_comment):
+    """
+    Join continuation lines starting with '+'; yield the joined text only.
+    """
+    for _line_no, _start, _end, text in iter_logical_lines(lines, strip=strip):
+        yield text
+
+
+def read_logical_lines(path, strip=strip_comment, errors="ignore"):
+    """
+    Stream (line_no, start, end, text) logical lines from a netlist file.
+
+    The file is read in binary mode so start/end are byte offsets.
+    """
+    with open(path, "rb") as f:
+        yield from iter_logical_lines(f, strip=strip, errors=errors)
+
+
+def extract_instantiated_cell(tokens):
+    """
+    Return the instantiated subckt name from an X-instance line.
+
+    Strategy:
+    - tokens[0] is the instance name
+    - scan from the right
+    - skip trailing metadata / params / options
+    - first remaining token is the instantiated subckt name
+    """
+    if len(tokens) < 2:
+        return None
+
+    for i in range(len(tokens) - 1, 0, -1):
+        t = tokens[i]
+
+        # SPICE/S-edit style metadata tokens: $, $m, $x=..., $y=..., etc.
+        if t.startswith("$"):
+            continue
+
+        # ordinary parameter assignments
+        if "=" in t and not t.startswith("="):
+            continue
+
+        # pure punctuation separators, if any
+        if PUNCT_TOKEN_RE.fullmatch(t):
+            continue
+
+        return t
+
+    return None
+
+
+def group_edges_csr(keys, n_keys, edge_ids):
+    """
+    Group edge ids by keys[edge] in compressed sparse row form.
+
+    Returns (start, edges): the edges with key k are
+    edges[start[k]:start[k + 1]], in the order they appear in edge_ids.
+    Counting, prefix sums and the stable sort all run in C iterators.
+    """
+    key_of = keys.__getitem__
+    counts = Counter(map(key_of, edge_ids))
+
+    start = array("q", [0])
+    start.extend(accumulate(map(counts.get, range(n_keys), repeat(0))))
+
+    edges = array("i", sorted(edge_ids, key=key_of))
+    return start, edges
+
+
+# (attribute, array typecode) of every array persisted in the cache, in order.
+INDEX_ARRAYS = (
+    ("subckt_ids", "i"),
+    ("subckt_start", "q"),
+    ("subckt_end", "q"),
+    ("edge_parent", "i"),
+    ("edge_inst", "i"),
+    ("edge_child", "i"),
+    ("child_start", "q"),
+    ("child_edges", "i"),
+    ("parent_start", "q"),
+    ("parent_edges", "i"),
+)
+
+# Linear name lookups allowed before name_id() builds a full dict.
+LINEAR_LOOKUPS = 32
+
+
+class HierarchyIndex(object):
+    """
+    Subckt table, X-instance edge list and adjacency of one netlist.
+
+    All names (cells and instance names) live in one interned table,
+    `names`; everything else is an integer id into it.
+
+      subckt_ids[k], subckt_start[k], subckt_end[k]
+          k-th defined .subckt in file order. start is the byte offset of
+          its .subckt line, end the offset just past its .ends line (-1 if
+          the .ends was never seen). Only the first definition is kept.
+
+      edge_parent[e], edge_inst[e], edge_child[e]
+          e-th parsed X-line in file order. edge_parent is TOP_LEVEL for
+          X-lines outside any .subckt.
+
+      child_start / child_edges
+          CSR children-by-parent: X-lines inside subckt id p are
+          child_edges[child_start[p]:child_start[p + 1]], in file order.
+          Includes primitive/non-subckt X-lines.
+
+      parent_start / parent_edges
+          CSR parents-by-child over X-lines (top-level ones included) whose
+          cell is a defined .subckt.
+    """
+
+    def __init__(self, names, subckt_ids, subckt_start, subckt_end,
+                 edge_parent, edge_inst, edge_child,
+                 child_start=None, child_edges=None,
+                 parent_start=None, parent_edges=None):
+        self.names = names
+        self.subckt_ids = subckt_ids
+        self.subckt_start = subckt_start
+        self.subckt_end = subckt_end
+        self.edge_parent = edge_parent
+        self.edge_inst = edge_inst
+        self.edge_child = edge_child
+        self.child_start = child_start
+        self.child_edges = child_edges
+        self.parent_start = parent_start
+        self.parent_edges = parent_edges
+        self._ids = None
+        self._linear_lookups = 0
+
+        if child_start is None:
+            self.build_adjacency()
+
+    @property
+    def edge_count(self):
+        return len(self.edge_inst)
+
+    def build_adjacency(self):
+        n_names = len(self.names)
+        n_edges = len(self.edge_child)
+        is_subckt = self.subckt_mask()
+
+        internal = array("i", compress(range(n_edges), map(TOP_LEVEL.__ne__, self.edge_parent)))
+        self.child_start, self.child_edges = group_edges_csr(self.edge_parent, n_names, internal)
+        del internal
+
+        to_subckt = array("i", compress(range(n_edges), map(is_subckt.__getitem__, self.edge_child)))
+        self.parent_start, self.parent_edges = group_edges_csr(self.edge_child, n_names, to_subckt)
+
+    def name_id(self, name):
+        """
+        Return the interned id of name, or None if it never appears.
+
+        The first few lookups scan the name table (fast, and avoids hashing
+        every name for a one-off query); after that a full dict is built.
+        """
+        if self._ids is None:
+            self._linear_lookups += 1
+            if self._linear_lookups <= LINEAR_LOOKUPS:
+                try:
+                    return self.names.index(name)
+                except ValueError:
+                    return None
+            self._ids = dict(zip(self.names, range(len(self.names))))
+        return self._ids.get(name)
+
+    def subckt_mask(self):
+        """Return a bytearray with 1 at the id of every defined .subckt."""
+        mask = bytearray(len(self.names))
+        for i in self.subckt_ids:
+            mask[i] = 1
+        return mask
+
+    def defined_subckts(self):
+        names = self.names
+        return {names[i] for i in self.subckt_ids}
+
+    def subckt_offsets(self):
+        """Return {subckt_name: (start, end)} byte offsets."""
+        names = self.names
+        return {
+            names[i]: (start, end)
+            for i, start, end in zip(self.subckt_ids, self.subckt_start, self.subckt_end)
+        }
+
+    def children(self, cell_id):
+        """Edge ids of the X-lines inside subckt cell_id."""
+        return self.child_edges[self.child_start[cell_id]:self.child_start[cell_id + 1]]
+
+    def parents(self, cell_id):
+        """Edge ids of the X-lines instantiating defined subckt cell_id."""
+        return self.parent_edges[self.parent_start[cell_id]:self.parent_start[cell_id + 1]]
+
+    def top_level_edges(self):
+        """Edge ids of X-lines outside any .subckt, in file order."""
+        return compress(range(len(self.edge_parent)), map(TOP_LEVEL.__eq__, self.edge_parent))
+
+    def iter_edges(self):
+        """Yield (parent_cell or None, inst_name, child_cell) in file order."""
+        names = self.names
+        for p, i, c in zip(self.edge_parent, self.edge_inst, self.edge_child):
+            yield (names[p] if p != TOP_LEVEL else None), names[i], names[c]
+
+
+def scan_hierarchy(path):
+    """
+    Parse the netlist in one streaming pass and return a HierarchyIndex.
+    """
+    names = []
+    ids = {}
+
+    def intern(name):
+        i = ids.get(name)
+        if i is None:
+            i = ids[name] = len(names)
+            names.append(name)
+        return i
+
+    subckt_ids = array("i")
+    subckt_start = array("q")
+    subckt_end = array("q")
+    slot_by_id = {}
+
+    edge_parent = array("i")
+    edge_inst = array("i")
+    edge_child = array("i")
+
+    current = TOP_LEVEL
+    current_slot = None
+
+    for _line_no, start, end, line in read_logical_lines(path):
+        m = SUBCKT_RE.match(line)
+        if m:
+            current = intern(m.group(1))
+            current_slot = None
+            if current not in slot_by_id:
+                current_slot = slot_by_id[current] = len(subckt_ids)
+                subckt_ids.append(current)
+                subckt_start.append(start)
+                subckt_end.append(-1)
+            continue
+
+        if ENDS_RE.match(line):
+            if current_slot is not None:
+                subckt_end[current_slot] = end
+            current = TOP_LEVEL
+            current_slot = None
+            continue
+
+        if XLINE_RE.match(line):
+            tokens = line.split()
+            if len(tokens) < 2:
+                continue
+
+            child_cell = extract_instantiated_cell(tokens)
+            if not child_cell:
+                continue
+
+            edge_parent.append(current)
+            edge_inst.append(intern(tokens[0]))
+            edge_child.append(intern(child_cell))
+
+    index = HierarchyIndex(
+        names, subckt_ids, subckt_start, subckt_end,
+        edge_parent, edge_inst, edge_child,
+    )
+    index._ids = ids
+    return index
+
+
+# ---------- Persistent cache ----------
+
+def user_cache_dir(tool):
+    """$XDG_CACHE_HOME/<tool>, or ~/.cache/<tool>."""
+    base = os.environ.get("XDG_CACHE_HOME")
+    return os.path.join(base or os.path.join(os.path.expanduser("~"), ".cache"), tool)
+
+
+def user_cache_path(cache_dir, path, suffix, variant=""):
+    """
+    Cache file in cache_dir for the file at path: one per resolved path
+    (and variant, e.g. a mode that changes the cached result), named
+    <basename>.<digest><suffix>. Validating it against the file's size and
+    mtime is up to the caller.
+    """
+    real_path = os.path.realpath(path)
+    key = real_path + "\0" + variant if variant else real_path
+    digest = hashlib.sha1(key.encode("utf-8", "surrogateescape")).hexdigest()[:16]
+    return os.path.join(cache_dir, f"{os.path.basename(real_path)}.{digest}{suffix}")
+
+
+def cache_path_for(path):
+    return user_cache_path(user_cache_dir("spice_netlist"), path, CACHE_SUFFIX)
+
+
+def netlist_stamp(path):
+    """
+    (size, mtime_ns) of path; a cache built from path is valid while this
+    is unchanged.
+    """
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns
+
+
+def load_pickle_cache(cache_path, version, stamp=None):
+    """
+    The object save_pickle_cache() wrote to cache_path with this version
+    and stamp, or None if there is none. Only read pickles from the user
+    cache directory; a pickle can run code when loaded.
+    """
+    try:
+        with open(cache_path, "rb") as f:
+            cached_version, cached_stamp, obj = pickle.load(f)
+    except (OSError, EOFError, ValueError, TypeError, ImportError,
+            AttributeError, pickle.UnpicklingError):
+        return None
+    if cached_version != version or cached_stamp != stamp:
+        return None
+    return obj
+
+
+def save_pickle_cache(cache_path, version, stamp, obj):
+    """
+    Atomically pickle obj to cache_path under version and stamp, creating
+    the directory on demand. Returns False if it could not be written.
+    """
+    tmp_path = f"{cache_path}.tmp{os.getpid()}"
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(tmp_path, "wb") as f:
+            pickle.dump((version, stamp, obj), f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except (OSError, AttributeError, pickle.PicklingError):
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        return False
+    return True
+
+
+def _write_array(f, arr):
+    f.write(struct.pack("<cq", arr.typecode.encode("ascii"), len(arr)))
+    arr.tofile(f)
+
+
+def _read_array(f, typecode):
+    code, count = struct.unpack("<cq", f.read(9))
+    if code.decode("ascii") != typecode:
+        raise ValueError("unexpected array type in cache")
+    arr = array(typecode)
+    arr.fromfile(f, count)
+    return arr
+
+
+def save_index(index, path, source_key=None, cache_path=None):
+    """
+    Write index for netlist `path`. Returns False if it could not be written.
+
+    source_key is the (size, mtime_ns) the index was built from; pass the
+    value taken before parsing so a netlist rewritten mid-parse is not
+    cached under its new mtime.
+    """
+    cache_path = cache_path or cache_path_for(path)
+    tmp_path = cache_path + ".tmp%d" % os.getpid()
+    blob = "\n".join(index.names).encode("utf-8")
+
+    try:
+        size, mtime_ns = source_key or netlist_stamp(path)
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(tmp_path, "wb") as f:
+            f.write(CACHE_MAGIC)
+            f.write(struct.pack("<qqcqq", size, mtime_ns, sys.byteorder[0].encode("ascii"),
+                                len(index.names), len(blob)))
+            f.write(blob)
+            for attr, _code in INDEX_ARRAYS:
+                _write_array(f, getattr(index, attr))
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        return False
+    return True
+
+
+def load_index(path, cache_path=None):
+    """
+    Return the cached HierarchyIndex for `path`, or None if there is no
+    cache or it does not match the netlist's current size and mtime.
+    """
+    cache_path = cache_path or cache_path_for(path)
+
+    try:
+        size, mtime_ns = netlist_stamp(path)
+        with open(cache_path, "rb") as f:
+            if f.read(len(CACHE_MAGIC)) != CACHE_MAGIC:
+                return None
+
+            header = struct.calcsize("<qqcqq")
+            c_size, c_mtime, order, n_names, blob_len = struct.unpack("<qqcqq", f.read(header))
+            if (c_size, c_mtime) != (size, mtime_ns):
+                return None
+            if order != sys.byteorder[0].encode("ascii"):
+                return None
+
+            names = f.read(blob_len).decode("utf-8").split("\n") if n_names else []
+            if len(names) != n_names:
+                return None
+
+            arrays = [_read_array(f, code) for _attr, code in INDEX_ARRAYS]
+    except (OSError, ValueError, EOFError, struct.error, UnicodeDecodeError):
+        return None
+
+    return HierarchyIndex(names, *arrays)
+
+
+def load_hierarchy(path, use_cache=True):
+    """
+    Return the HierarchyIndex for netlist `path`.
+
+    With use_cache, a valid cached index (cache_path_for) is loaded instead
+    of parsing, and a fresh parse is written back for the next run.
+    """
+    if use_cache:
+        index = load_index(path)
+        if index is not None:
+            return index
+
+    source_key = netlist_stamp(path)
+    index = scan_hierarchy(path)
+
+    if use_cache:
+        save_index(index, path, source_key)
+
+    return index
+
+
+# Candidate lists up to this size are ranked exhaustively with SequenceMatcher.
+EXACT_RANK_LIMIT = 2000
+
+# Trigram hits re-ranked with SequenceMatcher for each suggestion query.
+SHORTLIST_SIZE = 256
+
+# Postings entries examined per suggestion query, rarest trigrams first.
+HIT_BUDGET = 200000
+
+NAME_START = "\x02\x02"
+NAME_END = "\x03"
+
+
+def trigrams(text):
+    """
+    Return the set of padded character trigrams of text.
+
+    Two start markers and one end marker make prefixes count more than
+    suffixes, which suits instance names like XI12 / XI12_3.
+    """
+    padded = NAME_START + text + NAME_END
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TrigramIndex(object):
+    """
+    "Did you mean" index over a list of candidate names.
+
+    closest() ranks candidates by difflib SequenceMatcher ratio, best first,
+    ties by name. Up to EXACT_RANK_LIMIT candidates are ranked exhaustively.
+
+    Beyond that the first lookup builds a trigram -> postings map, each
+    posting list an ascending array of candidate ids. A lookup takes the
+    postings of the target's trigrams shortest first and counts, per name,
+    how many of them it appears in -- at most HIT_BUDGET postings in all.
+    The SHORTLIST_SIZE names sharing the most of those trigrams are ranked
+    with SequenceMatcher. Very common trigrams such as the leading "X" carry
+    no signal and are skipped, so the suggestions are approximate, but a
+    lookup touches only the postings it needs instead of every name in the
+    design.
+
+    key(name), if given, is the form compared against the target (e.g. with
+    a leading X dropped); the raw names are what closest() returns.
+    """
+
+    def __init__(self, candidates, key=None):
+        self.candidates = list(candidates)
+        self.keys = list(map(key, self.candidates)) if key else self.candidates
+        self.postings = None
+
+    def build(self):
+        postings = {}
+        for i, k in enumerate(self.keys):
+            for gram in trigrams(k):
+                ids = postings.get(gram)
+                if ids is None:
+                    ids = postings[gram] = array("i")
+                ids.append(i)
+        self.postings = postings
+
+    def shortlist(self, target):
+        if self.postings is None:
+            self.build()
+
+        postings = self.postings
+        lists = sorted(
+            (postings[g] for g in trigrams(target) if g in postings), key=len
+        )
+
+        hits = Counter()
+        budget = HIT_BUDGET
+        for ids in lists:
+            if len(ids) > budget:
+                if hits:
+                    break
+                ids = ids[:budget]
+            hits.update(ids)
+            budget -= len(ids)
+            if budget <= 0:
+                break
+
+        return [i for i, _n in hits.most_common(SHORTLIST_SIZE)]
+
+    def closest(self, target, limit=3):
+        if len(self.candidates) <= EXACT_RANK_LIMIT:
+            pool = range(len(self.candidates))
+        else:
+            pool = self.shortlist(target)
+
+        keys = self.keys
+        ranked = [
+            (SequenceMatcher(None, target, keys[i]).ratio(), self.candidates[i])
+            for i in pool
+        ]
+        ranked.sort(key=lambda item: (-item[0], item[1]))
+        return [cand for _ratio, cand in ranked[:limit]]
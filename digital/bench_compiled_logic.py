@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+
+"""
+Compare the gate-by-gate and --compile-logic forms of generated Verilog-A.
+
+Usage:
+
+    python3 bench_compiled_logic.py
+    python3 bench_compiled_logic.py --sizes 1000,10000 --vectors 65536
+    python3 bench_compiled_logic.py --verilog /path/to/cells.v
+
+Both forms of each module are generated, read back with
+simulate_veriloga_logic.py and evaluated on the same random input vectors
+(all vectors at once, one bit per vector); their outputs must be
+identical. The table reports the number of assignments and operators in
+the event block of each form and the time to evaluate the vectors.
+
+Generated netlists come from bench_order_gates.py; every gate output that
+no other gate reads is made a module output, so no logic is dead.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+from bench_order_gates import generate_module, parse_sizes
+from generate_veriloga_from_verilog import (
+    ConversionError,
+    Module,
+    extract_modules,
+    generate_verilog_a,
+    parse_module,
+    read_verilog_source,
+)
+from simulate_veriloga_logic import (
+    LogicModel,
+    SimulationError,
+    read_logic_model,
+    simulate,
+)
+
+
+OPERATOR_RE = re.compile(r"&&|\|\||\^|!")
+
+
+def expose_unread_outputs(module: Module) -> Module:
+    """Make every gate output that no gate reads a module output."""
+
+    read = {
+        signal
+        for gate in module.gates
+        for signal in gate.inputs
+    }
+
+    outputs = [
+        gate.output
+        for gate in module.gates
+        if gate.output not in read
+    ]
+
+    output_set = set(outputs)
+
+    module.ports = module.inputs + outputs
+    module.outputs = outputs
+    module.wires = [
+        gate.output
+        for gate in module.gates
+        if gate.output not in output_set
+    ]
+    return module
+
+
+def operator_count(model: LogicModel) -> int:
+    return sum(
+        len(OPERATOR_RE.findall(expression))
+        for _, expression in model.assignments
+    )
+
+
+def timed_simulation(
+    model: LogicModel,
+    input_values: dict[str, int],
+    width: int,
+) -> tuple[dict[str, int], float]:
+    start = time.perf_counter()
+    results = simulate(model, input_values, width)
+    return results, time.perf_counter() - start
+
+
+def compare_forms(
+    module: Module,
+    vectors: int,
+    seed: int,
+) -> tuple[str, bool]:
+    """Benchmark one module; return its table row and whether it matched."""
+
+    plain = read_logic_model(generate_verilog_a(module))
+    compiled = read_logic_model(
+        generate_verilog_a(module, compile_logic=True)
+    )
+
+    rng = random.Random(seed)
+    input_values = {
+        name: rng.getrandbits(vectors)
+        for name in plain.inputs
+    }
+
+    plain_results, plain_time = timed_simulation(
+        plain,
+        input_values,
+        vectors,
+    )
+    compiled_results, compiled_time = timed_simulation(
+        compiled,
+        input_values,
+        vectors,
+    )
+
+    matched = (
+        plain.outputs == compiled.outputs
+        and plain_results == compiled_results
+    )
+
+    row = (
+        f"{module.name[:24]:<24} {len(module.gates):>8}"
+        f" {len(plain.assignments):>8} {len(compiled.assignments):>8}"
+        f" {operator_count(plain):>8} {operator_count(compiled):>8}"
+        f" {plain_time:8.3f}s {compiled_time:8.3f}s"
+        f"  {'ok' if matched else 'MISMATCH'}"
+    )
+
+    return row, matched
+
+
+def read_modules(path: Path) -> list[Module]:
+    """Every module of a Verilog file that parses; others are skipped."""
+
+    modules: list[Module] = []
+
+    for extracted in extract_modules(read_verilog_source(path)):
+        try:
+            modules.append(parse_module(extracted))
+        except ConversionError:
+            pass
+
+    return modules
+
+
+def build_argument_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Check and compare gate-by-gate and compiled Verilog-A logic."
+        )
+    )
+    parser.add_argument(
+        "--sizes",
+        type=parse_sizes,
+        default=[1000, 10000, 100000],
+        help=(
+            "Comma-separated gate counts, k/M suffixes allowed "
+            "(default: 1k,10k,100k)"
+        ),
+    )
+    parser.add_argument(
+        "--verilog",
+        type=Path,
+        metavar="PATH",
+        help="Benchmark the modules of this file instead of generated ones",
+    )
+    parser.add_argument(
+        "--vectors",
+        type=int,
+        default=65536,
+        help="Random input vectors per module (default: 65536)",
+    )
+    parser.add_argument("--seed", type=int, default=1)
+    return parser
+
+
+def main() -> int:
+    args = build_argument_parser().parse_args()
+
+    if args.verilog is not None:
+        modules = read_modules(args.verilog)
+    else:
+        modules = [
+            expose_unread_outputs(generate_module(size, seed=args.seed))
+            for size in args.sizes
+        ]
+
+    print(
+        f"{'module':<24} {'gates':>8}"
+        f" {'assign':>8} {'(comp)':>8}"
+        f" {'ops':>8} {'(comp)':>8}"
+        f" {'sim':>9} {'(comp)':>9}"
+    )
+
+    mismatches = 0
+
+    for module in modules:
+        try:
+            row, matched = compare_forms(module, args.vectors, args.seed)
+        except (ConversionError, SimulationError) as error:
+            reason = str(error).splitlines()[0]
+            print(f"{module.name[:24]:<24} skipped: {reason}")
+            continue
+
+        print(row)
+        mismatches += not matched
+
+    if mismatches:
+        print(f"{mismatches} module(s) MISMATCHED", file=sys.stderr)
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
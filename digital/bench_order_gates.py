@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark order_gates() on generated gate-level netlists.
+
+Usage:
+
+    python3 bench_order_gates.py
+    python3 bench_order_gates.py --sizes 1000,10000,100000,1000000
+    python3 bench_order_gates.py --sizes 5000 --write-verilog /tmp/g5k.v
+
+Each netlist is a random combinational DAG of and/nand/or/nor/xor/xnor/
+not/buf primitives. Gates read mostly recent signals, so the logic is
+deep, and the statements are shuffled, so file order is unrelated to
+evaluation order. That is the worst case for the old scheduler, which
+swept the unscheduled gates once per logic level.
+
+For sizes up to --reference-limit the old sweep is also timed and its order
+compared with order_gates(); they must be identical.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+from generate_veriloga_from_verilog import (
+    ConversionError,
+    Gate,
+    Module,
+    order_gates,
+)
+
+
+PRIMITIVES = ["and", "nand", "or", "nor", "xor", "xnor", "not", "buf"]
+
+
+def generate_module(
+    gate_count: int,
+    seed: int = 1,
+    input_count: int = 32,
+    output_count: int = 8,
+    window: int = 64,
+) -> Module:
+    """
+    Return a random combinational module with gate_count primitives.
+
+    Gate i reads 1-3 signals chosen from the module inputs and the last
+    `window` gate outputs before it, then the gate list is shuffled.
+    """
+
+    rng = random.Random(seed)
+    inputs = [f"in{index}" for index in range(input_count)]
+    signals = list(inputs)
+    gates: list[Gate] = []
+
+    for index in range(gate_count):
+        primitive = rng.choice(PRIMITIVES)
+        fanin = 1 if primitive in {"not", "buf"} else rng.randint(2, 3)
+        low = max(0, len(signals) - window)
+
+        gate_inputs = [
+            signals[rng.randrange(low, len(signals))]
+            for _ in range(fanin)
+        ]
+
+        output = f"n{index}"
+        gates.append(
+            Gate(
+                primitive=primitive,
+                instance=f"g{index}",
+                output=output,
+                inputs=gate_inputs,
+            )
+        )
+        signals.append(output)
+
+    outputs = [gate.output for gate in gates[-output_count:]]
+    wires = [
+        gate.output
+        for gate in gates[:-output_count]
+    ]
+    rng.shuffle(gates)
+
+    return Module(
+        name=f"bench_{gate_count}",
+        ports=inputs + outputs,
+        inputs=inputs,
+        outputs=outputs,
+        wires=wires,
+        gates=gates,
+    )
+
+
+def module_to_verilog(module: Module) -> str:
+    """Render a generated module as structural Verilog."""
+
+    lines = [f"module {module.name} ({', '.join(module.ports)});"]
+    lines.append(f"  input {', '.join(module.inputs)};")
+    lines.append(f"  output {', '.join(module.outputs)};")
+
+    if module.wires:
+        lines.append(f"  wire {', '.join(module.wires)};")
+
+    for gate in module.gates:
+        lines.append(
+            f"  {gate.primitive} {gate.instance} "
+            f"({gate.output}, {', '.join(gate.inputs)});"
+        )
+
+    lines.append("endmodule")
+    lines.append("")
+    return "\n".join(lines)
+
+
+def sweep_order_gates(module: Module) -> list[Gate]:
+    """The previous scheduler: sweep the unscheduled gates until done."""
+
+    known_signals = set(module.inputs)
+    remaining = list(module.gates)
+    ordered: list[Gate] = []
+
+    while remaining:
+        unresolved: list[Gate] = []
+
+        for gate in remaining:
+            if all(signal in known_signals for signal in gate.inputs):
+                ordered.append(gate)
+                known_signals.add(gate.output)
+            else:
+                unresolved.append(gate)
+
+        if len(unresolved) == len(remaining):
+            raise ConversionError("sweep made no progress")
+
+        remaining = unresolved
+
+    return ordered
+
+
+SIZE_SUFFIXES = {"k": 1000, "m": 1000000}
+
+
+def parse_size(item: str) -> int:
+    """A gate count such as 5000, 10k or 1M."""
+
+    item = item.strip()
+    scale = SIZE_SUFFIXES.get(item[-1:].lower(), 1)
+
+    if scale != 1:
+        item = item[:-1]
+
+    return int(item) * scale
+
+
+def parse_sizes(text: str) -> list[int]:
+    try:
+        sizes = [parse_size(item) for item in text.split(",") if item.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"expected comma-separated gate counts such as 1k,10k, got {text!r}"
+        ) from None
+
+    if not sizes or min(sizes) < 1:
+        raise argparse.ArgumentTypeError("gate counts must be >= 1")
+
+    return sizes
+
+
+def build_argument_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Benchmark order_gates() on generated netlists."
+    )
+    parser.add_argument(
+        "--sizes",
+        type=parse_sizes,
+        default=[1000, 10000, 100000, 1000000],
+        help=(
+            "Comma-separated gate counts, k/M suffixes allowed "
+            "(default: 1k,10k,100k,1M)"
+        ),
+    )
+    parser.add_argument(
+        "--reference-limit",
+        type=int,
+        default=20000,
+        help="Also time and cross-check the old sweep up to this many gates",
+    )
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument(
+        "--write-verilog",
+        type=Path,
+        metavar="PATH",
+        help="Write the netlist of the last size to PATH",
+    )
+    return parser
+
+
+def main() -> int:
+    args = build_argument_parser().parse_args()
+
+    print(f"{'gates':>9} {'order_gates':>12} {'old sweep':>10}")
+
+    module = None
+
+    for size in args.sizes:
+        module = generate_module(size, seed=args.seed)
+
+        start = time.perf_counter()
+        ordered = order_gates(module)
+        elapsed = time.perf_counter() - start
+
+        reference = ""
+
+        if size <= args.reference_limit:
+            start = time.perf_counter()
+            expected = sweep_order_gates(module)
+            reference = f"{time.perf_counter() - start:9.3f}s"
+
+            if [id(gate) for gate in expected] != [id(gate) for gate in ordered]:
+                print(f"MISMATCH at {size} gates", file=sys.stderr)
+                return 1
+
+        print(f"{size:>9} {elapsed:11.3f}s {reference:>10}")
+
+    if args.write_verilog is not None and module is not None:
+        args.write_verilog.write_text(module_to_verilog(module), encoding="utf-8")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
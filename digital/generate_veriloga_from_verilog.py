@@ -23,6 +23,24 @@ Added ports default to inout. Explicit directions may be input, output, or
 inout. Added ports are electrical interface ports only; they are not decoded
 as Boolean logic inputs and do not create cross() events.
 
+Whole libraries:
+
+    python3 generate_veriloga_from_verilog.py /path/to/stdcells.v --jobs 8
+
+converts every module in a pool of worker processes. Parses are cached
+under $XDG_CACHE_HOME/generate_veriloga_from_verilog (or --cache-dir),
+keyed by content hash: an unchanged file skips tokenizing and module
+extraction, and only modules whose text changed are parsed again. A .va
+file whose content would not change is not rewritten.
+
+Compiled logic:
+
+    python3 generate_veriloga_from_verilog.py /path/to/cells.v --compile-logic
+
+evaluates the same Boolean functions with fewer, wider assignments; see
+compile_logic_assignments(). simulate_veriloga_logic.py evaluates the
+logic of a generated .va file of either form in Python.
+
 Supported Verilog primitives:
 
     and
@@ -53,15 +71,123 @@ Assumptions and limitations:
 from __future__ import annotations
 
 import argparse
+import gc
+import hashlib
+import multiprocessing
+import os
 import re
 import sys
-from dataclasses import dataclass
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Iterable
+from typing import Iterable, Iterator
+
+from user_cache import (
+    load_pickle_cache,
+    save_pickle_cache,
+    user_cache_dir,
+    user_cache_path,
+)
 
 
 IDENTIFIER_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_$]*$")
 
+IDENTIFIER_START = frozenset(
+    "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ_"
+)
+
+# One token per match. The leading part skips whitespace, comments and
+# specify blocks (comments inside a specify block are skipped with it, so
+# an 'endspecify' in a comment does not end the block). Each piece of the
+# specify body can match only one way, so an unterminated block fails in
+# linear time and is then read as ordinary tokens.
+TOKEN_RE = re.compile(
+    r"""
+    \s*
+    (?:
+        (?:
+            //[^\n]*(?![^\n])
+          | /\*(?:[^*]|\*(?!/))*\*/
+          | [sS](?<![\w$][sS])(?i:pecify)(?![\w$])
+            [^/eE]*
+            (?:
+                (?: //[^\n]*(?![^\n])
+                  | /\*(?:[^*]|\*(?!/))*\*/
+                  | /(?![/*])
+                  | (?<=[\w$])[eE]
+                  | (?<![\w$])[eE](?!(?i:ndspecify)(?![\w$]))
+                )
+                [^/eE]*
+            )*
+            (?i:endspecify)(?![\w$])
+        )
+        \s*
+    )*
+    (
+        [A-Za-z_][A-Za-z0-9_$]*
+      | \(
+        (?:\s*[A-Za-z_][A-Za-z0-9_$]*\s*,)*
+        \s*[A-Za-z_][A-Za-z0-9_$]*\s*
+        \)
+      | \\\S+
+      | [0-9'][\w$']*
+      | \S
+      | \Z
+    )
+    """,
+    flags=re.DOTALL | re.VERBOSE,
+)
+
+OPENING_DELIMITERS = frozenset("([{")
+CLOSING_DELIMITERS = frozenset(")]}")
+
+DECLARATION_KEYWORDS = {
+    "input",
+    "output",
+    "inout",
+    "wire",
+    "tri",
+    "wand",
+    "wor",
+}
+
+DECLARATION_MODIFIERS = {
+    "wire",
+    "reg",
+    "logic",
+    "signed",
+    "unsigned",
+    "tri",
+    "wand",
+    "wor",
+}
+
+CACHE_SUFFIX = ".vaparse"
+CACHE_VERSION = 2
+
+LOGIC_OPERATORS = {
+    "and": "&&",
+    "nand": "&&",
+    "or": "||",
+    "nor": "||",
+    "xor": "^",
+    "xnor": "^",
+}
+
+ASSOCIATIVE_PRIMITIVES = {"and", "or", "xor"}
+
+COMPLEMENT_PRIMITIVES = {
+    "and": "nand",
+    "nand": "and",
+    "or": "nor",
+    "nor": "or",
+    "xor": "xnor",
+    "xnor": "xor",
+}
+
+# Deepest nesting of inlined gates in one compiled assignment.
+COMPILED_MAX_DEPTH = 6
+
 SUPPORTED_PRIMITIVES = {
     "and",
     "nand",
@@ -94,9 +220,12 @@ class AddedPort:
 
 @dataclass
 class ExtractedModule:
+    """A module's tokens, split at the header; see tokenize()."""
+
     name: str
-    port_header: str
-    body: str
+    port_header: list[str]
+    body: list[str]
+    parameterized: bool = False
 
 
 @dataclass
@@ -109,46 +238,123 @@ class Module:
     gates: list[Gate]
 
 
-def remove_comments(text: str) -> str:
-    """Remove Verilog // and /* ... */ comments."""
+@dataclass
+class LogicAssignment:
+    """
+    One `logic_<target> = <expression>;` line of the generated event
+    block; see logic_expression_text() for the expression form.
+    """
 
-    text = re.sub(r"/\*.*?\*/", "", text, flags=re.DOTALL)
-    text = re.sub(r"//[^\n]*", "", text)
-    return text
+    target: str
+    expression: str | tuple
+    comment: str
 
 
-def remove_specify_blocks(text: str) -> str:
-    """Remove specify ... endspecify blocks."""
+@dataclass
+class ParseCache:
+    """
+    Parses of one input file, keyed by content hash.
 
-    return re.sub(
-        r"\bspecify\b.*?\bendspecify\b",
-        "",
-        text,
-        flags=re.IGNORECASE | re.DOTALL,
-    )
+    source_digest is the hash of the raw file text that produced
+    `extracted`; `parsed` maps module_digest() of an ExtractedModule to its
+    Module, or to the ConversionError message it was skipped with.
+    """
+
+    source_digest: str = ""
+    extracted: list[ExtractedModule] = field(default_factory=list)
+    parsed: dict[str, Module | str] = field(default_factory=dict)
+
+
+@dataclass
+class ConversionResult:
+    """Outcome of converting one extracted module."""
+
+    name: str
+    digest: str
+    parsed: Module | str
+    output_path: Path | None = None
+    error: str | None = None
+    already_present: list[str] = field(default_factory=list)
+    added_port_count: int = 0
+
+
+@contextmanager
+def gc_paused() -> Iterator[None]:
+    """
+    Suspend the cyclic garbage collector. Parsing builds millions of small,
+    acyclic lists and Gate objects, and the collector's repeated scans of
+    them otherwise take about as long as the parsing itself.
+    """
+
+    was_enabled = gc.isenabled()
+    gc.disable()
+
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
+
+
+def tokenize(source: str) -> list[str]:
+    """
+    Split Verilog source into tokens in a single pass.
+
+    Whitespace, // and /* ... */ comments, and specify ... endspecify
+    blocks are dropped. A parenthesized list of plain identifiers, such as
+    the terminals of a gate, is kept as one token: '(y, a, b)'.
+    """
+
+    tokens = TOKEN_RE.findall(source)
+
+    while tokens and not tokens[-1]:
+        tokens.pop()
+
+    return tokens
+
+
+def is_identifier_list(token: str) -> bool:
+    """True for a '(a, b, c)' token."""
+
+    return len(token) > 1 and token[0] == "("
+
+
+def split_identifier_list(token: str) -> list[str]:
+    """Return the names in a '(a, b, c)' token."""
+
+    return "".join(token.split())[1:-1].split(",")
+
+
+def source_excerpt(tokens: list[str]) -> str:
+    """Up to 100 characters of token text for error messages."""
+
+    return " ".join(tokens[:100])[:100]
 
 
 def find_matching_delimiter(
-    text: str,
+    tokens: list[str],
     opening_index: int,
     opening_char: str,
     closing_char: str,
 ) -> int:
     """Return the matching closing-delimiter index."""
 
-    if opening_index >= len(text) or text[opening_index] != opening_char:
+    if (
+        opening_index >= len(tokens)
+        or tokens[opening_index] != opening_char
+    ):
         raise ValueError(
             f"opening_index does not point to {opening_char!r}"
         )
 
     depth = 0
 
-    for index in range(opening_index, len(text)):
-        char = text[index]
+    for index in range(opening_index, len(tokens)):
+        token = tokens[index]
 
-        if char == opening_char:
+        if token == opening_char:
             depth += 1
-        elif char == closing_char:
+        elif token == closing_char:
             depth -= 1
 
             if depth == 0:
@@ -157,112 +363,42 @@ def find_matching_delimiter(
     raise ConversionError(f"Unmatched {opening_char!r} delimiter")
 
 
-def find_matching_parenthesis(text: str, opening_index: int) -> int:
-    """Return the ')' matching text[opening_index] == '('."""
-
-    return find_matching_delimiter(text, opening_index, "(", ")")
-
-
-def skip_whitespace(text: str, index: int) -> int:
-    """Advance index past whitespace."""
+def find_matching_parenthesis(tokens: list[str], opening_index: int) -> int:
+    """
+    Return the ')' matching tokens[opening_index]. An identifier-list
+    token is its own match.
+    """
 
-    while index < len(text) and text[index].isspace():
-        index += 1
+    if is_identifier_list(tokens[opening_index]):
+        return opening_index
 
-    return index
+    return find_matching_delimiter(tokens, opening_index, "(", ")")
 
 
-def split_top_level_commas(text: str) -> list[str]:
+def split_top_level_commas(tokens: list[str]) -> list[list[str]]:
     """Split at commas outside parentheses, brackets, and braces."""
 
-    result: list[str] = []
+    result: list[list[str]] = []
     start = 0
+    depth = 0
 
-    paren_depth = 0
-    bracket_depth = 0
-    brace_depth = 0
-
-    for index, char in enumerate(text):
-        if char == "(":
-            paren_depth += 1
-        elif char == ")":
-            paren_depth -= 1
-        elif char == "[":
-            bracket_depth += 1
-        elif char == "]":
-            bracket_depth -= 1
-        elif char == "{":
-            brace_depth += 1
-        elif char == "}":
-            brace_depth -= 1
-        elif (
-            char == ","
-            and paren_depth == 0
-            and bracket_depth == 0
-            and brace_depth == 0
-        ):
-            item = text[start:index].strip()
-
-            if item:
-                result.append(item)
+    for index, token in enumerate(tokens):
+        if token in OPENING_DELIMITERS:
+            depth += 1
+        elif token in CLOSING_DELIMITERS:
+            depth -= 1
+        elif token == "," and depth == 0:
+            if index > start:
+                result.append(tokens[start:index])
 
             start = index + 1
 
-    final_item = text[start:].strip()
-
-    if final_item:
-        result.append(final_item)
+    if len(tokens) > start:
+        result.append(tokens[start:])
 
     return result
 
 
-def split_statements(body: str) -> list[str]:
-    """Split a module body into semicolon-terminated statements."""
-
-    statements: list[str] = []
-    start = 0
-
-    paren_depth = 0
-    bracket_depth = 0
-    brace_depth = 0
-
-    for index, char in enumerate(body):
-        if char == "(":
-            paren_depth += 1
-        elif char == ")":
-            paren_depth -= 1
-        elif char == "[":
-            bracket_depth += 1
-        elif char == "]":
-            bracket_depth -= 1
-        elif char == "{":
-            brace_depth += 1
-        elif char == "}":
-            brace_depth -= 1
-        elif (
-            char == ";"
-            and paren_depth == 0
-            and bracket_depth == 0
-            and brace_depth == 0
-        ):
-            statement = body[start:index].strip()
-
-            if statement:
-                statements.append(statement)
-
-            start = index + 1
-
-    remainder = body[start:].strip()
-
-    if remainder:
-        raise ConversionError(
-            "Unterminated or unsupported statement near "
-            f"{remainder[:100]!r}"
-        )
-
-    return statements
-
-
 def unique_preserving_order(items: Iterable[str]) -> list[str]:
     """Remove duplicates while preserving order."""
 
@@ -354,9 +490,11 @@ def parse_addports_spec(spec: str | None) -> list[AddedPort]:
     return added_ports
 
 
+@gc_paused()
 def extract_modules(source: str) -> list[ExtractedModule]:
     """
-    Extract modules without validating their contents.
+    Tokenize the source and extract modules without validating their
+    contents.
 
     Recognizes both:
 
@@ -364,104 +502,108 @@ def extract_modules(source: str) -> list[ExtractedModule]:
         module name;
     """
 
-    modules: list[ExtractedModule] = []
-    position = 0
+    tokens = tokenize(source)
+    token_count = len(tokens)
 
-    module_start_re = re.compile(
-        r"\bmodule\s+([A-Za-z_][A-Za-z0-9_$]*)",
-        flags=re.IGNORECASE,
-    )
+    # module/endmodule are found with list.index(). Only when some other
+    # spelling (MODULE, EndModule, ...) occurs is a case-folded copy of
+    # the token list searched instead.
+    keys = tokens
 
-    endmodule_re = re.compile(
-        r"\bendmodule\b",
-        flags=re.IGNORECASE,
-    )
+    if source.lower().count("module") != source.count("module"):
+        keys = [token.lower() for token in tokens]
 
-    while True:
-        module_match = module_start_re.search(source, position)
+    modules: list[ExtractedModule] = []
+    position = 0
 
-        if not module_match:
+    while True:
+        try:
+            module_index = keys.index("module", position)
+        except ValueError:
             break
 
-        module_name = module_match.group(1)
-        index = skip_whitespace(source, module_match.end())
+        index = module_index + 1
 
-        if index >= len(source):
+        if (
+            index >= token_count
+            or tokens[index][0] not in IDENTIFIER_START
+        ):
+            position = index
+            continue
+
+        module_name = tokens[index]
+        index += 1
+
+        if index >= token_count:
             raise ConversionError(
                 f"Module {module_name!r} has an incomplete declaration"
             )
 
         parameterized = False
 
-        if source[index] == "#":
+        if tokens[index] == "#":
             parameterized = True
             index += 1
-            index = skip_whitespace(source, index)
 
-            if index >= len(source) or source[index] != "(":
+            if index >= token_count or tokens[index][0] != "(":
                 raise ConversionError(
                     f"Could not parse parameter list of module "
                     f"{module_name!r}"
                 )
 
-            parameter_end = find_matching_parenthesis(source, index)
-            index = skip_whitespace(source, parameter_end + 1)
+            index = find_matching_parenthesis(tokens, index) + 1
 
-        if index < len(source) and source[index] == "(":
-            port_end = find_matching_parenthesis(source, index)
-            port_header = source[index + 1:port_end]
-            semicolon_index = skip_whitespace(source, port_end + 1)
+        if index < token_count and tokens[index][0] == "(":
+            port_end = find_matching_parenthesis(tokens, index)
+
+            if port_end == index:
+                port_header = tokenize(tokens[index][1:-1])
+            else:
+                port_header = tokens[index + 1:port_end]
+
+            semicolon_index = port_end + 1
 
             if (
-                semicolon_index >= len(source)
-                or source[semicolon_index] != ";"
+                semicolon_index >= token_count
+                or tokens[semicolon_index] != ";"
             ):
                 raise ConversionError(
                     f"Expected ';' after port list of module "
                     f"{module_name!r}"
                 )
 
-        elif index < len(source) and source[index] == ";":
-            port_header = ""
+        elif index < token_count and tokens[index] == ";":
+            port_header = []
             semicolon_index = index
 
         else:
-            semicolon_index = source.find(";", index)
-
-            if semicolon_index < 0:
+            try:
+                semicolon_index = tokens.index(";", index)
+            except ValueError:
                 raise ConversionError(
                     f"Could not find declaration terminator for module "
                     f"{module_name!r}"
-                )
-
-            port_header = ""
+                ) from None
 
-        end_match = endmodule_re.search(
-            source,
-            semicolon_index + 1,
-        )
+            port_header = []
 
-        if not end_match:
+        try:
+            end_index = keys.index("endmodule", semicolon_index + 1)
+        except ValueError:
             raise ConversionError(
                 f"No endmodule found for module {module_name!r}"
-            )
-
-        body = source[
-            semicolon_index + 1:end_match.start()
-        ]
-
-        if parameterized:
-            port_header = "__PARAMETERIZED_MODULE__" + port_header
+            ) from None
 
         modules.append(
             ExtractedModule(
                 name=module_name,
                 port_header=port_header,
-                body=body,
+                body=tokens[semicolon_index + 1:end_index],
+                parameterized=parameterized,
             )
         )
 
-        position = end_match.end()
+        position = end_index + 1
 
     return modules
 
@@ -480,46 +622,63 @@ def find_extracted_module(
 
 
 def parse_declared_names(
-    declaration: str,
+    declaration: list[str],
     declaration_type: str,
 ) -> list[str]:
-    """Parse names from an input/output/wire declaration."""
+    """Parse names from the tokens of an input/output/wire declaration."""
 
-    declaration = declaration.strip()
+    # The usual 'a' or 'a, b, c': names separated by commas. A token that
+    # starts like an identifier is one (see TOKEN_RE).
+    if len(declaration) == 1:
+        names = declaration
+    else:
+        names = declaration[::2]
+
+        if declaration[1::2].count(",") != len(names) - 1:
+            names = []
+
+    if (
+        len(declaration) % 2 == 1
+        and names
+        and all(
+            name[0] in IDENTIFIER_START
+            and name.lower() not in DECLARATION_MODIFIERS
+            for name in names
+        )
+    ):
+        return names
 
     if "[" in declaration or "]" in declaration:
         raise ConversionError(
             f"Vector {declaration_type} declarations are not supported: "
-            f"{declaration!r}"
+            f"{' '.join(declaration)!r}"
         )
 
-    declaration = re.sub(
-        r"\b(?:wire|reg|logic|signed|unsigned|tri|wand|wor)\b",
-        " ",
-        declaration,
-        flags=re.IGNORECASE,
-    )
-
-    names: list[str] = []
+    names = []
 
     for item in split_top_level_commas(declaration):
-        item = item.strip()
+        item = [
+            token
+            for token in item
+            if token.lower() not in DECLARATION_MODIFIERS
+        ]
+
+        if not item:
+            continue
 
         if "=" in item:
             raise ConversionError(
                 f"Initialized {declaration_type} declaration is not "
-                f"supported: {item!r}"
+                f"supported: {' '.join(item)!r}"
             )
 
-        tokens = item.split()
-
-        if len(tokens) != 1:
+        if len(item) != 1:
             raise ConversionError(
                 f"Could not parse {declaration_type} declaration item "
-                f"{item!r}"
+                f"{' '.join(item)!r}"
             )
 
-        name = tokens[0]
+        name = item[0]
         validate_identifier(name, declaration_type)
         names.append(name)
 
@@ -527,7 +686,7 @@ def parse_declared_names(
 
 
 def parse_ansi_port_header(
-    port_header: str,
+    port_header: list[str],
 ) -> tuple[list[str], list[str], list[str], bool]:
     """Attempt to parse an ANSI-style port header."""
 
@@ -543,20 +702,16 @@ def parse_ansi_port_header(
     current_direction: str | None = None
 
     for item in items:
-        direction_match = re.match(
-            r"^(input|output|inout)\b(.*)$",
-            item.strip(),
-            flags=re.IGNORECASE | re.DOTALL,
-        )
+        first_word = item[0].lower()
 
-        if direction_match:
-            current_direction = direction_match.group(1).lower()
-            declaration = direction_match.group(2).strip()
+        if first_word in {"input", "output", "inout"}:
+            current_direction = first_word
+            declaration = item[1:]
         else:
             if current_direction is None:
                 return [], [], [], False
 
-            declaration = item.strip()
+            declaration = item
 
         if current_direction == "inout":
             raise ConversionError(
@@ -579,116 +734,138 @@ def parse_ansi_port_header(
     return ports, inputs, outputs, True
 
 
-def parse_non_ansi_port_header(port_header: str) -> list[str]:
+def parse_non_ansi_port_header(port_header: list[str]) -> list[str]:
     """Parse a traditional module port header."""
 
     ports: list[str] = []
 
     for item in split_top_level_commas(port_header):
-        name = item.strip()
+        name = " ".join(item)
         validate_identifier(name, "port")
         ports.append(name)
 
     return ports
 
 
-def parse_gate_statement(
-    statement: str,
-    generated_index: int,
-) -> list[Gate]:
-    """Parse one structural primitive statement."""
+def make_gate(
+    primitive: str,
+    instance_name: str,
+    connections: list[str],
+) -> Gate:
+    """Check the terminal count of one primitive instance."""
 
-    primitive_match = re.match(
-        r"^(and|nand|or|nor|xor|xnor|not|buf)\b(.*)$",
-        statement,
-        flags=re.IGNORECASE | re.DOTALL,
+    minimum_terminal_count = (
+        2 if primitive in {"not", "buf"} else 3
     )
 
-    if not primitive_match:
+    if len(connections) < minimum_terminal_count:
         raise ConversionError(
-            f"Unsupported primitive statement {statement[:100]!r}"
+            f"Primitive {primitive!r}, instance "
+            f"{instance_name!r}, requires at least "
+            f"{minimum_terminal_count} terminals"
         )
 
-    primitive = primitive_match.group(1).lower()
-    remainder = primitive_match.group(2).strip()
+    gate_output = connections[0]
+    gate_inputs = connections[1:]
 
-    if remainder.startswith("#"):
+    if primitive in {"not", "buf"} and len(gate_inputs) != 1:
         raise ConversionError(
-            f"Primitive delay specification is not supported in "
-            f"{statement[:100]!r}"
+            f"Primitive {primitive!r}, instance "
+            f"{instance_name!r}, must have exactly one input"
         )
 
-    instance_chunks = split_top_level_commas(remainder)
-    gates: list[Gate] = []
+    return Gate(
+        primitive=primitive,
+        instance=instance_name,
+        output=gate_output,
+        inputs=gate_inputs,
+    )
 
-    for chunk_number, chunk in enumerate(instance_chunks, start=1):
-        chunk = chunk.strip()
 
-        instance_match = re.fullmatch(
-            r"(?:(?P<name>[A-Za-z_][A-Za-z0-9_$]*)\s*)?"
-            r"\((?P<connections>.*)\)",
-            chunk,
-            flags=re.DOTALL,
+def parse_gate_instance(
+    primitive: str,
+    chunk: list[str],
+) -> tuple[str | None, list[str]]:
+    """Split the tokens of 'name (a, b, c)' into name and connections."""
+
+    instance_name: str | None = None
+    terminals = chunk
+
+    if chunk[0][0] in IDENTIFIER_START:
+        instance_name = chunk[0]
+        terminals = chunk[1:]
+
+    if len(terminals) == 1 and is_identifier_list(terminals[0]):
+        return instance_name, split_identifier_list(terminals[0])
+
+    if (
+        len(terminals) < 2
+        or terminals[0] != "("
+        or terminals[-1] != ")"
+    ):
+        raise ConversionError(
+            f"Could not parse {primitive} primitive instance "
+            f"{' '.join(chunk)!r}"
         )
 
-        if not instance_match:
-            raise ConversionError(
-                f"Could not parse {primitive} primitive instance "
-                f"{chunk!r}"
-            )
+    connections = [
+        " ".join(item)
+        for item in split_top_level_commas(terminals[1:-1])
+    ]
 
-        instance_name = instance_match.group("name")
+    for connection in connections:
+        validate_identifier(
+            connection,
+            "primitive connection",
+        )
 
-        if instance_name is None:
-            instance_name = (
-                f"unnamed_{primitive}_{generated_index}_{chunk_number}"
-            )
+    return instance_name, connections
 
-        connections = [
-            item.strip()
-            for item in split_top_level_commas(
-                instance_match.group("connections")
-            )
-        ]
 
-        minimum_terminal_count = (
-            2 if primitive in {"not", "buf"} else 3
+def parse_gate_statement(
+    statement: list[str],
+    generated_index: int,
+) -> list[Gate]:
+    """Parse the tokens of one structural primitive statement."""
+
+    primitive = statement[0].lower()
+
+    if primitive not in SUPPORTED_PRIMITIVES:
+        raise ConversionError(
+            f"Unsupported primitive statement "
+            f"{source_excerpt(statement)!r}"
         )
 
-        if len(connections) < minimum_terminal_count:
-            raise ConversionError(
-                f"Primitive {primitive!r}, instance "
-                f"{instance_name!r}, requires at least "
-                f"{minimum_terminal_count} terminals"
-            )
+    if len(statement) > 1 and statement[1] == "#":
+        raise ConversionError(
+            f"Primitive delay specification is not supported in "
+            f"{source_excerpt(statement)!r}"
+        )
 
-        for connection in connections:
-            validate_identifier(
-                connection,
-                "primitive connection",
-            )
+    gates: list[Gate] = []
 
-        gate_output = connections[0]
-        gate_inputs = connections[1:]
+    for chunk_number, chunk in enumerate(
+        split_top_level_commas(statement[1:]),
+        start=1,
+    ):
+        instance_name, connections = parse_gate_instance(
+            primitive,
+            chunk,
+        )
 
-        if primitive in {"not", "buf"} and len(gate_inputs) != 1:
-            raise ConversionError(
-                f"Primitive {primitive!r}, instance "
-                f"{instance_name!r}, must have exactly one input"
+        if instance_name is None:
+            instance_name = (
+                f"unnamed_{primitive}_{generated_index}_{chunk_number}"
             )
 
         gates.append(
-            Gate(
-                primitive=primitive,
-                instance=instance_name,
-                output=gate_output,
-                inputs=gate_inputs,
-            )
+            make_gate(primitive, instance_name, connections)
         )
 
     return gates
 
 
+@gc_paused()
 def parse_module(extracted: ExtractedModule) -> Module:
     """Parse one extracted structural Verilog module."""
 
@@ -696,12 +873,12 @@ def parse_module(extracted: ExtractedModule) -> Module:
     port_header = extracted.port_header
     body = extracted.body
 
-    if port_header.startswith("__PARAMETERIZED_MODULE__"):
+    if extracted.parameterized:
         raise ConversionError(
             "Parameterized module declarations are not supported"
         )
 
-    if not port_header.strip():
+    if not port_header:
         raise ConversionError(
             "Module has no ports and is not a convertible logic cell"
         )
@@ -725,58 +902,88 @@ def parse_module(extracted: ExtractedModule) -> Module:
     wires: list[str] = []
     gates: list[Gate] = []
 
-    statements = split_statements(body)
+    declared_names = {"input": inputs, "output": outputs}
 
-    for statement_index, statement in enumerate(
-        statements,
-        start=1,
-    ):
-        declaration_match = re.match(
-            r"^(input|output|inout|wire|tri|wand|wor)\b(.*)$",
-            statement,
-            flags=re.IGNORECASE | re.DOTALL,
-        )
+    body_length = len(body)
+    position = 0
+    statement_index = 0
+
+    while position < body_length:
+        try:
+            end = body.index(";", position)
+        except ValueError:
+            raise ConversionError(
+                "Unterminated or unsupported statement near "
+                f"{source_excerpt(body[position:])!r}"
+            ) from None
+
+        if end == position:
+            position += 1
+            continue
+
+        statement_index += 1
+        first_word = body[position].lower()
+        statement_length = end - position
+
+        # Netlists are mostly 'and u1 (y, a, b);' and 'wire n1;'. Both are
+        # handled here without slicing out the statement.
+        if (
+            statement_length == 3
+            and first_word in SUPPORTED_PRIMITIVES
+            and body[position + 1][0] in IDENTIFIER_START
+            and is_identifier_list(body[position + 2])
+        ):
+            gates.append(
+                make_gate(
+                    first_word,
+                    body[position + 1],
+                    split_identifier_list(body[position + 2]),
+                )
+            )
+            position = end + 1
+            continue
+
+        if (
+            statement_length == 2
+            and first_word in DECLARATION_KEYWORDS
+            and first_word != "inout"
+            and body[position + 1][0] in IDENTIFIER_START
+            and body[position + 1].lower() not in DECLARATION_MODIFIERS
+        ):
+            declared_names.get(first_word, wires).append(body[position + 1])
+            position = end + 1
+            continue
 
-        if declaration_match:
-            declaration_type = declaration_match.group(1).lower()
-            declaration_body = declaration_match.group(2)
+        statement = body[position:end]
+        position = end + 1
+
+        if first_word in DECLARATION_KEYWORDS:
+            declaration_type = first_word
 
             if declaration_type == "inout":
                 raise ConversionError(
                     "inout logic ports are not supported in the source module"
                 )
 
-            names = parse_declared_names(
-                declaration_body,
-                declaration_type,
+            declared_names.get(declaration_type, wires).extend(
+                parse_declared_names(
+                    statement[1:],
+                    declaration_type,
+                )
             )
 
-            if declaration_type == "input":
-                inputs.extend(names)
-            elif declaration_type == "output":
-                outputs.extend(names)
-            else:
-                wires.extend(names)
-
             continue
 
-        first_word_match = re.match(
-            r"^([A-Za-z_][A-Za-z0-9_$]*)\b",
-            statement,
-        )
-
-        if not first_word_match:
+        if first_word[0] not in IDENTIFIER_START:
             raise ConversionError(
                 f"Could not identify statement "
-                f"{statement[:100]!r}"
+                f"{source_excerpt(statement)!r}"
             )
 
-        first_word = first_word_match.group(1).lower()
-
         if first_word not in SUPPORTED_PRIMITIVES:
             raise ConversionError(
                 f"Unsupported statement beginning with "
-                f"{first_word!r}: {statement[:100]!r}"
+                f"{first_word!r}: {source_excerpt(statement)!r}"
             )
 
         gates.extend(
@@ -846,14 +1053,199 @@ def parse_module(extracted: ExtractedModule) -> Module:
     )
 
 
+def strongly_connected_components(
+    nodes: Iterable[int],
+    successors,
+) -> list[list[int]]:
+    """
+    Tarjan's algorithm on an explicit stack.
+
+    successors(node) returns the nodes an edge leads to. Components are
+    returned in reverse topological order.
+    """
+
+    index_of: dict[int, int] = {}
+    lowlink: dict[int, int] = {}
+    on_stack: set[int] = set()
+    stack: list[int] = []
+    components: list[list[int]] = []
+
+    for root in nodes:
+        if root in index_of:
+            continue
+
+        index_of[root] = lowlink[root] = len(index_of)
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(successors(root)))]
+
+        while work:
+            node, pending = work[-1]
+
+            for successor in pending:
+                if successor not in index_of:
+                    index_of[successor] = lowlink[successor] = len(index_of)
+                    stack.append(successor)
+                    on_stack.add(successor)
+                    work.append((successor, iter(successors(successor))))
+                    break
+
+                if successor in on_stack:
+                    lowlink[node] = min(lowlink[node], index_of[successor])
+            else:
+                work.pop()
+
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+
+                if lowlink[node] == index_of[node]:
+                    component: list[int] = []
+
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+
+                        if member == node:
+                            break
+
+                    components.append(component)
+
+    return components
+
+
+def find_cycle(
+    start: int,
+    members: set[int],
+    successors,
+) -> list[int]:
+    """Return a shortest cycle start -> ... -> start inside members."""
+
+    parent: dict[int, int] = {}
+    frontier = [start]
+
+    while frontier:
+        next_frontier: list[int] = []
+
+        for node in frontier:
+            for successor in successors(node):
+                if successor not in members:
+                    continue
+
+                if successor == start:
+                    cycle = [start]
+
+                    while node != start:
+                        cycle.append(node)
+                        node = parent[node]
+
+                    cycle.append(start)
+                    cycle.reverse()
+                    return cycle
+
+                if successor not in parent:
+                    parent[successor] = node
+                    next_frontier.append(successor)
+
+        frontier = next_frontier
+
+    return [start]
+
+
+def describe_unresolved_gates(
+    gates: list[Gate],
+    unresolved: list[int],
+    fanout: list[list[int]],
+    undriven: dict[str, list[int]],
+) -> list[str]:
+    """
+    Explain why gates could not be scheduled: undriven signals, then each
+    combinational loop (a strongly connected component, shown as one of
+    its cycles), then the gates that only wait on those.
+    """
+
+    unresolved_set = set(unresolved)
+    explained: set[int] = set()
+    details: list[str] = []
+
+    def successors(index: int) -> list[int]:
+        return [
+            consumer
+            for consumer in fanout[index]
+            if consumer in unresolved_set
+        ]
+
+    for signal, readers in undriven.items():
+        explained.update(readers)
+        details.append(
+            f"undriven signal {signal!r} read by "
+            + ", ".join(gates[index].instance for index in readers)
+        )
+
+    components = strongly_connected_components(unresolved, successors)
+
+    for component in sorted(components, key=min):
+        members = set(component)
+        start = min(component)
+
+        if len(component) == 1 and start not in successors(start):
+            continue
+
+        explained.update(component)
+        cycle = find_cycle(start, members, successors)
+
+        path = " -> ".join(
+            f"{gates[index].instance} ({gates[index].output})"
+            for index in cycle[:-1]
+        )
+        detail = (
+            f"combinational loop: {path} -> {gates[cycle[-1]].instance}"
+        )
+
+        if len(component) > len(cycle) - 1:
+            detail += (
+                f" [{len(component)} gates in this strongly "
+                "connected component]"
+            )
+
+        details.append(detail)
+
+    blocked = [
+        gates[index].instance
+        for index in unresolved
+        if index not in explained
+    ]
+
+    if blocked:
+        details.append(
+            f"{len(blocked)} gate(s) waiting on the above: "
+            + ", ".join(blocked[:20])
+            + (", ..." if len(blocked) > 20 else "")
+        )
+
+    return details
+
+
 def order_gates(module: Module) -> list[Gate]:
-    """Topologically order primitive gates."""
+    """
+    Topologically order primitive gates.
+
+    Kahn's algorithm over a fan-out index, linear in gates plus
+    connections. Every gate is placed in the sweep in which a repeated
+    in-file-order pass over the unscheduled gates would first find its
+    inputs known, so gates are emitted sweep by sweep and in file order
+    within a sweep. Undriven signals and combinational loops are reported
+    explicitly.
+    """
 
-    driver_by_signal: dict[str, Gate] = {}
+    gates = module.gates
+    module_inputs = set(module.inputs)
+    driver_by_signal: dict[str, int] = {}
 
-    for gate in module.gates:
+    for index, gate in enumerate(gates):
         if gate.output in driver_by_signal:
-            previous_gate = driver_by_signal[gate.output]
+            previous_gate = gates[driver_by_signal[gate.output]]
 
             raise ConversionError(
                 f"Signal {gate.output!r} has multiple drivers: "
@@ -861,13 +1253,13 @@ def order_gates(module: Module) -> list[Gate]:
                 f"{gate.instance!r}"
             )
 
-        if gate.output in module.inputs:
+        if gate.output in module_inputs:
             raise ConversionError(
                 f"Primitive {gate.instance!r} drives input port "
                 f"{gate.output!r}"
             )
 
-        driver_by_signal[gate.output] = gate
+        driver_by_signal[gate.output] = index
 
     for output_name in module.outputs:
         if output_name not in driver_by_signal:
@@ -876,50 +1268,82 @@ def order_gates(module: Module) -> list[Gate]:
                 "supported primitive"
             )
 
-    known_signals = set(module.inputs)
-    remaining = list(module.gates)
-    ordered: list[Gate] = []
+    gate_count = len(gates)
+    fanout: list[list[int]] = [[] for _ in range(gate_count)]
+    waiting = [0] * gate_count
+    undriven: dict[str, list[int]] = {}
 
-    while remaining:
-        made_progress = False
-        unresolved: list[Gate] = []
+    for index, gate in enumerate(gates):
+        for signal in gate.inputs:
+            if signal in module_inputs:
+                continue
 
-        for gate in remaining:
-            if all(
-                input_signal in known_signals
-                for input_signal in gate.inputs
-            ):
-                ordered.append(gate)
-                known_signals.add(gate.output)
-                made_progress = True
+            driver = driver_by_signal.get(signal)
+
+            if driver is None:
+                readers = undriven.setdefault(signal, [])
+
+                if not readers or readers[-1] != index:
+                    readers.append(index)
             else:
-                unresolved.append(gate)
+                fanout[driver].append(index)
 
-        if not made_progress:
-            details: list[str] = []
+            waiting[index] += 1
 
-            for gate in unresolved:
-                unavailable_inputs = [
-                    signal
-                    for signal in gate.inputs
-                    if signal not in known_signals
-                ]
+    sweep = [0] * gate_count
+    ready = [index for index in range(gate_count) if waiting[index] == 0]
+    scheduled = 0
 
-                details.append(
-                    f"{gate.instance}: waiting for "
-                    + ", ".join(unavailable_inputs)
-                )
+    while ready:
+        driver = ready.pop()
+        scheduled += 1
+        driver_sweep = sweep[driver]
 
-            raise ConversionError(
-                "Could not resolve gate evaluation order. "
-                "There may be an undriven signal or combinational loop:\n"
-                "    "
-                + "\n    ".join(details)
+        for consumer in fanout[driver]:
+            # A consumer later in the file sees the driver's output in the
+            # same sweep; an earlier one only in the next.
+            consumer_sweep = (
+                driver_sweep if driver < consumer else driver_sweep + 1
             )
 
-        remaining = unresolved
+            if consumer_sweep > sweep[consumer]:
+                sweep[consumer] = consumer_sweep
 
-    return ordered
+            waiting[consumer] -= 1
+
+            if waiting[consumer] == 0:
+                ready.append(consumer)
+
+    if scheduled < gate_count:
+        unresolved = [
+            index
+            for index in range(gate_count)
+            if waiting[index]
+        ]
+
+        details = describe_unresolved_gates(
+            gates,
+            unresolved,
+            fanout,
+            undriven,
+        )
+
+        raise ConversionError(
+            "Could not resolve gate evaluation order:\n"
+            "    "
+            + "\n    ".join(details)
+        )
+
+    by_sweep: list[list[Gate]] = [[] for _ in range(max(sweep, default=0) + 1)]
+
+    for index, gate in enumerate(gates):
+        by_sweep[sweep[index]].append(gate)
+
+    return [
+        gate
+        for gates_in_sweep in by_sweep
+        for gate in gates_in_sweep
+    ]
 
 
 def va_logic_name(signal_name: str) -> str:
@@ -928,44 +1352,269 @@ def va_logic_name(signal_name: str) -> str:
     return f"logic_{signal_name}"
 
 
-def verilog_a_gate_expression(gate: Gate) -> str:
-    """Generate a Verilog-A integer Boolean expression."""
+def logic_expression_text(expression: str | tuple) -> str:
+    """
+    Generate a Verilog-A integer Boolean expression.
 
-    input_names = [
-        va_logic_name(signal)
-        for signal in gate.inputs
-    ]
+    An expression is a signal name or a tuple (primitive, *operands) whose
+    operands are expressions themselves.
+    """
 
-    if gate.primitive == "buf":
-        return input_names[0]
+    if isinstance(expression, str):
+        return va_logic_name(expression)
 
-    if gate.primitive == "not":
-        return f"!({input_names[0]})"
+    primitive = expression[0]
 
-    operator_by_primitive = {
-        "and": "&&",
-        "nand": "&&",
-        "or": "||",
-        "nor": "||",
-        "xor": "^",
-        "xnor": "^",
-    }
+    operand_texts = [
+        logic_expression_text(operand)
+        for operand in expression[1:]
+    ]
 
-    operator = operator_by_primitive[gate.primitive]
+    if primitive == "buf":
+        return operand_texts[0]
+
+    if primitive == "not":
+        return f"!({operand_texts[0]})"
+
+    operator = LOGIC_OPERATORS[primitive]
 
     joined_expression = (
         f" {operator} "
     ).join(
-        f"({name})"
-        for name in input_names
+        f"({text})"
+        for text in operand_texts
     )
 
-    if gate.primitive in {"nand", "nor", "xnor"}:
+    if primitive in {"nand", "nor", "xnor"}:
         return f"!({joined_expression})"
 
     return joined_expression
 
 
+def verilog_a_gate_expression(gate: Gate) -> str:
+    """Generate a Verilog-A integer Boolean expression."""
+
+    return logic_expression_text((gate.primitive, *gate.inputs))
+
+
+def gate_logic_assignments(ordered_gates: list[Gate]) -> list[LogicAssignment]:
+    """One assignment per gate, in evaluation order."""
+
+    return [
+        LogicAssignment(
+            target=gate.output,
+            expression=(gate.primitive, *gate.inputs),
+            comment=f"{gate.primitive} {gate.instance}",
+        )
+        for gate in ordered_gates
+    ]
+
+
+def compile_logic_assignments(
+    module: Module,
+    ordered_gates: list[Gate],
+    max_depth: int = COMPILED_MAX_DEPTH,
+) -> list[LogicAssignment]:
+    """
+    Combine the gates of a module into fewer, wider assignments.
+
+    Gates are hash-consed into a DAG of distinct operations: buffers and
+    double inversions become aliases, and gates computing the same
+    operation on the same (sorted) operands share one node. Logic that
+    reaches no output is dropped. A node is kept in its own variable when
+    it drives an output, is read more than once, or its inlined expression
+    would nest deeper than max_depth; every other node is inlined into its
+    reader, with and/or/xor chains flattened and an inlined inversion
+    folded into nand/nor/xnor. Assignments are emitted level by level,
+    where a level is one more than the deepest variable it reads.
+    """
+
+    node_keys: list[tuple] = []
+    node_by_key: dict[tuple, int] = {}
+    node_by_signal: dict[str, int] = {}
+    instances_by_node: list[list[str]] = []
+
+    for input_name in module.inputs:
+        node_by_signal[input_name] = len(node_keys)
+        node_keys.append(("input", input_name))
+        instances_by_node.append([])
+
+    for gate in ordered_gates:
+        operands = [
+            node_by_signal[signal]
+            for signal in gate.inputs
+        ]
+
+        primitive = gate.primitive
+
+        if primitive == "buf":
+            node = operands[0]
+
+        elif primitive == "not" and node_keys[operands[0]][0] == "not":
+            node = node_keys[operands[0]][1]
+
+        else:
+            if primitive != "not":
+                operands.sort()
+
+            key = (primitive, *operands)
+            node = node_by_key.get(key)
+
+            if node is None:
+                node = len(node_keys)
+                node_by_key[key] = node
+                node_keys.append(key)
+                instances_by_node.append([])
+
+        node_by_signal[gate.output] = node
+        instances_by_node[node].append(gate.instance)
+
+    node_count = len(node_keys)
+    readers = [0] * node_count
+    live = [False] * node_count
+    output_nodes: set[int] = set()
+
+    name_by_node = {
+        node: key[1]
+        for node, key in enumerate(node_keys)
+        if key[0] == "input"
+    }
+
+    for output_name in module.outputs:
+        node = node_by_signal[output_name]
+        live[node] = True
+        output_nodes.add(node)
+        name_by_node.setdefault(node, output_name)
+
+    for node in range(node_count - 1, -1, -1):
+        key = node_keys[node]
+
+        if live[node] and key[0] != "input":
+            for operand in key[1:]:
+                live[operand] = True
+                readers[operand] += 1
+
+    for signal, node in node_by_signal.items():
+        name_by_node.setdefault(node, signal)
+
+    stored = [False] * node_count
+    depth = [0] * node_count
+    level = [0] * node_count
+
+    # Nodes are created after their operands, so index order is a
+    # topological order. An inlined node's level is one more than the
+    # deepest variable it reads, as if it were stored itself.
+    for node in range(node_count):
+        key = node_keys[node]
+
+        if not live[node] or key[0] == "input":
+            continue
+
+        operand_depth = 0
+        operand_level = 0
+
+        for operand in key[1:]:
+            if stored[operand] or node_keys[operand][0] == "input":
+                operand_level = max(operand_level, level[operand])
+            else:
+                operand_depth = max(operand_depth, depth[operand])
+                operand_level = max(operand_level, level[operand] - 1)
+
+        depth[node] = operand_depth + 1
+        level[node] = operand_level + 1
+        stored[node] = (
+            node in output_nodes
+            or readers[node] > 1
+            or depth[node] >= max_depth
+        )
+
+    def inline(node: int) -> str | tuple:
+        if stored[node] or node_keys[node][0] == "input":
+            return name_by_node[node]
+
+        return build(node)
+
+    def build(node: int) -> tuple:
+        primitive, *operand_nodes = node_keys[node]
+        operands: list[str | tuple] = []
+
+        for operand in operand_nodes:
+            expression = inline(operand)
+
+            if (
+                primitive in ASSOCIATIVE_PRIMITIVES
+                and isinstance(expression, tuple)
+                and expression[0] == primitive
+            ):
+                operands.extend(expression[1:])
+            else:
+                operands.append(expression)
+
+        if (
+            primitive == "not"
+            and isinstance(operands[0], tuple)
+            and operands[0][0] in COMPLEMENT_PRIMITIVES
+        ):
+            inner = operands[0]
+            return (COMPLEMENT_PRIMITIVES[inner[0]], *inner[1:])
+
+        return (primitive, *operands)
+
+    def merged_instances(node: int) -> list[str]:
+        instances = list(instances_by_node[node])
+
+        for operand in node_keys[node][1:]:
+            if not stored[operand] and node_keys[operand][0] != "input":
+                instances.extend(merged_instances(operand))
+
+        return instances
+
+    ordered: list[tuple[int, int, LogicAssignment]] = []
+
+    for node in range(node_count):
+        if stored[node] and live[node]:
+            ordered.append(
+                (
+                    level[node],
+                    len(ordered),
+                    LogicAssignment(
+                        target=name_by_node[node],
+                        expression=build(node),
+                        comment=(
+                            f"level {level[node]}: "
+                            + " ".join(merged_instances(node))
+                        ),
+                    ),
+                )
+            )
+
+    for output_name in module.outputs:
+        node = node_by_signal[output_name]
+
+        if name_by_node[node] == output_name:
+            continue
+
+        ordered.append(
+            (
+                level[node] + 1,
+                len(ordered),
+                LogicAssignment(
+                    target=output_name,
+                    expression=name_by_node[node],
+                    comment=f"level {level[node] + 1}: same as "
+                    f"{name_by_node[node]}",
+                ),
+            )
+        )
+
+    ordered.sort(key=lambda item: item[:2])
+
+    return [
+        assignment
+        for _, _, assignment in ordered
+    ]
+
+
 def wrap_module_port_list(
     module_name: str,
     ports: list[str],
@@ -1005,17 +1654,27 @@ def get_effective_added_ports(
 def generate_verilog_a(
     module: Module,
     added_ports: list[AddedPort] | None = None,
+    compile_logic: bool = False,
 ) -> str:
-    """Generate complete Verilog-A source for one parsed module."""
+    """
+    Generate complete Verilog-A source for one parsed module. With
+    compile_logic the gates are combined by compile_logic_assignments()
+    instead of being assigned one by one.
+    """
 
     if added_ports is None:
         added_ports = []
 
     ordered_gates = order_gates(module)
 
+    if compile_logic:
+        assignments = compile_logic_assignments(module, ordered_gates)
+    else:
+        assignments = gate_logic_assignments(ordered_gates)
+
     generated_signals = unique_preserving_order(
-        gate.output
-        for gate in ordered_gates
+        assignment.target
+        for assignment in assignments
     )
 
     integer_logic_signals = unique_preserving_order(
@@ -1152,13 +1811,13 @@ def generate_verilog_a(
 
     lines.append("")
 
-    for gate in ordered_gates:
-        expression = verilog_a_gate_expression(gate)
+    for assignment in assignments:
+        expression = logic_expression_text(assignment.expression)
 
         lines.append(
-            f"            {va_logic_name(gate.output)} = "
+            f"            {va_logic_name(assignment.target)} = "
             f"{expression};"
-            f"  // {gate.primitive} {gate.instance}"
+            f"  // {assignment.comment}"
         )
 
     lines.append("        end")
@@ -1206,12 +1865,73 @@ def read_verilog_source(path: Path) -> str:
         ) from error
 
 
-def load_extracted_modules(path: Path) -> list[ExtractedModule]:
-    """Read, clean, and extract all modules."""
+def default_cache_dir() -> Path:
+    return Path(user_cache_dir("generate_veriloga_from_verilog"))
+
+
+def parse_cache_path(path: Path, cache_dir: Path) -> Path:
+    """One cache file per resolved input path."""
+
+    return Path(user_cache_path(cache_dir, path, CACHE_SUFFIX))
+
+
+def content_digest(*parts: str) -> str:
+    """Hash of the given strings (kept distinct by separators)."""
+
+    digest = hashlib.sha1()
+
+    for part in parts:
+        digest.update(part.encode("utf-8", "surrogatepass"))
+        digest.update(b"\0")
+
+    return digest.hexdigest()
+
+
+def module_digest(extracted: ExtractedModule) -> str:
+    """Content hash of everything parse_module() reads."""
+
+    return content_digest(
+        extracted.name,
+        "\0".join(extracted.port_header),
+        "\0".join(extracted.body),
+        "#" if extracted.parameterized else "",
+    )
+
+
+def load_parse_cache(cache_path: Path) -> ParseCache:
+    """Return the cached parses, or an empty cache if none is usable."""
+
+    cache = load_pickle_cache(cache_path, CACHE_VERSION)
+
+    if isinstance(cache, ParseCache):
+        return cache
+
+    return ParseCache()
+
+
+def save_parse_cache(cache: ParseCache, cache_path: Path) -> None:
+    """Write the cache; failing to do so is not an error."""
+
+    save_pickle_cache(cache_path, CACHE_VERSION, None, cache)
+
+
+def load_extracted_modules(
+    path: Path,
+    cache: ParseCache | None = None,
+) -> list[ExtractedModule]:
+    """
+    Read, tokenize, and extract all modules.
+
+    With a cache, an unchanged file reuses the previous extraction.
+    """
 
     source = read_verilog_source(path)
-    source = remove_comments(source)
-    source = remove_specify_blocks(source)
+
+    if cache is not None:
+        source_digest = content_digest(source)
+
+        if cache.extracted and cache.source_digest == source_digest:
+            return cache.extracted
 
     extracted_modules = extract_modules(source)
 
@@ -1220,16 +1940,47 @@ def load_extracted_modules(path: Path) -> list[ExtractedModule]:
             f"No module definitions found in {path}"
         )
 
+    if cache is not None:
+        cache.source_digest = source_digest
+        cache.extracted = extracted_modules
+
     return extracted_modules
 
 
+def parse_module_cached(
+    extracted: ExtractedModule,
+    cache: ParseCache | None,
+) -> Module:
+    """parse_module(), reusing a cached result for identical module text."""
+
+    if cache is None:
+        return parse_module(extracted)
+
+    digest = module_digest(extracted)
+    entry = cache.parsed.get(digest)
+
+    if entry is None:
+        try:
+            entry = parse_module(extracted)
+        except ConversionError as error:
+            entry = str(error)
+
+        cache.parsed[digest] = entry
+
+    if isinstance(entry, str):
+        raise ConversionError(entry)
+
+    return entry
+
+
 def parse_selected_modules(
     path: Path,
     requested_cell: str | None,
+    cache: ParseCache | None = None,
 ) -> tuple[list[Module], list[tuple[str, str]]]:
     """Parse one requested module or all convertible modules."""
 
-    extracted_modules = load_extracted_modules(path)
+    extracted_modules = load_extracted_modules(path, cache)
 
     if requested_cell is not None:
         selected = find_extracted_module(
@@ -1249,7 +2000,7 @@ def parse_selected_modules(
             )
 
         try:
-            parsed = parse_module(selected)
+            parsed = parse_module_cached(selected, cache)
         except ConversionError as error:
             raise ConversionError(
                 f"While parsing requested module "
@@ -1264,7 +2015,7 @@ def parse_selected_modules(
     for extracted in extracted_modules:
         try:
             parsed_modules.append(
-                parse_module(extracted)
+                parse_module_cached(extracted, cache)
             )
         except ConversionError as error:
             skipped_modules.append(
@@ -1277,17 +2028,28 @@ def parse_selected_modules(
 def write_output(
     module: Module,
     added_ports: list[AddedPort] | None = None,
+    compile_logic: bool = False,
 ) -> Path:
-    """Generate and atomically write one <module>.va file."""
+    """
+    Generate and atomically write one <module>.va file. An existing file
+    with the same content is left untouched.
+    """
 
     output_path = Path.cwd() / f"{module.name}.va"
-    temporary_path = Path.cwd() / f".{module.name}.va.tmp"
+    temporary_path = Path.cwd() / f".{module.name}.va.tmp{os.getpid()}"
 
     content = generate_verilog_a(
         module,
         added_ports=added_ports,
+        compile_logic=compile_logic,
     )
 
+    try:
+        if output_path.read_text(encoding="utf-8") == content:
+            return output_path
+    except (OSError, UnicodeDecodeError):
+        pass
+
     try:
         temporary_path.write_text(
             content,
@@ -1309,6 +2071,144 @@ def write_output(
     return output_path
 
 
+def convert_module(
+    module: Module,
+    requested_added_ports: list[AddedPort],
+    digest: str = "",
+    compile_logic: bool = False,
+) -> ConversionResult:
+    """Generate and write one parsed module."""
+
+    effective_added_ports, already_present = get_effective_added_ports(
+        module,
+        requested_added_ports,
+    )
+
+    result = ConversionResult(
+        name=module.name,
+        digest=digest,
+        parsed=module,
+        already_present=already_present,
+        added_port_count=len(effective_added_ports),
+    )
+
+    try:
+        result.output_path = write_output(
+            module,
+            added_ports=effective_added_ports,
+            compile_logic=compile_logic,
+        )
+    except ConversionError as error:
+        result.error = str(error)
+
+    return result
+
+
+def convert_extracted_module(
+    task: tuple[
+        ExtractedModule,
+        str,
+        Module | str | None,
+        list[AddedPort],
+        bool,
+    ],
+) -> ConversionResult:
+    """
+    Parse (unless a cached parse is supplied), generate and write one
+    module. Runs in the worker processes of convert_all_modules().
+    """
+
+    extracted, digest, parsed, requested_added_ports, compile_logic = task
+
+    if parsed is None:
+        try:
+            parsed = parse_module(extracted)
+        except ConversionError as error:
+            parsed = str(error)
+
+    if isinstance(parsed, str):
+        return ConversionResult(
+            name=extracted.name,
+            digest=digest,
+            parsed=parsed,
+        )
+
+    return convert_module(
+        parsed,
+        requested_added_ports,
+        digest,
+        compile_logic,
+    )
+
+
+def convert_all_modules(
+    extracted_modules: list[ExtractedModule],
+    requested_added_ports: list[AddedPort],
+    cache: ParseCache | None = None,
+    jobs: int = 1,
+    compile_logic: bool = False,
+) -> Iterator[ConversionResult]:
+    """
+    Convert every module, in `jobs` processes when jobs > 1. Results come
+    back in module order. Modules whose text matches a cached parse are not
+    parsed again; new parses are recorded in the cache.
+    """
+
+    tasks = []
+
+    for extracted in extracted_modules:
+        digest = module_digest(extracted) if cache is not None else ""
+        parsed = cache.parsed.get(digest) if cache is not None else None
+        tasks.append(
+            (
+                extracted,
+                digest,
+                parsed,
+                requested_added_ports,
+                compile_logic,
+            )
+        )
+
+    if jobs > 1 and len(tasks) > 1:
+        chunksize = max(1, len(tasks) // (jobs * 4))
+
+        with multiprocessing.Pool(jobs) as pool:
+            results = pool.imap(
+                convert_extracted_module,
+                tasks,
+                chunksize,
+            )
+
+            for result in results:
+                if cache is not None:
+                    cache.parsed[result.digest] = result.parsed
+                yield result
+        return
+
+    for task in tasks:
+        result = convert_extracted_module(task)
+
+        if cache is not None:
+            cache.parsed[result.digest] = result.parsed
+        yield result
+
+
+def positive_int(value: str) -> int:
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"expected a positive integer, got {value!r}"
+        ) from None
+
+    if number < 1:
+        raise argparse.ArgumentTypeError(
+            f"expected a positive integer, got {value!r}"
+        )
+
+    return number
+
+
 def build_argument_parser() -> argparse.ArgumentParser:
     """Construct the command-line parser."""
 
@@ -1349,6 +2249,45 @@ def build_argument_parser() -> argparse.ArgumentParser:
         ),
     )
 
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=positive_int,
+        default=1,
+        help=(
+            "Convert modules in this many worker processes "
+            "(default: 1). Ignored when a cellname is given."
+        ),
+    )
+
+    parser.add_argument(
+        "--compile-logic",
+        action="store_true",
+        help=(
+            "Combine the gates of each module into fewer, wider "
+            "assignments: shared subexpressions are computed once, "
+            "single-reader gates are inlined, and the result is "
+            "evaluated level by level"
+        ),
+    )
+
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        metavar="DIR",
+        help=(
+            "Directory for cached parses (default: "
+            "$XDG_CACHE_HOME/generate_veriloga_from_verilog or "
+            "~/.cache/generate_veriloga_from_verilog)"
+        ),
+    )
+
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Do not read or write cached parses",
+    )
+
     return parser
 
 
@@ -1366,62 +2305,89 @@ def main() -> int:
         )
         return 1
 
+    cache: ParseCache | None = None
+    cache_path: Path | None = None
+
+    if not args.no_cache:
+        cache_path = parse_cache_path(
+            args.verilog_file,
+            args.cache_dir or default_cache_dir(),
+        )
+        cache = load_parse_cache(cache_path)
+
     try:
         requested_added_ports = parse_addports_spec(
             args.addports
         )
 
-        modules_to_generate, skipped_modules = (
-            parse_selected_modules(
+        if args.cellname is not None:
+            modules_to_generate, _ = parse_selected_modules(
                 args.verilog_file,
                 args.cellname,
+                cache,
+            )
+
+            results: Iterable[ConversionResult] = (
+                convert_module(
+                    module,
+                    requested_added_ports,
+                    compile_logic=args.compile_logic,
+                )
+                for module in modules_to_generate
+            )
+
+        else:
+            results = convert_all_modules(
+                load_extracted_modules(args.verilog_file, cache),
+                requested_added_ports,
+                cache,
+                args.jobs,
+                args.compile_logic,
             )
-        )
 
     except ConversionError as error:
         print(
             f"ERROR: {error}",
             file=sys.stderr,
         )
+
+        if cache is not None and cache_path is not None:
+            save_parse_cache(cache, cache_path)
+
         return 1
 
     generated_count = 0
     generation_failures = 0
+    skipped_modules: list[tuple[str, str]] = []
 
-    for module in modules_to_generate:
-        effective_added_ports, already_present = (
-            get_effective_added_ports(
-                module,
-                requested_added_ports,
-            )
-        )
+    for result in results:
+        if isinstance(result.parsed, str):
+            skipped_modules.append((result.name, result.parsed))
+            continue
+
+        module = result.parsed
 
-        if already_present:
+        if result.already_present:
             print(
                 f"WARNING: {module.name}: not adding ports already "
                 f"present in the Verilog module: "
-                f"{', '.join(already_present)}",
+                f"{', '.join(result.already_present)}",
                 file=sys.stderr,
             )
 
-        try:
-            output_path = write_output(
-                module,
-                added_ports=effective_added_ports,
-            )
-
-        except ConversionError as error:
+        if result.error is not None:
             generation_failures += 1
 
             print(
                 f"ERROR: Could not generate module "
-                f"{module.name!r}: {error}",
+                f"{module.name!r}: {result.error}",
                 file=sys.stderr,
             )
 
             continue
 
         generated_count += 1
+        output_path = result.output_path
 
         output_word = (
             "output"
@@ -1434,21 +2400,33 @@ def main() -> int:
             f"({len(module.outputs)} {output_word}"
         )
 
-        if effective_added_ports:
+        if result.added_port_count:
             added_port_word = (
                 "port"
-                if len(effective_added_ports) == 1
+                if result.added_port_count == 1
                 else "ports"
             )
 
             summary += (
-                f", {len(effective_added_ports)} added "
+                f", {result.added_port_count} added "
                 f"{added_port_word}"
             )
 
         summary += ")"
         print(summary)
 
+    if cache is not None and cache_path is not None:
+        current = {
+            module_digest(extracted)
+            for extracted in cache.extracted
+        }
+        cache.parsed = {
+            digest: entry
+            for digest, entry in cache.parsed.items()
+            if digest in current
+        }
+        save_parse_cache(cache, cache_path)
+
     if skipped_modules:
         print(
             "\nSkipped modules:",
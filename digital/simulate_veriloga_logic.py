@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+
+"""
+Evaluate the Boolean logic of a Verilog-A model written by
+generate_veriloga_from_verilog.py, in plain Python.
+
+Usage:
+
+    python3 simulate_veriloga_logic.py mux2.va A=1 B=0 S=1
+    python3 simulate_veriloga_logic.py mux2.va --table
+
+The event block of a generated model is a list of
+
+    logic_<signal> = <expression>;
+
+assignments over the operators !, &&, || and ^ on 0/1 integers. They are
+translated once into a Python function that evaluates many input vectors
+at the same time: bit i of every value belongs to vector i, so &&, ||
+and ! become the bitwise &, | and ~. Both the gate-by-gate form and the
+--compile-logic form are read, so the two can be checked against each
+other (see bench_compiled_logic.py).
+
+Only the text the generator emits is accepted; anything else in an
+assignment is reported instead of being guessed at.
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import re
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+
+INPUT_RE = re.compile(
+    r"^\s*logic_([A-Za-z0-9_$]+) = \(V\(([A-Za-z0-9_$]+)\) > vtrans\);$"
+)
+
+ASSIGNMENT_RE = re.compile(
+    r"^\s*logic_([A-Za-z0-9_$]+) = (.*?);(?:\s*//.*)?$"
+)
+
+OUTPUT_RE = re.compile(
+    r"^\s*logic_([A-Za-z0-9_$]+) \? vlogic_high : vlogic_low,$"
+)
+
+EXPRESSION_TOKEN_RE = re.compile(
+    r"\s*(logic_[A-Za-z0-9_$]+|&&|\|\||[!^()]|\S)"
+)
+
+# Binary operators from the loosest to the tightest binding, with their
+# Python bitwise equivalents.
+BINARY_OPERATORS = [
+    ("||", "|"),
+    ("&&", "&"),
+    ("^", "^"),
+]
+
+
+class SimulationError(Exception):
+    """Raised when a Verilog-A model is not in the generated form."""
+
+
+@dataclass
+class LogicModel:
+    """The logic of one generated model; signal names lack 'logic_'."""
+
+    inputs: list[str]
+    outputs: list[str]
+    assignments: list[tuple[str, str]]
+    evaluate: Callable[[int, dict[str, int]], dict[str, int]]
+
+
+class ExpressionTranslator:
+    """
+    Rewrite one Verilog-A logic expression as fully parenthesized Python,
+    following Verilog precedence (! before ^ before && before ||). ! becomes
+    ~, so values carry ones above bit `width`; simulate() masks them off.
+    """
+
+    def __init__(self, text: str, local_name: dict[str, str]) -> None:
+        self.tokens = EXPRESSION_TOKEN_RE.findall(text)
+        self.local_name = local_name
+        self.position = 0
+
+    def peek(self) -> str:
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return ""
+
+    def take(self) -> str:
+        token = self.peek()
+
+        if not token:
+            raise SimulationError("Expression ends too early")
+
+        self.position += 1
+        return token
+
+    def translate(self) -> str:
+        result = self.binary(0)
+
+        if self.peek():
+            raise SimulationError(
+                f"Unexpected {self.peek()!r} in expression"
+            )
+
+        return result
+
+    def binary(self, level: int) -> str:
+        if level == len(BINARY_OPERATORS):
+            return self.unary()
+
+        operator, python_operator = BINARY_OPERATORS[level]
+        operands = [self.binary(level + 1)]
+
+        while self.peek() == operator:
+            self.position += 1
+            operands.append(self.binary(level + 1))
+
+        if len(operands) == 1:
+            return operands[0]
+
+        return "(" + f" {python_operator} ".join(operands) + ")"
+
+    def unary(self) -> str:
+        token = self.take()
+
+        if token == "!":
+            return f"~{self.unary()}"
+
+        if token == "(":
+            inner = self.binary(0)
+
+            if self.take() != ")":
+                raise SimulationError("Unbalanced parentheses in expression")
+
+            return f"({inner})"
+
+        if token.startswith("logic_"):
+            name = token[len("logic_"):]
+
+            if name not in self.local_name:
+                raise SimulationError(
+                    f"Expression reads {token!r} before it is assigned"
+                )
+
+            return self.local_name[name]
+
+        raise SimulationError(f"Unsupported {token!r} in expression")
+
+
+def read_logic_model(text: str) -> LogicModel:
+    """Extract and compile the logic of a generated Verilog-A model."""
+
+    inputs: list[str] = []
+    outputs: list[str] = []
+    assignments: list[tuple[str, str]] = []
+
+    for line in text.splitlines():
+        match = INPUT_RE.match(line)
+
+        if match is not None:
+            if match.group(1) != match.group(2):
+                raise SimulationError(f"Unexpected input line: {line.strip()}")
+
+            inputs.append(match.group(1))
+            continue
+
+        match = OUTPUT_RE.match(line)
+
+        if match is not None:
+            outputs.append(match.group(1))
+            continue
+
+        match = ASSIGNMENT_RE.match(line)
+
+        if match is not None:
+            assignments.append((match.group(1), match.group(2)))
+
+    if not outputs:
+        raise SimulationError("No transition() outputs found")
+
+    local_name: dict[str, str] = {}
+    body = ["def evaluate(mask, inputs):"]
+
+    for name in inputs:
+        local_name[name] = f"v{len(local_name)}"
+        body.append(f"    {local_name[name]} = inputs[{name!r}]")
+
+    for target, expression in assignments:
+        python_expression = ExpressionTranslator(
+            expression,
+            local_name,
+        ).translate()
+
+        if target in inputs:
+            raise SimulationError(f"Input {target!r} is assigned again")
+
+        local_name[target] = f"v{len(local_name)}"
+        body.append(f"    {local_name[target]} = {python_expression}")
+
+    for name in outputs:
+        if name not in local_name:
+            raise SimulationError(f"Output {name!r} is never assigned")
+
+    body.append(
+        "    return {"
+        + ", ".join(
+            f"{name!r}: {local_name[name]} & mask"
+            for name in outputs
+        )
+        + "}"
+    )
+
+    namespace: dict[str, object] = {}
+    exec(compile("\n".join(body), "<veriloga logic>", "exec"), namespace)
+
+    return LogicModel(
+        inputs=inputs,
+        outputs=outputs,
+        assignments=assignments,
+        evaluate=namespace["evaluate"],
+    )
+
+
+def simulate(
+    model: LogicModel,
+    input_values: dict[str, int],
+    width: int = 1,
+) -> dict[str, int]:
+    """
+    Evaluate `width` input vectors at once. Bit i of each input value is
+    that input in vector i; the outputs are packed the same way and
+    masked to `width` bits.
+    """
+
+    missing = [
+        name
+        for name in model.inputs
+        if name not in input_values
+    ]
+
+    if missing:
+        raise SimulationError(f"No value for input(s): {', '.join(missing)}")
+
+    unknown = sorted(set(input_values) - set(model.inputs))
+
+    if unknown:
+        raise SimulationError(f"Not an input: {', '.join(unknown)}")
+
+    mask = (1 << width) - 1
+
+    return model.evaluate(
+        mask,
+        {
+            name: input_values[name] & mask
+            for name in model.inputs
+        },
+    )
+
+
+def truth_table(model: LogicModel) -> list[tuple[list[int], list[int]]]:
+    """Every input combination and its outputs, in counting order."""
+
+    rows = list(itertools.product((0, 1), repeat=len(model.inputs)))
+
+    packed = {
+        name: sum(
+            row[column] << index
+            for index, row in enumerate(rows)
+        )
+        for column, name in enumerate(model.inputs)
+    }
+
+    results = simulate(model, packed, max(1, len(rows)))
+
+    return [
+        (
+            list(row),
+            [
+                (results[name] >> index) & 1
+                for name in model.outputs
+            ],
+        )
+        for index, row in enumerate(rows)
+    ]
+
+
+def parse_input_setting(text: str) -> tuple[str, int]:
+    name, separator, value = text.partition("=")
+
+    if not separator or value not in {"0", "1"}:
+        raise argparse.ArgumentTypeError(
+            f"expected NAME=0 or NAME=1, got {text!r}"
+        )
+
+    return name, int(value)
+
+
+def build_argument_parser() -> argparse.ArgumentParser:
+    """Construct the command-line parser."""
+
+    parser = argparse.ArgumentParser(
+        description=(
+            "Evaluate the logic of a Verilog-A model generated by "
+            "generate_veriloga_from_verilog.py."
+        )
+    )
+
+    parser.add_argument("va_file", type=Path, help="Generated .va file")
+
+    parser.add_argument(
+        "settings",
+        nargs="*",
+        type=parse_input_setting,
+        metavar="NAME=0|1",
+        help="Input values",
+    )
+
+    parser.add_argument(
+        "--table",
+        action="store_true",
+        help="Print the full truth table instead",
+    )
+
+    return parser
+
+
+def main() -> int:
+    """Program entry point."""
+
+    args = build_argument_parser().parse_args()
+
+    try:
+        model = read_logic_model(
+            args.va_file.read_text(encoding="utf-8")
+        )
+
+        if args.table:
+            print(" ".join(model.inputs), "|", " ".join(model.outputs))
+
+            for input_row, output_row in truth_table(model):
+                print(
+                    " ".join(map(str, input_row)),
+                    "|",
+                    " ".join(map(str, output_row)),
+                )
+
+            return 0
+
+        results = simulate(model, dict(args.settings))
+
+    except (OSError, UnicodeDecodeError, SimulationError) as error:
+        print(f"ERROR: {error}", file=sys.stderr)
+        return 1
+
+    for name in model.outputs:
+        print(f"{name}={results[name]}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
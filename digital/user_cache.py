@@ -0,0 +1,78 @@
+"""
+Pickle caches under the user cache directory for the digital/ tools.
+
+    $XDG_CACHE_HOME/<tool>/<file>.<path digest><suffix>
+
+(~/.cache when XDG_CACHE_HOME is unset). Caches are never written next to
+the sources they index: a pickle can run code when loaded, so one must not
+be readable from a directory other users can write. The same helpers live
+in circuits/spice_netlist.py for the circuits/ tools, which run from their
+own directory.
+"""
+
+import hashlib
+import os
+import pickle
+
+
+def user_cache_dir(tool):
+    """$XDG_CACHE_HOME/<tool>, or ~/.cache/<tool>."""
+    base = os.environ.get("XDG_CACHE_HOME")
+    return os.path.join(base or os.path.join(os.path.expanduser("~"), ".cache"), tool)
+
+
+def user_cache_path(cache_dir, path, suffix, variant=""):
+    """
+    Cache file in cache_dir for the file at path: one per resolved path
+    (and variant, e.g. a mode that changes the cached result), named
+    <basename>.<digest><suffix>.
+    """
+    real_path = os.path.realpath(path)
+    key = real_path + "\0" + variant if variant else real_path
+    digest = hashlib.sha1(key.encode("utf-8", "surrogateescape")).hexdigest()[:16]
+    return os.path.join(cache_dir, f"{os.path.basename(real_path)}.{digest}{suffix}")
+
+
+def file_stamp(path):
+    """
+    (size, mtime_ns) of path; a cache built from path is valid while this
+    is unchanged.
+    """
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns
+
+
+def load_pickle_cache(cache_path, version, stamp=None):
+    """
+    The object save_pickle_cache() wrote to cache_path with this version
+    and stamp, or None if there is none.
+    """
+    try:
+        with open(cache_path, "rb") as f:
+            cached_version, cached_stamp, obj = pickle.load(f)
+    except (OSError, EOFError, ValueError, TypeError, ImportError,
+            AttributeError, pickle.UnpicklingError):
+        return None
+    if cached_version != version or cached_stamp != stamp:
+        return None
+    return obj
+
+
+def save_pickle_cache(cache_path, version, stamp, obj):
+    """
+    Atomically pickle obj to cache_path under version and stamp, creating
+    the directory on demand. Returns False if it could not be written.
+    """
+    tmp_path = f"{cache_path}.tmp{os.getpid()}"
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(tmp_path, "wb") as f:
+            pickle.dump((version, stamp, obj), f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except (OSError, AttributeError, pickle.PicklingError):
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        return False
+    return True